@@ -4,10 +4,12 @@ Utility script to add new vendors to the configuration.
 This makes it easy to add new vendors without manually editing JSON files.
 """
 
-import json
 import os
 import sys
 
+from table_backends import BACKENDS, DEFAULT_BACKEND
+from vendor_registry import VendorRegistry, DEFAULT_REGISTRY_PATH
+
 def add_vendor():
     """Interactive script to add a new vendor configuration."""
     print("=== Add New Vendor Configuration ===\n")
@@ -38,12 +40,18 @@ def add_vendor():
         skip_rows = int(skip_rows) if skip_rows.isdigit() else 0
     else:
         skip_rows = 0
-        print("Enter table areas for PDF extraction (comma-separated):")
+        print("Enter table areas for PDF extraction (separate multiple areas with ';'):")
         print("Format: 'x1,y1,x2,y2' (e.g., '0,100,800,600')")
         table_areas_input = input("Table areas: ").strip()
-        table_areas = [area.strip() for area in table_areas_input.split(',') if area.strip()]
+        table_areas = [area.strip() for area in table_areas_input.split(';') if area.strip()]
         if not table_areas:
             table_areas = ['0,100,800,600']  # Default
+        print(f"Table backend: {', '.join(BACKENDS)}")
+        print("(run benchmark_backends.py on sample quotes to compare them)")
+        backend = input(f"Backend [{DEFAULT_BACKEND}]: ").strip().lower() or DEFAULT_BACKEND
+        while backend not in BACKENDS:
+            print(f"Unknown backend '{backend}'.")
+            backend = input(f"Backend [{DEFAULT_BACKEND}]: ").strip().lower() or DEFAULT_BACKEND
     
     print(f"\n--- Column Headers ---")
     print("Enter the column header names used by this vendor:")
@@ -76,21 +84,21 @@ def add_vendor():
         config['skip_rows'] = skip_rows
     else:
         config['table_areas'] = table_areas
+        config['backend'] = backend
     
-    # Load existing config
-    config_file = 'vendor_config.json'
-    if os.path.exists(config_file):
-        with open(config_file, 'r') as f:
-            data = json.load(f)
-    else:
-        data = {'vendors': {}}
-    
-    # Add new vendor
-    data['vendors'][vendor_name] = config
+    # Load the vendor registry
+    config_file = DEFAULT_REGISTRY_PATH
+    if not os.path.exists(config_file):
+        with open(config_file, 'w') as f:
+            f.write('{"vendors": {}}')
+    registry = VendorRegistry(config_file)
     
-    # Save updated config
-    with open(config_file, 'w') as f:
-        json.dump(data, f, indent=2)
+    # Validate, add and save the new vendor
+    try:
+        registry.add_vendor(vendor_name, config)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return
     
     print(f"\n✅ Successfully added vendor '{vendor_name}' to configuration!")
     print(f"Configuration saved to {config_file}")
@@ -98,27 +106,22 @@ def add_vendor():
 
 def list_vendors():
     """List all configured vendors."""
-    config_file = 'vendor_config.json'
+    config_file = DEFAULT_REGISTRY_PATH
     if not os.path.exists(config_file):
         print("No vendor configuration file found.")
         return
     
-    with open(config_file, 'r') as f:
-        data = json.load(f)
-    
-    vendors = data.get('vendors', {})
+    vendors = VendorRegistry(config_file).vendors
     if not vendors:
         print("No vendors configured.")
         return
     
     print("=== Configured Vendors ===")
-    for vendor_name, config in vendors.items():
-        vendor_info = config.get('vendor_info', {})
-        patterns = config.get('patterns', [])
+    for vendor_name, spec in vendors.items():
         print(f"\n{vendor_name}:")
-        print(f"  Name: {vendor_info.get('name', 'N/A')}")
-        print(f"  Patterns: {', '.join(patterns)}")
-        print(f"  Type: {config.get('file_type', 'pdf')}")
+        print(f"  Name: {spec.vendor_info.get('name', 'N/A')}")
+        print(f"  Patterns: {', '.join(spec.patterns)}")
+        print(f"  Type: {spec.file_type}")
 
 def main():
     """Main function."""
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Offline auto-tuner for a vendor's table extraction parameters.
+
+Given sample quotes for a vendor and their expected line items (see
+expected_line_items.json), searches table areas, column separators and
+table backends (Camelot stream/lattice, pdfplumber, PyMuPDF) in parallel
+across cores, scores every candidate on line-item accuracy and extraction
+time, and writes the winner into the vendor's entry in the vendor registry.
+Runtime extraction then makes one well-tuned call instead of sweeping.
+
+A winner is only written if it reaches a minimum accuracy and does at least
+as well as the vendor's current configuration; --force writes it anyway.
+
+Usage: python autotune.py <vendor> [--samples FILE ...] [--workers N] [--min-accuracy A] [--dry-run] [--force]
+"""
+
+import argparse
+import itertools
+import logging
+import multiprocessing
+import os
+import statistics
+import sys
+import time
+from typing import List
+
+import fitz  # PyMuPDF
+
+from benchmark_backends import EXPECTED_FILE, line_item_accuracy, load_expected
+from po_extractor import IntelligentExtractor, INPUT_DIR, VENDOR_REGISTRY, setup_logging
+from table_backends import DEFAULT_BACKEND
+
+TUNING_BACKENDS = ('camelot-stream', 'camelot-lattice', 'pdfplumber', 'pymupdf')
+BOTTOM_MARGINS = (30, 60, 100, 150)  # PDF-space y of the area's bottom edge
+MIN_ACCURACY = 0.9  # below this a winner is not written without --force
+
+
+def find_header_words(page: fitz.Page, header_lookup: dict) -> list:
+    """Words on the page's best header row: the line matching the most configured headers."""
+    rows = {}
+    for x0, y0, x1, y1, word, *_ in page.get_text('words'):
+        if word.strip().lower() in header_lookup:
+            rows.setdefault(round(y0), []).append((x0, y0, x1, y1))
+    if not rows:
+        return []
+    return sorted(max(rows.values(), key=len))
+
+
+def candidate_areas(page: fitz.Page, header_words: list, configured: List[str] = ()) -> List[str]:
+    """Camelot areas from just above the header row down to several bottom margins."""
+    width, height = page.rect.width, page.rect.height
+    areas = list(configured)
+    if header_words:
+        header_top = height - min(y0 for _, y0, _, _ in header_words)  # to PDF space
+        for top_margin, bottom in itertools.product((5, 20), BOTTOM_MARGINS):
+            if bottom < header_top:
+                areas.append(f"0,{header_top + top_margin:.0f},{width:.0f},{bottom}")
+    return list(dict.fromkeys(areas))
+
+
+def candidate_columns(header_words: list) -> list:
+    """No separators, separators midway between header words, or at each header's left edge."""
+    candidates = [None]
+    if len(header_words) >= 2:
+        midpoints = [(prev[2] + cur[0]) / 2 for prev, cur in zip(header_words, header_words[1:])]
+        left_edges = [cur[0] - 2 for cur in header_words[1:]]
+        candidates.append(','.join(f"{x:.0f}" for x in midpoints))
+        candidates.append(','.join(f"{x:.0f}" for x in left_edges))
+    return candidates
+
+
+def build_candidates(vendor: str, samples: List[str], backends=TUNING_BACKENDS) -> list:
+    """(backend, area, columns) candidates derived from the first sample's header row."""
+    spec = VENDOR_REGISTRY.get(vendor)
+    if spec is None:
+        raise ValueError(f"vendor '{vendor}' is not configured")
+    with fitz.open(samples[0]) as doc:
+        page = doc[0]
+        header_words = find_header_words(page, spec.header_lookup)
+        areas = candidate_areas(page, header_words, spec.table_areas)
+    candidates = []
+    for backend, area, columns in itertools.product(backends, areas, candidate_columns(header_words)):
+        if columns and backend == 'camelot-lattice':
+            continue  # lattice ignores column separators
+        candidates.append((backend, area, columns))
+    return candidates
+
+
+def evaluate_candidate(task) -> dict:
+    """Worker: run one (vendor, candidate, samples) task and score it across all samples."""
+    vendor, (backend, area, columns), samples = task
+    logging.getLogger().setLevel(logging.WARNING)
+    header_lookup = VENDOR_REGISTRY.get(vendor).header_lookup
+    accuracies, seconds = [], []
+    for file_path, expected in samples:
+        extractor = IntelligentExtractor(file_path)
+        start = time.perf_counter()
+        items = extractor._extract_table_line_items(backend, [area], header_lookup, [columns] if columns else None)
+        seconds.append(time.perf_counter() - start)
+        accuracies.append(line_item_accuracy(items, expected))
+    return {
+        'backend': backend,
+        'area': area,
+        'columns': columns,
+        'accuracy': statistics.mean(accuracies),
+        'seconds': statistics.mean(seconds)
+    }
+
+
+def evaluate_current(vendor: str, samples: list) -> float:
+    """Mean line-item accuracy of the vendor's configured backend, areas and separators; 0.0 if it has no areas."""
+    spec = VENDOR_REGISTRY.get(vendor)
+    if spec is None or not spec.table_areas:
+        return 0.0
+    accuracies = []
+    for file_path, expected in samples:
+        extractor = IntelligentExtractor(file_path)
+        items = extractor._extract_table_line_items(spec.backend or DEFAULT_BACKEND, list(spec.table_areas),
+                                                    spec.header_lookup, list(spec.columns) or None)
+        accuracies.append(line_item_accuracy(items, expected))
+    return statistics.mean(accuracies)
+
+
+def pick_winner(results: list, time_weight: float = 0.05) -> dict:
+    """Highest accuracy wins; near-ties (within time_weight per second) go to the faster candidate."""
+    return max(results, key=lambda r: (round(r['accuracy'] - time_weight * r['seconds'], 3), -r['seconds']))
+
+
+def load_samples(vendor: str, samples: List[str] = None, expected_path: str = EXPECTED_FILE) -> list:
+    """(path, expected line items) for the given samples, default: the vendor's PDFs in the expected file."""
+    expected = load_expected(expected_path)
+    if samples is None:
+        samples = [os.path.join(INPUT_DIR, name) for name, entry in expected.items()
+                   if entry.get('vendor') == vendor and name.lower().endswith('.pdf')]
+    if not samples:
+        raise ValueError(f"no PDF samples with expected line items for vendor '{vendor}'")
+    return [(path, expected[os.path.basename(path)]['line_items']) for path in samples]
+
+
+def tune_vendor(vendor: str, samples: List[str] = None, expected_path: str = EXPECTED_FILE,
+                workers: int = None, backends=TUNING_BACKENDS) -> tuple:
+    """Search candidates in parallel. Returns (winner, all results)."""
+    sample_data = load_samples(vendor, samples, expected_path)
+    samples = [path for path, _ in sample_data]
+
+    candidates = build_candidates(vendor, samples, backends)
+    logging.info(f"Evaluating {len(candidates)} candidates for {vendor} on {len(samples)} sample(s)")
+    tasks = [(vendor, candidate, sample_data) for candidate in candidates]
+    with multiprocessing.Pool(processes=workers or os.cpu_count()) as pool:
+        results = pool.map(evaluate_candidate, tasks)
+    return pick_winner(results), results
+
+
+def write_winner(vendor: str, winner: dict, registry=VENDOR_REGISTRY, current_accuracy: float = 0.0,
+                 min_accuracy: float = MIN_ACCURACY, force: bool = False):
+    """Store the winning backend, area and separators in the vendor's registry entry.
+
+    Raises ValueError instead if the winner is below min_accuracy or less
+    accurate than the current configuration, unless force is set.
+    """
+    if not force and winner['accuracy'] < min_accuracy:
+        raise ValueError(f"winner accuracy {winner['accuracy']:.2f} is below the minimum {min_accuracy:.2f}")
+    if not force and winner['accuracy'] < current_accuracy:
+        raise ValueError(f"winner accuracy {winner['accuracy']:.2f} is below the current "
+                         f"configuration's {current_accuracy:.2f}")
+    registry.update_vendor(
+        vendor,
+        backend=winner['backend'],
+        table_areas=[winner['area']],
+        columns=[winner['columns']] if winner['columns'] else None
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Auto-tune a vendor's table areas, column separators and backend.")
+    parser.add_argument('vendor', help="vendor key in the vendor registry")
+    parser.add_argument('--samples', nargs='+', help="sample quotes (default: the vendor's quotes in the expected file)")
+    parser.add_argument('--expected', default=EXPECTED_FILE, help="expected line items JSON")
+    parser.add_argument('--workers', type=int, help="worker processes (default: all cores)")
+    parser.add_argument('--min-accuracy', type=float, default=MIN_ACCURACY,
+                        help=f"lowest winner accuracy that is written (default: {MIN_ACCURACY})")
+    parser.add_argument('--dry-run', action='store_true', help="report the winner without writing it")
+    parser.add_argument('--force', action='store_true',
+                        help="write the winner even if it is below the minimum or the current configuration")
+    args = parser.parse_args()
+
+    setup_logging()
+    winner, results = tune_vendor(args.vendor, args.samples, args.expected, args.workers)
+    current_accuracy = evaluate_current(args.vendor, load_samples(args.vendor, args.samples, args.expected))
+    print(f"{'Backend':<16} {'Area':<22} {'Columns':<28} {'Accuracy':>8} {'Seconds':>8}")
+    for r in sorted(results, key=lambda r: (-r['accuracy'], r['seconds']))[:10]:
+        print(f"{r['backend']:<16} {r['area']:<22} {str(r['columns']):<28} {r['accuracy']:>8.2f} {r['seconds']:>8.3f}")
+    print(f"\nWinner: {winner['backend']} area={winner['area']} columns={winner['columns']} "
+          f"accuracy={winner['accuracy']:.2f} seconds={winner['seconds']:.3f}")
+    print(f"Current configuration: accuracy={current_accuracy:.2f}")
+    if not args.dry_run:
+        try:
+            write_winner(args.vendor, winner, current_accuracy=current_accuracy, min_accuracy=args.min_accuracy,
+                         force=args.force)
+        except ValueError as e:
+            print(f"Not updating '{args.vendor}': {e} (use --force to write it anyway)")
+            sys.exit(1)
+        print(f"Updated '{args.vendor}' in {VENDOR_REGISTRY.path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Head-to-head benchmark of the table-extraction backends.
+
+Runs every backend in table_backends.BACKENDS over the PDF quotes in the
+input directory that have expected results in expected_line_items.json,
+using each vendor's configured table areas, column separators and headers.
+Reports median latency, peak Python memory (tracemalloc; memory used inside
+native libraries such as Ghostscript or pdfium is not counted) and
+line-item accuracy, then recommends the fastest backend per vendor among
+those with the best accuracy.
+
+Usage: python benchmark_backends.py [--repeat N] [--json]
+"""
+
+import argparse
+import json
+import logging
+import os
+import statistics
+import time
+import tracemalloc
+
+from po_extractor import IntelligentExtractor, INPUT_DIR
+from table_backends import BACKENDS
+
+EXPECTED_FILE = 'expected_line_items.json'
+
+
+def load_expected(path: str = EXPECTED_FILE) -> dict:
+    """Expected results keyed by quote filename: {'vendor': ..., 'line_items': [...]}."""
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def line_item_accuracy(extracted, expected: list, tolerance: float = 0.01) -> float:
+    """F1 score of extracted LineItems against expected line item dicts.
+
+    An extracted item matches an unused expected item with the same item
+    number whose quantity, unit price and line total agree within tolerance.
+    """
+    if not extracted and not expected:
+        return 1.0
+    unmatched = list(expected)
+    matched = 0
+    for item in extracted:
+        for candidate in unmatched:
+            if (candidate['item_number'] == item.item_number
+                    and abs(candidate['quantity'] - item.quantity) <= tolerance
+                    and abs(candidate['unit_price'] - item.unit_price) <= tolerance
+                    and abs(candidate['line_total'] - item.line_total) <= tolerance):
+                unmatched.remove(candidate)
+                matched += 1
+                break
+    return 2 * matched / (len(extracted) + len(expected))
+
+
+def benchmark_backend(extractor: IntelligentExtractor, backend_name: str, expected: list, repeat: int = 3) -> dict:
+    """Time one backend on one quote and score its line items."""
+    spec = extractor.registry.get(extractor.vendor_type)
+    table_areas = list(spec.table_areas) if spec and spec.table_areas else None
+    header_lookup = spec.header_lookup if spec else None
+    columns = list(spec.columns) if spec and spec.columns else None
+
+    latencies = []
+    peak = 0
+    items = []
+    for _ in range(repeat):
+        tracemalloc.start()
+        start = time.perf_counter()
+        items = extractor._extract_table_line_items(backend_name, table_areas, header_lookup, columns)
+        latencies.append(time.perf_counter() - start)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+    return {
+        'backend': backend_name,
+        'latency_ms': statistics.median(latencies) * 1000,
+        'peak_kb': peak / 1024,
+        'items': len(items),
+        'accuracy': line_item_accuracy(items, expected)
+    }
+
+
+def run_benchmark(input_dir: str = INPUT_DIR, expected_path: str = EXPECTED_FILE, repeat: int = 3) -> list:
+    expected = load_expected(expected_path)
+    results = []
+    for filename in sorted(expected):
+        file_path = os.path.join(input_dir, filename)
+        if not filename.lower().endswith('.pdf') or not os.path.exists(file_path):
+            continue
+        extractor = IntelligentExtractor(file_path)
+        for backend_name in BACKENDS:
+            result = benchmark_backend(extractor, backend_name, expected[filename]['line_items'], repeat)
+            result.update(file=filename, vendor=extractor.vendor_type)
+            results.append(result)
+    return results
+
+
+def recommend(results: list) -> dict:
+    """Per vendor: the fastest backend among those with the best mean accuracy."""
+    by_vendor = {}
+    for result in results:
+        stats = by_vendor.setdefault(result['vendor'], {}).setdefault(result['backend'], {'accuracy': [], 'latency': []})
+        stats['accuracy'].append(result['accuracy'])
+        stats['latency'].append(result['latency_ms'])
+    recommendations = {}
+    for vendor, backends in by_vendor.items():
+        summary = {name: (statistics.mean(s['accuracy']), statistics.mean(s['latency'])) for name, s in backends.items()}
+        best_accuracy = max(accuracy for accuracy, _ in summary.values())
+        recommendations[vendor] = min((latency, name) for name, (accuracy, latency) in summary.items()
+                                      if accuracy >= best_accuracy - 1e-9)[1]
+    return recommendations
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark table-extraction backends on sample quotes.")
+    parser.add_argument('--repeat', type=int, default=3, help="runs per backend and quote (median latency is reported)")
+    parser.add_argument('--json', action='store_true', help="print results as JSON")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    results = run_benchmark(repeat=args.repeat)
+    recommendations = recommend(results)
+
+    if args.json:
+        print(json.dumps({'results': results, 'recommendations': recommendations}, indent=2))
+        return
+
+    print(f"{'Quote':<36} {'Vendor':<10} {'Backend':<16} {'Latency ms':>10} {'Peak KB':>9} {'Items':>5} {'Accuracy':>8}")
+    for r in results:
+        print(f"{r['file']:<36} {r['vendor']:<10} {r['backend']:<16} {r['latency_ms']:>10.1f} "
+              f"{r['peak_kb']:>9.0f} {r['items']:>5} {r['accuracy']:>8.2f}")
+    print("\nRecommended backend per vendor:")
+    for vendor, backend in recommendations.items():
+        print(f"  {vendor}: {backend}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Per-document line index shared by the text-based field extractors.
+
+A quote's text is split into lines, stripped and lower-cased once. Field
+extractors then look lines up by keyword or by label instead of
+re-splitting and rescanning the whole text for every field:
+
+    keywords    inverted index of lower-case words to the numbers of the
+                lines they appear on; it narrows keyword lookups to the
+                lines that can hold the keyword as a substring
+    labels      line numbers by line prefix (case-insensitive), found by
+                binary search over the sorted lines
+"""
+
+import bisect
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+_WORD = re.compile(r'[0-9a-z]+')
+
+
+class DocumentIndex:
+    """Lines of one document, indexed by keyword and by label."""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.text_lower = text.lower()
+        self.lines = text.split('\n')
+        self.stripped = [line.strip() for line in self.lines]
+        self.lower = [line.lower() for line in self.stripped]
+        self._keywords: Dict[str, List[int]] = {}
+        for number, line in enumerate(self.lower):
+            for word in set(_WORD.findall(line)):
+                self._keywords.setdefault(word, []).append(number)
+        self._prefixes = sorted((line, number) for number, line in enumerate(self.lower))
+        self._labels: Dict[str, List[int]] = {}
+        self._containing: Dict[str, List[int]] = {}
+
+    def __len__(self):
+        return len(self.lines)
+
+    def _lines_containing(self, word: str) -> List[int]:
+        """Lines with a word that contains word ('date' is in 'quotedate')."""
+        if word not in self._containing:
+            self._containing[word] = sorted({number for indexed, numbers in self._keywords.items()
+                                             if word in indexed for number in numbers})
+        return self._containing[word]
+
+    def _candidates(self, keyword: str) -> Iterable[int]:
+        """Lines that can contain the keyword, by its rarest word; every line if it has no words.
+
+        Inner words of the keyword are whole words wherever it occurs. Its
+        first and last words may be part of a longer word on the line
+        ('Date:' in 'QuoteDate:'), so those match any word containing them.
+        """
+        words = _WORD.findall(keyword.lower())
+        if not words:
+            return range(len(self.lines))
+        if len(words) > 2:
+            return min((self._keywords.get(word, []) for word in words[1:-1]), key=len)
+        return min((self._lines_containing(word) for word in words), key=len)
+
+    def lines_with(self, *keywords: str) -> List[int]:
+        """Numbers of the lines containing any of the keywords (case-sensitive), in order."""
+        found = set()
+        for keyword in keywords:
+            found.update(number for number in self._candidates(keyword) if keyword in self.stripped[number])
+        return sorted(found)
+
+    def label_lines(self, label: str) -> List[int]:
+        """Numbers of the lines starting with label (case-insensitive), in order."""
+        prefix = label.lower()
+        if prefix not in self._labels:
+            start = bisect.bisect_left(self._prefixes, (prefix, -1))
+            numbers = []
+            for line, number in self._prefixes[start:]:
+                if not line.startswith(prefix):
+                    break
+                numbers.append(number)
+            self._labels[prefix] = sorted(numbers)
+        return self._labels[prefix]
+
+    def find_label(self, labels: List[str]) -> Optional[Tuple[int, str]]:
+        """(line number, label) of the first line starting with any of labels; earlier labels win ties."""
+        best = None
+        for label in labels:
+            numbers = self.label_lines(label)
+            if numbers and (best is None or numbers[0] < best[0]):
+                best = (numbers[0], label)
+        return best
+
+    def is_label(self, number: int, labels: List[str]) -> bool:
+        return any(self.lower[number].startswith(label.lower()) for label in labels)
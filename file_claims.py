@@ -0,0 +1,211 @@
+"""
+Lease-based claiming of quotes in an input folder shared by several hosts.
+
+Every host lists the same folder, so a quote is only processed by the
+host that claims it first. A claim is a lease file in the claims
+directory (next to the quotes, on the same shared filesystem), created
+with O_CREAT | O_EXCL so exactly one host can win it:
+
+    <quote>.lease   JSON {'owner', 'expires'}; the owner renews it from a
+                    heartbeat thread while the quote is being processed
+    <quote>.done    written when the quote is finished, recording the
+                    source file's size and mtime; a quote is not claimed
+                    again unless the file changes
+
+A lease that has expired (its host died or hung) is broken by renaming it
+to a name unique to the breaking host, which only one host can do; the
+breaker then claims the quote like any other. Lease expiry compares wall
+clocks, so hosts should keep their clocks in sync (NTP).
+
+Outputs are published with publish(): written to a temporary file in the
+destination directory and renamed into place, so readers of the output
+folder never see a half-written PO.
+"""
+
+import json
+import logging
+import os
+import socket
+import threading
+import time
+
+LEASE_SUFFIX = '.lease'
+DONE_SUFFIX = '.done'
+DEFAULT_LEASE_SECONDS = 600
+
+
+def default_owner() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+def publish(data: bytes, path: str, owner: str = None):
+    """Atomically write data to path (temporary file in the same directory, fsync, rename)."""
+    tmp_path = f"{path}.{owner or default_owner()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _source_stamp(file_path: str) -> dict:
+    stat = os.stat(file_path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+class FileClaims:
+    """Claims on the quotes of one input directory, held by one owner (host + process)."""
+
+    def __init__(self, input_dir: str, claims_dir: str = None, owner: str = None,
+                 lease_seconds: float = DEFAULT_LEASE_SECONDS):
+        self.input_dir = input_dir
+        self.claims_dir = claims_dir or os.path.join(input_dir, '.claims')
+        self.owner = owner or default_owner()
+        self.lease_seconds = lease_seconds
+        self.held = set()
+        self._lock = threading.Lock()
+        self._heartbeat = None
+        os.makedirs(self.claims_dir, exist_ok=True)
+
+    def _path(self, filename: str, suffix: str) -> str:
+        return os.path.join(self.claims_dir, filename + suffix)
+
+    def _read(self, path: str):
+        try:
+            with open(path, 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except ValueError:
+            return {}  # being written; treated as held until it ages out
+
+    def _lease_expired(self, lease: dict, path: str, now: float) -> bool:
+        expires = lease.get('expires')
+        if expires is None:  # unreadable lease: fall back to its age
+            try:
+                expires = os.stat(path).st_mtime + self.lease_seconds
+            except FileNotFoundError:
+                return True
+        return expires <= now
+
+    # --- Claiming ---
+    def is_done(self, filename: str) -> bool:
+        """True if the quote was finished and the file has not changed since."""
+        done = self._read(self._path(filename, DONE_SUFFIX))
+        if not done:
+            return False
+        try:
+            return done.get('source') == _source_stamp(os.path.join(self.input_dir, filename))
+        except FileNotFoundError:
+            return True
+
+    def claim(self, filename: str, now: float = None) -> bool:
+        """Try to take the lease on a quote. False if another owner holds it or it is already done."""
+        now = time.time() if now is None else now
+        if self.is_done(filename):
+            return False
+        path = self._path(filename, LEASE_SUFFIX)
+        for _ in range(2):
+            try:
+                fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+            except FileExistsError:
+                lease = self._read(path)
+                if lease is not None and not self._lease_expired(lease, path, now):
+                    return False
+                if lease is not None and not self._break(filename, lease):
+                    return False
+                continue
+            with os.fdopen(fd, 'w') as f:
+                json.dump({'owner': self.owner, 'expires': now + self.lease_seconds}, f)
+            if self.is_done(filename):  # finished by another owner while we were claiming
+                os.remove(path)
+                return False
+            with self._lock:
+                self.held.add(filename)
+            return True
+        return False
+
+    def _break(self, filename: str, expired: dict) -> bool:
+        """Remove an expired lease. Only one owner can move it aside; False if someone else got there first."""
+        path = self._path(filename, LEASE_SUFFIX)
+        stale_path = f"{path}.{self.owner}.stale"
+        try:
+            os.rename(path, stale_path)
+        except FileNotFoundError:
+            return False
+        if self._read(stale_path) != expired:
+            # The lease was broken and re-claimed between our read and rename: give it back
+            try:
+                os.link(stale_path, path)
+            except FileExistsError:
+                pass
+            os.remove(stale_path)
+            return False
+        os.remove(stale_path)
+        logging.warning(f"  Reclaimed expired lease on {filename} from {expired.get('owner', 'unknown')}")
+        return True
+
+    def claim_each(self, file_paths):
+        """Yield the paths this owner manages to claim, claiming lazily as they are consumed."""
+        for file_path in file_paths:
+            if self.claim(os.path.basename(file_path)):
+                yield file_path
+            else:
+                logging.debug(f"DEBUG: Skipping {os.path.basename(file_path)}: claimed elsewhere or already done")
+
+    def holds(self, filename: str) -> bool:
+        """True while this owner's lease on the quote is in place (check before publishing its outputs)."""
+        lease = self._read(self._path(filename, LEASE_SUFFIX))
+        return bool(lease) and lease.get('owner') == self.owner
+
+    def renew(self, filename: str, now: float = None) -> bool:
+        """Push the lease's expiry forward; False if it has been lost to another owner."""
+        if not self.holds(filename):
+            with self._lock:
+                self.held.discard(filename)
+            return False
+        now = time.time() if now is None else now
+        path = self._path(filename, LEASE_SUFFIX)
+        tmp_path = f"{path}.{self.owner}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'owner': self.owner, 'expires': now + self.lease_seconds}, f)
+        os.replace(tmp_path, path)
+        return True
+
+    def release(self, filename: str, done: bool = True):
+        """Give up the lease; with done=True the quote is not claimed again until the file changes."""
+        with self._lock:
+            self.held.discard(filename)
+        if done:
+            file_path = os.path.join(self.input_dir, filename)
+            if os.path.exists(file_path):
+                publish(json.dumps({'owner': self.owner, 'finished': time.time(),
+                                    'source': _source_stamp(file_path)}).encode('utf-8'),
+                        self._path(filename, DONE_SUFFIX), self.owner)
+        if self.holds(filename):
+            os.remove(self._path(filename, LEASE_SUFFIX))
+
+    # --- Heartbeat ---
+    def start_heartbeat(self, interval: float = None):
+        """Renew every held lease from a daemon thread, every third of the lease by default."""
+        interval = interval or self.lease_seconds / 3
+        stop = threading.Event()
+
+        def beat():
+            while not stop.wait(interval):
+                with self._lock:
+                    held = list(self.held)
+                for filename in held:
+                    try:
+                        if not self.renew(filename):
+                            logging.warning(f"  Lost the lease on {filename} to another host")
+                    except OSError as e:
+                        logging.debug(f"DEBUG: Could not renew lease on {filename}: {e}")
+
+        self._heartbeat = stop
+        threading.Thread(target=beat, daemon=True).start()
+
+    def stop_heartbeat(self):
+        if self._heartbeat is not None:
+            self._heartbeat.set()
+            self._heartbeat = None
@@ -0,0 +1,189 @@
+"""
+Cost-aware ordering of a batch's quotes.
+
+Each ready quote gets a predicted extraction time from its type, its
+size or page count, and the historical timings of its vendor (guessed
+from the file name and a PDF's first page) and type. Timings are learned as an exponential
+moving average of seconds per unit (a PDF page, or 100 KB of a
+spreadsheet) and kept in a small JSON file between runs.
+
+Quotes are then handed out shortest predicted job first. Workers take
+the next quote as soon as they are free, so this is list scheduling in
+SPT order: a large catalog no longer holds up dozens of small quotes,
+and mean completion time is minimised. Aging keeps large quotes from
+being passed over forever: every hour a quote has waited (since its
+mtime) takes aging_per_hour seconds off its predicted cost.
+
+Quotes can carry a deadline:
+
+    - a file name matching urgent_pattern ("URGENT quote.pdf") means as soon as possible
+    - a sidecar file "<quote>.deadline" holds an ISO 8601 time (empty: as soon as possible)
+
+A deadline-tagged quote jumps the queue when the shortest-first order
+would finish it after its deadline; promoted quotes go first, earliest
+deadline first. A quote whose deadline the order already meets keeps its
+place.
+"""
+
+import heapq
+import json
+import logging
+import os
+import re
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List, Optional
+
+from page_text import open_pdf, pdf_lock
+
+DEFAULT_COSTS_PATH = 'job_costs.json'
+DEADLINE_SUFFIX = '.deadline'
+DEFAULT_URGENT_PATTERN = r'(?i)urgent|rush'
+
+# Seconds per unit before any timing has been observed
+DEFAULT_RATES = {'.pdf': 0.5, '.xlsx': 0.3, '.xls': 0.3, '.csv': 0.1}
+FALLBACK_RATE = 0.5
+SPREADSHEET_UNIT_BYTES = 100 * 1024
+
+
+@dataclass
+class Job:
+    file_path: str
+    file_type: str
+    size: int
+    pages: int
+    vendor: str
+    cost: float  # predicted seconds
+    arrived: float  # mtime
+    deadline: Optional[float] = None  # epoch seconds; set for deadline-tagged quotes
+
+    @property
+    def units(self) -> float:
+        return job_units(self.file_type, self.size, self.pages)
+
+
+def job_units(file_type: str, size: int, pages: int) -> float:
+    """Work units of a quote: PDF pages, or 100 KB blocks of a spreadsheet (at least one)."""
+    if file_type == '.pdf':
+        return max(1, pages)
+    return max(1.0, size / SPREADSHEET_UNIT_BYTES)
+
+
+def peek_pdf(file_path: str) -> (int, str):
+    """Page count and lowercased first-page text of a PDF; (1, '') for other files and unreadable PDFs."""
+    if not file_path.lower().endswith('.pdf'):
+        return 1, ''
+    try:
+        with pdf_lock, open_pdf(file_path) as doc:
+            return doc.page_count, (doc[0].get_text().lower() if doc.page_count else '')
+    except Exception as e:
+        logging.debug(f"DEBUG: Could not open {os.path.basename(file_path)} to predict its cost: {e}")
+        return 1, ''
+
+
+def read_deadline(file_path: str, urgent_pattern: str = DEFAULT_URGENT_PATTERN, now: float = None) -> Optional[float]:
+    """The quote's deadline (epoch seconds), now for urgent quotes, or None if it has none."""
+    now = time.time() if now is None else now
+    sidecar = file_path + DEADLINE_SUFFIX
+    if os.path.exists(sidecar):
+        with open(sidecar, 'r') as f:
+            text = f.read().strip()
+        if not text:
+            return now
+        try:
+            return datetime.fromisoformat(text).timestamp()
+        except ValueError:
+            logging.warning(f"  Ignoring {os.path.basename(sidecar)}: '{text}' is not an ISO 8601 time")
+    if urgent_pattern and re.search(urgent_pattern, os.path.basename(file_path)):
+        return now
+    return None
+
+
+class CostModel:
+    """Learned seconds per unit, by vendor and file type and by file type alone."""
+
+    def __init__(self, path: str = DEFAULT_COSTS_PATH, smoothing: float = 0.3):
+        self.path = path
+        self.smoothing = smoothing
+        self.rates = {}  # 'vendor|.pdf' or '.pdf' -> {'rate', 'samples'}
+        if path and os.path.exists(path):
+            with open(path, 'r') as f:
+                self.rates = json.load(f).get('rates', {})
+
+    def rate(self, file_type: str, vendor: str = None) -> float:
+        for key in (f"{vendor}|{file_type}" if vendor else None, file_type):
+            if key in self.rates:
+                return self.rates[key]['rate']
+        return DEFAULT_RATES.get(file_type, FALLBACK_RATE)
+
+    def predict(self, file_type: str, size: int, pages: int, vendor: str = None) -> float:
+        return self.rate(file_type, vendor) * job_units(file_type, size, pages)
+
+    def observe(self, job: Job, seconds: float):
+        """Fold one measured extraction time into the job's vendor and file type rates.
+
+        The vendor is the one guessed for the prediction, so later quotes
+        with similar names are predicted from it.
+        """
+        rate = seconds / job.units
+        for key in (f"{job.vendor}|{job.file_type}" if job.vendor else None, job.file_type):
+            if key is None:
+                continue
+            entry = self.rates.get(key)
+            if entry is None:
+                self.rates[key] = {'rate': rate, 'samples': 1}
+            else:
+                entry['rate'] += self.smoothing * (rate - entry['rate'])
+                entry['samples'] += 1
+
+    def save(self):
+        """Atomically write the learned rates."""
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'rates': self.rates}, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+
+def make_job(file_path: str, model: CostModel, registry=None, urgent_pattern: str = DEFAULT_URGENT_PATTERN,
+             now: float = None) -> Optional[Job]:
+    """A Job with its predicted cost; the vendor is guessed from the file name and a PDF's first page.
+
+    None if the file is gone (another host moved or quarantined it since it was listed).
+    """
+    try:
+        stat = os.stat(file_path)
+    except FileNotFoundError:
+        logging.debug(f"DEBUG: {os.path.basename(file_path)} vanished before it was scheduled")
+        return None
+    file_type = os.path.splitext(file_path)[1].lower()
+    pages, first_page = peek_pdf(file_path)
+    vendor = registry.detect(first_page, os.path.basename(file_path).lower()) if registry is not None else 'unknown'
+    return Job(file_path, file_type, stat.st_size, pages, vendor,
+               model.predict(file_type, stat.st_size, pages, vendor), stat.st_mtime,
+               read_deadline(file_path, urgent_pattern, now))
+
+
+def completion_times(jobs: List[Job], workers: int = 1) -> List[float]:
+    """Predicted seconds until each job finishes when workers take them in this order."""
+    free = [0.0] * max(1, workers)
+    finished = []
+    for job in jobs:
+        start = heapq.heappop(free)
+        finished.append(start + job.cost)
+        heapq.heappush(free, start + job.cost)
+    return finished
+
+
+def schedule(jobs: List[Job], workers: int = 1, aging_per_hour: float = 0.0, now: float = None) -> List[Job]:
+    """Shortest (aged) predicted job first; deadline-tagged jobs it would make late go first, earliest deadline first."""
+    now = time.time() if now is None else now
+    order = sorted(jobs, key=lambda job: (job.cost - aging_per_hour * max(0.0, now - job.arrived) / 3600,
+                                          job.arrived))
+    late = [job for job, finish in zip(order, completion_times(order, workers))
+            if job.deadline is not None and now + finish > job.deadline]
+    if not late:
+        return order
+    late.sort(key=lambda job: (job.deadline, job.cost))
+    promoted = {id(job) for job in late}
+    return late + [job for job in order if id(job) not in promoted]
@@ -0,0 +1,128 @@
+"""
+Mail ingestion: quotes straight from a Maildir, an mbox or a folder of .eml files.
+
+PDF, Excel and CSV attachments are handed to extraction as bytes; nothing
+is saved to disk first. Messages are identified by their Message-ID (or
+a hash of the raw message when it has none), and the IDs of messages that
+have been consumed are kept in a small JSON state file, so every run only
+reads new mail and a message delivered twice is processed once.
+
+Attachments are tracked (retry backoff, quarantine) under their file name
+prefixed with a hash of the message's ID, since many vendors call every
+attachment "Quote.pdf".
+
+A message is consumed once all of its attachments have a final outcome.
+A message with an attachment waiting on a retry stays unconsumed and is
+read again by a later run.
+"""
+
+import email
+import hashlib
+import json
+import logging
+import mailbox
+import os
+import time
+from dataclasses import dataclass, field
+from email import policy
+from email.parser import BytesHeaderParser
+from typing import Iterator, List
+
+ATTACHMENT_TYPES = ('.pdf', '.xlsx', '.xls', '.csv')
+DEFAULT_STATE_PATH = 'mail_state.json'
+
+
+@dataclass
+class Attachment:
+    filename: str
+    data: bytes
+
+
+@dataclass
+class MailMessage:
+    message_id: str
+    subject: str
+    attachments: List[Attachment] = field(default_factory=list)
+
+    def attachment_name(self, attachment: Attachment) -> str:
+        """Name an attachment is tracked under: '<message hash>_<file name>', unique across messages."""
+        return f"{hashlib.sha256(self.message_id.encode('utf-8')).hexdigest()[:12]}_{attachment.filename}"
+
+
+def message_id_of(raw: bytes) -> str:
+    """The Message-ID header, or a hash of the raw message when it has none."""
+    headers = BytesHeaderParser(policy=policy.default).parsebytes(raw)
+    message_id = str(headers.get('Message-ID') or '').strip()
+    return message_id or 'sha256:' + hashlib.sha256(raw).hexdigest()
+
+
+def quote_attachments(message: email.message.EmailMessage) -> List[Attachment]:
+    """The message's PDF, Excel and CSV attachments, decoded into memory."""
+    attachments = []
+    for part in message.iter_attachments():
+        filename = os.path.basename(part.get_filename() or '')
+        if filename.lower().endswith(ATTACHMENT_TYPES):
+            attachments.append(Attachment(filename, part.get_payload(decode=True) or b''))
+    return attachments
+
+
+def iter_raw_messages(source: str) -> Iterator[bytes]:
+    """Raw messages from a Maildir (has cur/new), a directory of .eml files, or an mbox file."""
+    if os.path.isdir(os.path.join(source, 'cur')) or os.path.isdir(os.path.join(source, 'new')):
+        box = mailbox.Maildir(source, factory=None, create=False)
+        for key in sorted(box.iterkeys()):
+            yield box.get_bytes(key)
+    elif os.path.isdir(source):
+        for name in sorted(os.listdir(source)):
+            if name.lower().endswith('.eml'):
+                with open(os.path.join(source, name), 'rb') as f:
+                    yield f.read()
+    else:
+        box = mailbox.mbox(source, create=False)
+        try:
+            for key in box.iterkeys():
+                yield box.get_bytes(key)
+        finally:
+            box.close()
+
+
+class MailIngest:
+    """New quote mail in a mail source, remembering which messages were consumed."""
+
+    def __init__(self, source: str, state_path: str = DEFAULT_STATE_PATH):
+        self.source = source
+        self.state_path = state_path
+        self._consumed = {}  # message_id -> {'at', 'attachments'}
+        if os.path.exists(state_path):
+            with open(state_path, 'r') as f:
+                self._consumed = json.load(f).get('consumed', {})
+
+    def is_consumed(self, message_id: str) -> bool:
+        return message_id in self._consumed
+
+    def new_messages(self) -> Iterator[MailMessage]:
+        """Messages not consumed yet, one per Message-ID, with their quote attachments."""
+        seen = set()
+        for raw in iter_raw_messages(self.source):
+            message_id = message_id_of(raw)  # headers only: consumed mail is never fully parsed
+            if message_id in self._consumed or message_id in seen:
+                continue
+            seen.add(message_id)
+            message = email.message_from_bytes(raw, policy=policy.default)
+            attachments = quote_attachments(message)
+            logging.debug(f"DEBUG: Mail {message_id}: {len(attachments)} quote attachment(s)")
+            yield MailMessage(message_id, str(message.get('Subject', '')), attachments)
+
+    def mark_consumed(self, message: MailMessage):
+        self._consumed[message.message_id] = {
+            'at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'attachments': [attachment.filename for attachment in message.attachments]
+        }
+        self.save()
+
+    def save(self):
+        """Atomically write the state file."""
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'consumed': self._consumed}, f, indent=2)
+        os.replace(tmp_path, self.state_path)
@@ -0,0 +1,226 @@
+"""
+In-process metrics for batch runs and long-lived workers.
+
+Counters, gauges and histograms live for the lifetime of the process and
+can be exported in OpenMetrics text format, either to a file (for a node
+exporter textfile collector or a cron job) or from a local HTTP endpoint.
+"""
+
+import bisect
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Tuple
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 4, 5, 8, 12, 20)
+
+CONTENT_TYPE = 'application/openmetrics-text; version=1.0.0; charset=utf-8'
+
+
+def _label_key(labels: dict) -> Tuple[Tuple[str, str], ...]:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(key, extra: str = '') -> str:
+    parts = [f'{name}="{value}"' for name, value in key]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Counter:
+    type_name = 'counter'
+
+    def __init__(self, name: str, help_text: str):
+        self.name, self.help_text = name, help_text
+        self.values: Dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = _label_key(labels)
+        self.values[key] = self.values.get(key, 0) + amount
+
+    def total(self, **labels) -> float:
+        """Sum over every series whose labels include the given ones."""
+        wanted = set(_label_key(labels))
+        return sum(value for key, value in self.values.items() if wanted <= set(key))
+
+    def samples(self):
+        for key, value in sorted(self.values.items()):
+            yield f"{self.name}_total{_format_labels(key)} {_format_value(value)}"
+
+
+class Gauge(Counter):
+    type_name = 'gauge'
+
+    def set(self, value: float, **labels):
+        self.values[_label_key(labels)] = value
+
+    def samples(self):
+        for key, value in sorted(self.values.items()):
+            yield f"{self.name}{_format_labels(key)} {_format_value(value)}"
+
+
+class Histogram:
+    type_name = 'histogram'
+
+    def __init__(self, name: str, help_text: str, buckets=LATENCY_BUCKETS):
+        self.name, self.help_text = name, help_text
+        self.buckets = tuple(buckets)
+        self.values: Dict[tuple, dict] = {}  # key -> {'counts': [...], 'sum': s, 'count': n}
+
+    def observe(self, value: float, **labels):
+        series = self.values.setdefault(_label_key(labels), {'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0})
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            series['counts'][index] += 1
+        series['sum'] += value
+        series['count'] += 1
+
+    def quantile(self, q: float, **labels) -> float:
+        """Upper bound of the bucket holding the q-quantile (inf if beyond the last bucket)."""
+        series = self.values.get(_label_key(labels))
+        if not series or not series['count']:
+            return 0.0
+        target, seen = q * series['count'], 0
+        for bound, count in zip(self.buckets, series['counts']):
+            seen += count
+            if seen >= target:
+                return bound
+        return float('inf')
+
+    def samples(self):
+        for key, series in sorted(self.values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, series['counts']):
+                cumulative += count
+                le = 'le="%s"' % _format_value(bound)
+                yield f"{self.name}_bucket{_format_labels(key, le)} {cumulative}"
+            le = 'le="+Inf"'
+            yield f"{self.name}_bucket{_format_labels(key, le)} {series['count']}"
+            yield f"{self.name}_sum{_format_labels(key)} {_format_value(series['sum'])}"
+            yield f"{self.name}_count{_format_labels(key)} {series['count']}"
+
+
+class MetricsRegistry:
+    """The process's metrics, safe to update from several threads."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+        self.started = time.time()
+
+    def _get(self, cls, name, help_text, **kwargs):
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = cls(name, help_text, **kwargs)
+            return self._metrics[name]
+
+    def counter(self, name: str, help_text: str = '') -> Counter:
+        return self._get(Counter, name, help_text)
+
+    def gauge(self, name: str, help_text: str = '') -> Gauge:
+        return self._get(Gauge, name, help_text)
+
+    def histogram(self, name: str, help_text: str = '', buckets=LATENCY_BUCKETS) -> Histogram:
+        return self._get(Histogram, name, help_text, buckets=buckets)
+
+    def inc(self, name: str, amount: float = 1, **labels):
+        metric = self.counter(name)
+        with self._lock:
+            metric.inc(amount, **labels)
+
+    def observe(self, name: str, value: float, **labels):
+        metric = self.histogram(name)
+        with self._lock:
+            metric.observe(value, **labels)
+
+    def time(self, name: str, **labels):
+        """Context manager observing the elapsed seconds of its block into a histogram."""
+        return _Timer(self, name, labels)
+
+    def drain(self) -> dict:
+        """Snapshot and reset every series, e.g. to ship a worker process's metrics to its parent."""
+        with self._lock:
+            snapshot = {name: (type(metric), metric.help_text, getattr(metric, 'buckets', None), metric.values)
+                        for name, metric in self._metrics.items() if metric.values}
+            for metric in self._metrics.values():
+                metric.values = {}
+        return snapshot
+
+    def merge(self, snapshot: dict):
+        """Add a drain() snapshot from another process into this registry."""
+        for name, (cls, help_text, buckets, values) in snapshot.items():
+            kwargs = {'buckets': buckets} if buckets is not None else {}
+            metric = self._get(cls, name, help_text, **kwargs)
+            with self._lock:
+                for key, value in values.items():
+                    if isinstance(metric, Histogram):
+                        series = metric.values.setdefault(key, {'counts': [0] * len(metric.buckets), 'sum': 0.0, 'count': 0})
+                        series['counts'] = [a + b for a, b in zip(series['counts'], value['counts'])]
+                        series['sum'] += value['sum']
+                        series['count'] += value['count']
+                    elif isinstance(metric, Gauge):
+                        metric.values[key] = value
+                    else:
+                        metric.values[key] = metric.values.get(key, 0) + value
+
+    def render(self) -> str:
+        """All metrics in OpenMetrics text format."""
+        lines = []
+        with self._lock:
+            for name, metric in sorted(self._metrics.items()):
+                lines.append(f"# TYPE {name} {metric.type_name}")
+                if metric.help_text:
+                    lines.append(f"# HELP {name} {metric.help_text}")
+                lines.extend(metric.samples())
+        lines.append('# EOF')
+        return '\n'.join(lines) + '\n'
+
+    def write_textfile(self, path: str):
+        """Atomically write render() to path."""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(self.render())
+        os.replace(tmp_path, path)
+
+    def serve(self, port: int, host: str = '127.0.0.1') -> ThreadingHTTPServer:
+        """Serve render() at http://host:port/metrics from a daemon thread."""
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.rstrip('/') not in ('', '/metrics'):
+                    self.send_error(404)
+                    return
+                body = registry.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', CONTENT_TYPE)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, kwargs={'poll_interval': 0.1}, daemon=True).start()
+        return server
+
+
+class _Timer:
+    def __init__(self, registry: MetricsRegistry, name: str, labels: dict):
+        self.registry, self.name, self.labels = registry, name, labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.registry.observe(self.name, time.perf_counter() - self.start, **self.labels)
+        return False
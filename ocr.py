@@ -0,0 +1,134 @@
+"""
+OCR fallback for scanned quotes.
+
+Pages without a text layer are rendered and OCRed with a local Tesseract
+install (through the optional pytesseract package) in a process pool; pages
+that do have text are never touched. Results are cached on disk by a hash
+of the page's content streams and images, so a scan that is re-sent or
+re-processed is only OCRed once.
+"""
+
+import hashlib
+import io
+import logging
+import multiprocessing
+import os
+import threading
+from typing import List, Union
+
+import fitz  # PyMuPDF
+
+from page_text import open_pdf, pdf_lock
+
+try:
+    import pytesseract
+    from PIL import Image
+except ImportError:  # optional: without it scans are reported, not read
+    pytesseract = None
+
+OCR_DPI = 300
+DEFAULT_CACHE_DIR = 'ocr_cache'
+
+
+def page_needs_ocr(page: fitz.Page, text: str = None) -> bool:
+    """True for pages that show images but carry no extractable text."""
+    text = page.get_text() if text is None else text
+    return not text.strip() and bool(page.get_images(full=False))
+
+
+def page_content_hash(doc: fitz.Document, page: fitz.Page) -> str:
+    """Hash of the page's content streams and the images it draws."""
+    digest = hashlib.sha256(page.read_contents())
+    for image in page.get_images(full=False):
+        digest.update(doc.xref_stream_raw(image[0]) or b'')
+    return digest.hexdigest()
+
+
+def tesseract_ocr(png: bytes) -> str:
+    """OCR one rendered page with Tesseract."""
+    if pytesseract is None:
+        raise RuntimeError("pytesseract is not installed")
+    return pytesseract.image_to_string(Image.open(io.BytesIO(png)))
+
+
+class OCRCache:
+    """OCR text on disk, one file per page content hash."""
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR):
+        self.cache_dir = cache_dir
+
+    def _path(self, page_hash: str) -> str:
+        return os.path.join(self.cache_dir, f"{page_hash}.txt")
+
+    def get(self, page_hash: str):
+        try:
+            with open(self._path(page_hash), 'r', encoding='utf-8') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def put(self, page_hash: str, text: str):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = f"{self._path(page_hash)}.{os.getpid()}.{threading.get_ident()}.tmp"  # one per writer
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp_path, self._path(page_hash))
+
+
+def _ocr_page(task) -> str:
+    """Worker: render one page and OCR it; '' if the engine fails."""
+    source, page_number, dpi, engine = task
+    try:
+        with pdf_lock, open_pdf(source) as doc:
+            png = doc[page_number].get_pixmap(dpi=dpi).tobytes('png')
+        return engine(png)
+    except Exception as e:
+        logging.debug(f"DEBUG: OCR failed on page {page_number + 1}: {e}")
+        return ''
+
+
+def fill_missing_text(source: Union[str, bytes], page_texts: List[str], engine=tesseract_ocr, workers: int = None,
+                      cache: OCRCache = None, dpi: int = OCR_DPI, name: str = None) -> (List[str], List[int]):
+    """OCR the pages of a PDF (path or bytes) whose text layer is empty.
+
+    Returns the page texts with OCR output filled in, and the indexes of the
+    pages that needed OCR. engine(png_bytes) -> str must be picklable.
+    """
+    name = name or (os.path.basename(source) if isinstance(source, str) else 'in-memory PDF')
+    page_texts = list(page_texts)
+    pending = []  # (page_number, page_hash)
+    with pdf_lock, open_pdf(source) as doc:
+        for page_number, page in enumerate(doc):
+            if page_needs_ocr(page, page_texts[page_number]):
+                pending.append((page_number, page_content_hash(doc, page)))
+    ocr_pages = [page_number for page_number, _ in pending]
+    if not pending:
+        return page_texts, ocr_pages
+
+    uncached = []
+    for page_number, page_hash in pending:
+        cached = cache.get(page_hash) if cache else None
+        if cached is not None:
+            page_texts[page_number] = cached
+        else:
+            uncached.append((page_number, page_hash))
+    if not uncached:
+        logging.debug(f"DEBUG: OCR text for pages {[p + 1 for p in ocr_pages]} served from cache")
+        return page_texts, ocr_pages
+    if engine is tesseract_ocr and pytesseract is None:
+        logging.warning(f"{name} has {len(uncached)} page(s) without a text layer; "
+                        f"install pytesseract and Tesseract to OCR them")
+        return page_texts, ocr_pages
+
+    logging.debug(f"DEBUG: OCR on pages {[p + 1 for p, _ in uncached]} of {name}")
+    tasks = [(source, page_number, dpi, engine) for page_number, _ in uncached]
+    if len(tasks) == 1:
+        texts = [_ocr_page(tasks[0])]
+    else:
+        with multiprocessing.Pool(processes=max(1, min(workers or os.cpu_count() or 1, len(tasks)))) as pool:
+            texts = pool.map(_ocr_page, tasks)
+    for (page_number, page_hash), text in zip(uncached, texts):
+        page_texts[page_number] = text
+        if cache and text.strip():
+            cache.put(page_hash, text)
+    return page_texts, ocr_pages
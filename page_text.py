@@ -0,0 +1,90 @@
+"""
+Text and word-box extraction for PDFs, split across processes by page range.
+
+Short quotes are read page by page in this process. Long ones (catalog
+quotes run to 100+ pages) are cut into contiguous page ranges; each range
+is read by a pool worker with its own document handle, and the results are
+put back together in page order. A single large quote therefore uses every
+core even when it is the only file in the batch.
+
+A source is a file path or the PDF's bytes (e.g. a mail attachment).
+
+MuPDF (and PDFium, which Camelot's lattice flavor uses) must not be
+called from two threads at once, so in-process work with either holds
+pdf_lock. Pool workers are separate processes and read without it.
+"""
+
+import multiprocessing
+import os
+import threading
+from typing import List, Optional, Tuple, Union
+
+import fitz  # PyMuPDF
+
+PARALLEL_MIN_PAGES = 40
+RANGES_PER_WORKER = 2  # smaller ranges even out pages that are slower to read
+
+pdf_lock = threading.RLock()
+if hasattr(os, 'register_at_fork'):
+    # Fork only between PDF reads: a child must not start with another thread's read half done
+    os.register_at_fork(before=pdf_lock.acquire, after_in_parent=pdf_lock.release,
+                        after_in_child=pdf_lock.release)
+
+
+def open_pdf(source: Union[str, bytes]) -> fitz.Document:
+    """Open a PDF from a path or from bytes held in memory."""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return fitz.open(stream=bytes(source), filetype='pdf')
+    return fitz.open(source)
+
+
+def page_ranges(page_count: int, parts: int) -> List[Tuple[int, int]]:
+    """Split [0, page_count) into at most parts contiguous (start, stop) ranges of near-equal size."""
+    parts = max(1, min(parts, page_count))
+    size, extra = divmod(page_count, parts)
+    ranges, start = [], 0
+    for part in range(parts):
+        stop = start + size + (1 if part < extra else 0)
+        ranges.append((start, stop))
+        start = stop
+    return ranges
+
+
+def _read_pages(doc: fitz.Document, start: int, stop: int, words: bool):
+    texts, boxes = [], []
+    for page_number in range(start, stop):
+        page = doc[page_number]
+        texts.append(page.get_text())
+        if words:
+            boxes.append([list(word[:5]) for word in page.get_text('words')])
+    return texts, boxes
+
+
+def _read_range(task):
+    """Worker: read one page range with the worker's own document handle."""
+    source, start, stop, words = task
+    with open_pdf(source) as doc:
+        return _read_pages(doc, start, stop, words)
+
+
+def extract_pages(source: Union[str, bytes], workers: int = None, words: bool = False,
+                  min_pages: int = PARALLEL_MIN_PAGES) -> (List[str], Optional[List[list]]):
+    """Per-page text of a PDF, and per-page word boxes [x0, y0, x1, y1, word] if words is set.
+
+    Documents with at least min_pages pages are read by a process pool of
+    up to workers processes (default: all cores).
+    """
+    with pdf_lock, open_pdf(source) as doc:
+        page_count = doc.page_count
+        workers = max(1, min(workers or os.cpu_count() or 1, page_count))
+        # Daemonic processes (e.g. another pool's workers) cannot start a pool
+        if page_count < min_pages or workers == 1 or multiprocessing.current_process().daemon:
+            texts, boxes = _read_pages(doc, 0, page_count, words)
+            return texts, boxes if words else None
+
+    tasks = [(source, start, stop, words) for start, stop in page_ranges(page_count, workers * RANGES_PER_WORKER)]
+    with multiprocessing.Pool(processes=workers) as pool:
+        chunks = pool.map(_read_range, tasks)
+    texts = [text for chunk_texts, _ in chunks for text in chunk_texts]
+    boxes = [page_boxes for _, chunk_boxes in chunks for page_boxes in chunk_boxes]
+    return texts, boxes if words else None
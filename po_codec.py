@@ -0,0 +1,251 @@
+"""
+Compact, versioned binary encoding of PurchaseOrder.
+
+Used to ship extraction results from worker processes to the parent and
+to keep them in the on-disk result cache. Line items are stored by
+column rather than row by row:
+
+    header       b'PO', format version (u8)
+    strings      the PurchaseOrder's text fields (STRING_FIELDS, in order)
+    amounts      subtotal, tax, total (3 x f64)
+    line items   row count (u32), item numbers, descriptions,
+                 then quantities, unit prices, line totals (row count x f64 each)
+
+A string column is its value count (u32), count + 1 byte offsets (u32)
+and the UTF-8 text of all values back to back. Everything is little-endian.
+
+Decoding builds no per-row objects: the numeric columns are numpy views
+of the buffer and a text value is decoded when it is read. line_items of
+a decoded PurchaseOrder is a LineItemBlock, a read-only sequence that
+creates LineItem objects only as they are indexed or iterated.
+
+STRING_FIELDS is fixed for a format version. Changing the layout or the
+fields means a new VERSION. Data in a version this build cannot read is
+rejected with ValueError (the result cache then extracts again).
+"""
+
+import hashlib
+import os
+import struct
+import threading
+from collections.abc import Sequence
+
+import numpy as np
+
+MAGIC = b'PO'
+VERSION = 1
+HEADER = struct.Struct('<2sB')
+AMOUNTS = struct.Struct('<3d')
+COUNT = struct.Struct('<I')
+STRING_FIELDS = (
+    'po_number', 'order_date', 'vendor_name', 'vendor_address', 'vendor_phone', 'vendor_website',
+    'customer_name', 'customer_address', 'customer_phone', 'ship_to_name', 'ship_to_address',
+    'bill_to_name', 'bill_to_address', 'currency', 'issued_po_number',
+)
+DEFAULT_CACHE_DIR = 'result_cache'
+
+
+def _models():
+    from po_extractor import LineItem, PurchaseOrder  # deferred: po_extractor imports this module
+    return LineItem, PurchaseOrder
+
+
+# --- Columns ---
+class StringColumn(Sequence):
+    """Text values stored as byte offsets into one UTF-8 blob; each value is decoded when read."""
+    __slots__ = ('offsets', 'blob')
+
+    def __init__(self, offsets: np.ndarray, blob: bytes):
+        self.offsets = offsets
+        self.blob = blob
+
+    @classmethod
+    def from_values(cls, values) -> 'StringColumn':
+        encoded = [('' if value is None else str(value)).encode('utf-8') for value in values]
+        offsets = np.zeros(len(encoded) + 1, dtype='<u4')
+        np.cumsum([len(value) for value in encoded], out=offsets[1:])
+        return cls(offsets, b''.join(encoded))
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('string column index out of range')
+        return self.blob[self.offsets[index]:self.offsets[index + 1]].decode('utf-8')
+
+    def __iter__(self):
+        text = self.blob
+        bounds = self.offsets.tolist()
+        for start, stop in zip(bounds, bounds[1:]):
+            yield text[start:stop].decode('utf-8')
+
+    def pack(self) -> bytes:
+        return COUNT.pack(len(self)) + self.offsets.astype('<u4', copy=False).tobytes() + self.blob
+
+
+def _read_strings(buffer: bytes, offset: int) -> (StringColumn, int):
+    (count,) = COUNT.unpack_from(buffer, offset)
+    offset += COUNT.size
+    offsets = np.frombuffer(buffer, dtype='<u4', count=count + 1, offset=offset)
+    offset += offsets.nbytes
+    size = int(offsets[-1])
+    return StringColumn(offsets, buffer[offset:offset + size]), offset + size
+
+
+class LineItemBlock(Sequence):
+    """Line items stored by column. Rows become LineItem objects only when indexed or iterated.
+
+    quantities, unit_prices and line_totals are float64 arrays, so totals
+    and checks over a large quote need no per-row objects at all.
+    """
+    __slots__ = ('item_numbers', 'descriptions', 'quantities', 'unit_prices', 'line_totals')
+
+    def __init__(self, item_numbers: StringColumn, descriptions: StringColumn, quantities: np.ndarray,
+                 unit_prices: np.ndarray, line_totals: np.ndarray):
+        self.item_numbers = item_numbers
+        self.descriptions = descriptions
+        self.quantities = quantities
+        self.unit_prices = unit_prices
+        self.line_totals = line_totals
+
+    @classmethod
+    def from_items(cls, items) -> 'LineItemBlock':
+        if isinstance(items, LineItemBlock):
+            return items
+        items = list(items)
+        amounts = np.array([(item.quantity, item.unit_price, item.line_total) for item in items],
+                           dtype='<f8').reshape(len(items), 3)
+        return cls(StringColumn.from_values(item.item_number for item in items),
+                   StringColumn.from_values(item.description for item in items),
+                   np.ascontiguousarray(amounts[:, 0]), np.ascontiguousarray(amounts[:, 1]),
+                   np.ascontiguousarray(amounts[:, 2]))
+
+    def __len__(self):
+        return len(self.quantities)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        LineItem, _ = _models()
+        return LineItem(self.item_numbers[index], self.descriptions[index], float(self.quantities[index]),
+                        float(self.unit_prices[index]), float(self.line_totals[index]))
+
+    def __iter__(self):
+        LineItem, _ = _models()
+        for row in zip(self.item_numbers, self.descriptions, self.quantities.tolist(),
+                       self.unit_prices.tolist(), self.line_totals.tolist()):
+            yield LineItem(*row)
+
+    def __eq__(self, other):
+        if not isinstance(other, Sequence) or isinstance(other, (str, bytes)):
+            return NotImplemented
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+    def __repr__(self):
+        return f"LineItemBlock({len(self)} items)"
+
+    def pack(self) -> bytes:
+        return b''.join((
+            COUNT.pack(len(self)),
+            self.item_numbers.pack(),
+            self.descriptions.pack(),
+            self.quantities.astype('<f8', copy=False).tobytes(),
+            self.unit_prices.astype('<f8', copy=False).tobytes(),
+            self.line_totals.astype('<f8', copy=False).tobytes(),
+        ))
+
+
+def _read_line_items(buffer: bytes, offset: int) -> (LineItemBlock, int):
+    (rows,) = COUNT.unpack_from(buffer, offset)
+    offset += COUNT.size
+    item_numbers, offset = _read_strings(buffer, offset)
+    descriptions, offset = _read_strings(buffer, offset)
+    columns = []
+    for _ in range(3):
+        columns.append(np.frombuffer(buffer, dtype='<f8', count=rows, offset=offset))
+        offset += rows * 8
+    return LineItemBlock(item_numbers, descriptions, *columns), offset
+
+
+# --- PurchaseOrder ---
+def encode_purchase_order(po) -> bytes:
+    """A PurchaseOrder as bytes in the current format version."""
+    return b''.join((
+        HEADER.pack(MAGIC, VERSION),
+        StringColumn.from_values(getattr(po, name) for name in STRING_FIELDS).pack(),
+        AMOUNTS.pack(po.subtotal, po.tax, po.total),
+        LineItemBlock.from_items(po.line_items).pack(),
+    ))
+
+
+def decode_purchase_order(buffer: bytes):
+    """A PurchaseOrder from encode_purchase_order() output; its line_items is a LineItemBlock.
+
+    Raises ValueError for data that is not an encoded purchase order, is
+    truncated, or was written in a format version this build cannot read.
+    """
+    buffer = bytes(buffer)
+    try:
+        magic, version = HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC:
+            raise ValueError("not an encoded purchase order")
+        if version != VERSION:
+            raise ValueError(f"unsupported purchase order format version {version} (this build reads {VERSION})")
+        strings, offset = _read_strings(buffer, HEADER.size)
+        subtotal, tax, total = AMOUNTS.unpack_from(buffer, offset)
+        line_items, _ = _read_line_items(buffer, offset + AMOUNTS.size)
+    except struct.error as e:
+        raise ValueError(f"truncated purchase order: {e}") from None
+    _, PurchaseOrder = _models()
+    return PurchaseOrder(**dict(zip(STRING_FIELDS, strings)), line_items=line_items,
+                         subtotal=subtotal, tax=tax, total=total)
+
+
+# --- Result Cache ---
+class ResultCache:
+    """Extracted purchase orders on disk, one file per key, in the binary encoding.
+
+    A key identifies the quote's content and everything that shapes its
+    extraction (see cache_key); only successful extractions are stored.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR):
+        self.cache_dir = cache_dir
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.po")
+
+    def get(self, key: str):
+        """(vendor, PurchaseOrder) stored under key, or None."""
+        try:
+            with open(self._path(key), 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        try:
+            (length,) = COUNT.unpack_from(data, 0)
+            vendor = data[COUNT.size:COUNT.size + length].decode('utf-8')
+            return vendor, decode_purchase_order(data[COUNT.size + length:])
+        except (ValueError, struct.error):
+            return None  # another format version or a damaged file: extract again
+
+    def put(self, key: str, vendor: str, po):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        vendor = (vendor or '').encode('utf-8')
+        tmp_path = f"{self._path(key)}.{os.getpid()}.{threading.get_ident()}.tmp"  # one per writer
+        with open(tmp_path, 'wb') as f:
+            f.write(COUNT.pack(len(vendor)) + vendor + encode_purchase_order(po))
+        os.replace(tmp_path, self._path(key))
+
+
+def cache_key(data: bytes, *context: bytes) -> str:
+    """sha256 over a quote's bytes and the context that shapes its extraction (config, code)."""
+    digest = hashlib.sha256(data)
+    for part in context:
+        digest.update(hashlib.sha256(part).digest())
+    return digest.hexdigest()
@@ -1,29 +1,56 @@
 import fitz  # PyMuPDF
-import camelot
+import numpy as np
 import pandas as pd
 import re
 import os
+import io
+import json
+import hashlib
+import zipfile
 from fpdf import FPDF
 from fpdf.enums import XPos, YPos
-from dataclasses import dataclass, field
-from typing import List
+from dataclasses import dataclass, field, fields
+from functools import partial
+from types import MappingProxyType
+from typing import List, Mapping
 import yaml
 import logging
-import shutil
-
-# Set up logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s [%(levelname)s] %(message)s',
-    handlers=[
-        logging.FileHandler('app.log'),
-        logging.StreamHandler()
-    ]
-)
+import multiprocessing
+from multiprocessing.connection import wait
+import time
+import itertools
+from vendor_registry import VendorRegistry, DEFAULT_REGISTRY_PATH
+from table_backends import BACKENDS, TableBackend, get_backend, page_has_ruled_table
+from quote_fingerprint import FingerprintIndex, DEFAULT_INDEX_PATH
+from retry_scheduler import (RetryScheduler, classify_failure, file_is_settled, handle_failure,
+                             is_transient_error, QUARANTINE, DEFAULT_STATE_PATH as DEFAULT_RETRY_STATE_PATH)
+from metrics import MetricsRegistry, COUNT_BUCKETS
+from worker_pool import WorkerPool
+from ocr import OCRCache, fill_missing_text, DEFAULT_CACHE_DIR as DEFAULT_OCR_CACHE_DIR
+from document_index import DocumentIndex
+from file_claims import FileClaims, publish, DEFAULT_LEASE_SECONDS
+from po_store import POStore, source_key, DEFAULT_STORE_PATH
+from price_history import PriceHistory
+from po_numbers import PONumberAllocator, DEFAULT_BLOCK_SIZE, DEFAULT_BLOCK_TTL
+from page_text import extract_pages, PARALLEL_MIN_PAGES
+from mail_ingest import MailIngest, DEFAULT_STATE_PATH as DEFAULT_MAIL_STATE_PATH
+from po_codec import (ResultCache, cache_key, decode_purchase_order, encode_purchase_order,
+                      DEFAULT_CACHE_DIR as DEFAULT_RESULT_CACHE_DIR)
+from job_scheduler import CostModel, make_job, schedule, DEFAULT_COSTS_PATH, DEFAULT_URGENT_PATTERN
 
+LOG_FILE = 'app.log'
 FAILED_DIR = 'failed_to_process'
-if not os.path.exists(FAILED_DIR):
-    os.makedirs(FAILED_DIR)
+
+def setup_logging(log_file: str = LOG_FILE):
+    """Log to log_file and the console. Called by the command-line entry points, never on import."""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s [%(levelname)s] %(message)s',
+        handlers=[
+            logging.FileHandler(log_file),
+            logging.StreamHandler()
+        ]
+    )
 
 # Load configuration from config.yaml
 with open('config.yaml', 'r') as f:
@@ -32,10 +59,129 @@ with open('config.yaml', 'r') as f:
 # Use config values
 INPUT_DIR = config['input_dir']
 OUTPUT_DIR = config['output_dir']
+DEDUPE_QUOTES = config.get('dedupe_quotes', True)
+FINGERPRINT_INDEX_PATH = config.get('fingerprint_index', DEFAULT_INDEX_PATH)
+BATCH_OUTPUT = config.get('batch_output', 'files')
+RETRY_STATE_PATH = config.get('retry_state', DEFAULT_RETRY_STATE_PATH)
+RETRY_BASE_DELAY = config.get('retry_base_delay', 60)
+RETRY_MAX_DELAY = config.get('retry_max_delay', 3600)
+RETRY_MAX_ATTEMPTS = config.get('retry_max_attempts', 5)
+SETTLE_SECONDS = config.get('settle_seconds', 10)
+WORKER_PROCESSES = config.get('worker_processes', 0)
+WORKER_MAX_FILES = config.get('worker_max_files', 200)
+WORKER_RSS_CEILING_MB = config.get('worker_rss_ceiling_mb')
+FILE_MEMORY_BUDGET_MB = config.get('file_memory_budget_mb')
+CLAIM_FILES = config.get('claim_files', False)
+CLAIMS_DIR = config.get('claims_dir')
+LEASE_SECONDS = config.get('lease_seconds', DEFAULT_LEASE_SECONDS)
+PO_STORE_PATH = config.get('po_store', DEFAULT_STORE_PATH)
+PRICE_HISTORY = config.get('price_history', True)
+PRICE_CHANGE_THRESHOLD = config.get('price_change_threshold', 0.02)
+PO_NUMBER_LOG = config.get('po_number_log')
+PO_NUMBER_START = config.get('po_number_start', 1)
+PO_NUMBER_BLOCK = config.get('po_number_block', DEFAULT_BLOCK_SIZE)
+PO_NUMBER_BLOCK_TTL = config.get('po_number_block_ttl', DEFAULT_BLOCK_TTL)
+FINALIZED_DIR = config.get('finalized_dir', "Finalized PO's")
+MAIL_SOURCE = config.get('mail_source')
+MAIL_STATE_PATH = config.get('mail_state', DEFAULT_MAIL_STATE_PATH)
+SCHEDULE_JOBS = config.get('schedule_jobs', True)
+JOB_COSTS_PATH = config.get('job_costs', DEFAULT_COSTS_PATH)
+AGING_PER_HOUR = config.get('aging_per_hour', 60)
+URGENT_PATTERN = config.get('urgent_pattern', DEFAULT_URGENT_PATTERN)
+
+# Generic Camelot table areas, swept only for vendors not in the registry
+GENERIC_TABLE_AREAS = (
+    '0,100,800,600',  # Standard area
+    '0,200,800,500',  # Lower area
+    '0,150,800,550',  # Middle area
+    '0,50,800,650',   # Larger area
+)
+
+# I/O South column headers, overridden by the vendor's configured headers
+IOSOUTH_DEFAULT_HEADERS = MappingProxyType({
+    'item_number': 'Item',
+    'description': 'Description',
+    'quantity': 'Qty',
+    'unit_price': 'Cost',
+    'line_total': 'Total'
+})
+
+# --- Extractor Settings ---
+@dataclass(frozen=True)
+class ExtractorSettings:
+    """Extraction tuning read by IntelligentExtractor; immutable, so threads can share one instance."""
+    confidence_threshold: float = 0.9
+    known_good_strategies: Mapping[str, str] = field(default_factory=lambda: MappingProxyType({}))
+    race_strategies: bool = False
+    race_workers: int = 1
+    ocr_fallback: bool = True
+    ocr_workers: int = 1
+    page_workers: int = 1
+    parallel_pages_from: int = PARALLEL_MIN_PAGES
+    word_boxes: bool = False
+
+    def __post_init__(self):
+        object.__setattr__(self, 'known_good_strategies', MappingProxyType(dict(self.known_good_strategies)))
+
+    def __reduce__(self):
+        # Racing pickles the settings with the extractor; mappingproxy itself does not pickle
+        values = {f.name: getattr(self, f.name) for f in fields(self)}
+        values['known_good_strategies'] = dict(self.known_good_strategies)
+        return (partial(ExtractorSettings, **values), ())
+
+    @classmethod
+    def from_config(cls, config: dict) -> 'ExtractorSettings':
+        """Settings from a parsed config.yaml."""
+        cpus = os.cpu_count() or 1
+        return cls(
+            confidence_threshold=config.get('confidence_threshold', 0.9),
+            known_good_strategies=config.get('known_good_strategies') or {},
+            race_strategies=config.get('race_strategies', False),
+            race_workers=config.get('race_workers', cpus),
+            ocr_fallback=config.get('ocr_fallback', True),
+            ocr_workers=config.get('ocr_workers', cpus),
+            page_workers=config.get('page_workers', cpus),
+            parallel_pages_from=config.get('parallel_pages_from', PARALLEL_MIN_PAGES),
+            word_boxes=config.get('word_boxes', False)
+        )
+
+# Defaults for the batch run; embedders pass their own to IntelligentExtractor
+EXTRACTOR_SETTINGS = ExtractorSettings.from_config(config)
+OCR_CACHE = OCRCache(config.get('ocr_cache_dir', DEFAULT_OCR_CACHE_DIR))
+
+# Vendor patterns, table areas, headers and vendor info all come from the registry
+VENDOR_REGISTRY = VendorRegistry(config.get('vendor_registry', DEFAULT_REGISTRY_PATH))
+
+# Cached results are keyed by the code that extracted them as well as the quote
+RESULT_CACHE_DIR = config.get('result_cache_dir', DEFAULT_RESULT_CACHE_DIR)
+RESULT_CACHE = ResultCache(RESULT_CACHE_DIR) if RESULT_CACHE_DIR else None
+# Every module whose code can change an extracted PO (detection, parsing) or how it is cached
+EXTRACTION_SOURCES = ('po_extractor.py', 'vendor_registry.py', 'table_backends.py', 'document_index.py',
+                      'page_text.py', 'ocr.py', 'po_codec.py')
+
+def _source_digest(names) -> bytes:
+    digest = hashlib.sha256()
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    for name in names:
+        with open(os.path.join(base_dir, name), 'rb') as f:
+            digest.update(f.read())
+    return digest.digest()
 
-# In vendor detection, use config['vendor_patterns'] instead of hardcoded patterns
-# Example usage in _detect_vendor_type:
-# vendor_patterns = config['vendor_patterns']
+EXTRACTION_CODE_DIGEST = _source_digest(EXTRACTION_SOURCES)
+
+# --- Metrics ---
+# Kept for the process lifetime; exported as OpenMetrics to a file and/or a local endpoint
+METRICS_FILE = config.get('metrics_file')
+METRICS_PORT = config.get('metrics_port')
+METRICS = MetricsRegistry()
+METRICS.counter('po_files', "Quote files handled, by vendor and outcome")
+METRICS.counter('po_table_reads', "Table backend reads (Camelot, pdfplumber, PyMuPDF), by backend")
+METRICS.counter('po_strategy_wins', "Line item strategy whose result was used, by vendor")
+METRICS.counter('po_price_alerts', "Quoted unit prices that changed or were beaten by another vendor, by kind")
+METRICS.histogram('po_table_reads_per_file', "Table backend reads per quote file", COUNT_BUCKETS)
+METRICS.histogram('po_stage_seconds', "Latency of each processing stage")
+METRICS.counter('po_result_cache', "Result cache lookups, by result (hit or miss)")
+FILE_OUTCOMES = ('success', 'duplicate', 'retry', 'quarantined', 'deferred')
 
 # --- Data Models ---
 @dataclass
@@ -66,61 +212,171 @@ class PurchaseOrder:
     tax: float = 0.0
     total: float = 0.0
     currency: str = "USD"
+    issued_po_number: str = ""  # our own PO number; po_number is the vendor's quote number
+
+# --- Confidence Scoring ---
+def score_line_items(line_items: List[LineItem], common_data: dict, tolerance: float = 0.01) -> float:
+    """Score a candidate set of line items against the document's own arithmetic.
+
+    Checks qty x unit price against each line total, the sum of line totals
+    against the extracted subtotal, and the total against subtotal plus tax.
+    Only checks whose inputs are available contribute. Returns 0.0-1.0.
+    """
+    if not line_items:
+        return 0.0
+
+    values = np.array([(item.quantity, item.unit_price, item.line_total) for item in line_items], dtype=float)
+    quantity, unit_price, line_total = values[:, 0], values[:, 1], values[:, 2]
+
+    # Row check: fraction of rows where qty x unit price matches the line total
+    row_tolerance = np.maximum(tolerance, np.abs(line_total) * 0.001)
+    checks = [float(np.mean(np.abs(quantity * unit_price - line_total) <= row_tolerance))]
+
+    items_total = float(line_total.sum())
+    subtotal = common_data.get('subtotal', 0.0)
+    if subtotal > 0:
+        checks.append(1.0 if abs(items_total - subtotal) <= max(tolerance, subtotal * 0.001) else 0.0)
+    else:
+        subtotal = items_total
+
+    total = common_data.get('total', 0.0)
+    if total > 0:
+        expected_total = subtotal + common_data.get('tax', 0.0)
+        checks.append(1.0 if abs(total - expected_total) <= max(tolerance, total * 0.001) else 0.0)
+
+    return sum(checks) / len(checks)
+
+def _parse_amount(value: str):
+    """Parse a quantity or money cell such as '$1,300.00T'; None if it holds no number."""
+    cleaned = re.sub(r'[^\d.]', '', str(value))
+    try:
+        return float(cleaned)
+    except ValueError:
+        return None
+
+def _run_line_item_strategy(task):
+    """Racing process: run one (extractor, name, strategy, common_data) task and score it.
+
+    Besides the scored items, returns what the strategy left on this
+    process's copy of the extractor, for the parent to merge back: new
+    transient errors, table reads and a metrics snapshot.
+    """
+    extractor, name, strategy, common_data = task
+    # A registry of its own: the parent's came over by fork, possibly locked by another of its threads
+    extractor.metrics = MetricsRegistry()
+    errors, reads = len(extractor.transient_errors), extractor.table_reads
+    items = strategy()
+    return (name, items, score_line_items(items, common_data), extractor.transient_errors[errors:],
+            extractor.table_reads - reads, extractor.metrics.drain())
+
+def _race_worker(conn, task):
+    """Racing process entry point: send back the strategy's result, or the exception it raised."""
+    try:
+        conn.send(_run_line_item_strategy(task))
+    except Exception as e:
+        conn.send(e)
+    finally:
+        conn.close()
 
 # --- Intelligent Extractor ---
 class IntelligentExtractor:
-    """Unified intelligent extractor that handles all vendors automatically."""
+    """Unified intelligent extractor that handles all vendors automatically.
+
+    Everything it reads besides the document comes in through the
+    constructor: the vendor registry, settings, table backends (name ->
+    TableBackend), OCR cache and metrics registry. Left out, each defaults
+    to the batch run's instance built from config.yaml. An extractor
+    handles one document; extractors sharing these objects can run in
+    parallel threads.
+    """
     
-    def __init__(self, file_path: str):
-        self.file_path = file_path
-        self.text_content = self._load_pdf_content()
+    def __init__(self, file_path: str, registry: VendorRegistry = None, data: bytes = None, *,
+                 settings: ExtractorSettings = None, backends: Mapping[str, TableBackend] = None,
+                 ocr_cache: OCRCache = None, metrics: MetricsRegistry = None):
+        self.file_path = file_path  # with data, only the name (vendor detection reads it)
+        self.data = data  # the document's bytes when it is held in memory (mail attachments)
+        self.source = data if data is not None else file_path
+        self.registry = registry or VENDOR_REGISTRY
+        self.settings = settings or EXTRACTOR_SETTINGS
+        self.backends = backends if backends is not None else BACKENDS
+        self.ocr_cache = ocr_cache if ocr_cache is not None else OCR_CACHE
+        self.metrics = metrics if metrics is not None else METRICS
+        self.ocr_pages = []  # pages without a text layer, read by OCR
+        self.transient_errors = []  # parser crashes worth retrying the file for
+        self.table_reads = 0
+        self._index = None
+        with self.metrics.time('po_stage_seconds', stage='load'):
+            self.text_content = self._load_pdf_content()
         self.vendor_type = self._detect_vendor_type()
+
+    def __getstate__(self):
+        # An extractor shipped to another process records its metrics there
+        state = dict(self.__dict__)
+        state['metrics'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.metrics = MetricsRegistry()
+
+    @property
+    def index(self) -> DocumentIndex:
+        """Line index of text_content, built once and rebuilt only if the text is replaced."""
+        if self._index is None or self._index.text is not self.text_content:
+            self._index = DocumentIndex(self.text_content)
+        return self._index
     
     def _load_pdf_content(self) -> str:
-        """Load PDF content using PyMuPDF."""
+        """Load PDF content using PyMuPDF, OCRing pages that have no text layer.
+
+        Long PDFs are read by a process pool, one page range per worker. Word
+        boxes per page end up in self.word_boxes when word_boxes is enabled.
+        """
+        self.word_boxes = []
         try:
-            with fitz.open(self.file_path) as doc:
-                return "".join(page.get_text() for page in doc)
+            settings = self.settings
+            page_texts, word_boxes = extract_pages(self.source, settings.page_workers, settings.word_boxes,
+                                                   settings.parallel_pages_from)
+            self.word_boxes = word_boxes or []
         except Exception as e:
             logging.error(f"Error loading PDF: {e}")
+            if self.file_path.lower().endswith('.pdf'):
+                # Usually a PDF still being copied in; the retry cap catches truly corrupt ones
+                self.transient_errors.append(f"unreadable PDF: {e}")
             return ""
+        if self.settings.ocr_fallback and not all(text.strip() for text in page_texts):
+            try:
+                page_texts, self.ocr_pages = fill_missing_text(self.source, page_texts,
+                                                               workers=self.settings.ocr_workers, cache=self.ocr_cache,
+                                                               name=os.path.basename(self.file_path))
+            except Exception as e:
+                logging.error(f"Error running OCR: {e}")
+        return "".join(page_texts)
     
     def _detect_vendor_type(self) -> str:
         """Automatically detect vendor type based on content patterns."""
-        text_lower = self.text_content.lower()
         filename_lower = os.path.basename(self.file_path).lower()
-        
-        # Use config values for vendor patterns
-        vendor_patterns = config['vendor_patterns']
-        
-        # Score each vendor based on pattern matches
-        vendor_scores = {vendor: sum(2 for pattern in patterns if pattern in text_lower) 
-                        for vendor, patterns in vendor_patterns.items()}
-        
-        # Add filename-based scoring
-        for vendor, patterns in vendor_patterns.items():
-            for pattern in patterns:
-                if pattern in filename_lower:
-                    vendor_scores[vendor] += 3  # Filename match is worth more
-        
-        best_vendor = max(vendor_scores.items(), key=lambda x: x[1])
-        return best_vendor[0] if best_vendor[1] > 0 else 'unknown'
+        return self.registry.detect(self.index.text_lower, filename_lower)
     
     def extract_purchase_order(self) -> PurchaseOrder:
         """Extract purchase order data using intelligent detection."""
         logging.info(f"--- Intelligent Extraction for {self.vendor_type} ---")
         
         # Extract common data
-        common_data = self._extract_common_data()
+        with self.metrics.time('po_stage_seconds', stage='common_data'):
+            common_data = self._extract_common_data()
         
         # Extract line items
-        line_items = self._extract_line_items_intelligent()
+        with self.metrics.time('po_stage_seconds', stage='line_items'):
+            line_items = self._extract_line_items_intelligent(common_data)
+        self.metrics.inc('po_strategy_wins', vendor=self.vendor_type, strategy=self.line_item_strategy or 'none')
         
         # Get vendor information
         vendor_info = self._get_vendor_info()
         
         # Extract Ship To / Bill To
-        ship_to, bill_to = self._get_ship_and_bill_to()
+        with self.metrics.time('po_stage_seconds', stage='addresses'):
+            ship_to, bill_to = self._get_ship_and_bill_to()
         
         # Calculate totals
         subtotal = sum(item.line_total for item in line_items)
@@ -153,20 +409,21 @@ class IntelligentExtractor:
     def _extract_common_data(self) -> dict:
         """Extract common data patterns that work across multiple vendors."""
         data = {}
-        text = self.text_content
-        lines = text.split('\n')
+        index = self.index
+        text = index.text
+        lines = index.stripped
         
         # Enhanced manual extraction for financial data
         logging.debug("DEBUG: Enhanced manual extraction for financial data...")
         
         # Find the financial summary section
-        for i, line in enumerate(lines):
-            line = line.strip()
+        for i in index.lines_with('Merchandise Total', 'Subtotal', 'Tax Amount', 'Quote Total'):
+            line = lines[i]
             
             # Look for Merchandise Total/Subtotal
             if ('Merchandise Total' in line or 'Subtotal' in line) and data.get('subtotal', 0.0) == 0.0:
                 if i + 1 < len(lines):
-                    next_line = lines[i + 1].strip()
+                    next_line = lines[i + 1]
                     amount_match = re.search(r'([\d,]+\.?\d*)', next_line)
                     if amount_match:
                         data['subtotal'] = float(amount_match.group(1).replace(',', ''))
@@ -175,7 +432,7 @@ class IntelligentExtractor:
             # Look for Tax Amount
             elif 'Tax Amount' in line and data.get('tax', 0.0) == 0.0:
                 if i + 1 < len(lines):
-                    next_line = lines[i + 1].strip()
+                    next_line = lines[i + 1]
                     amount_match = re.search(r'([\d,]+\.?\d*)', next_line)
                     if amount_match:
                         data['tax'] = float(amount_match.group(1).replace(',', ''))
@@ -184,7 +441,7 @@ class IntelligentExtractor:
             # Look for Quote Total
             elif 'Quote Total' in line and data.get('total', 0.0) == 0.0:
                 if i + 1 < len(lines):
-                    next_line = lines[i + 1].strip()
+                    next_line = lines[i + 1]
                     amount_match = re.search(r'([\d,]+\.?\d*)', next_line)
                     if amount_match:
                         data['total'] = float(amount_match.group(1).replace(',', ''))
@@ -193,8 +450,8 @@ class IntelligentExtractor:
         # If we still don't have the values, try a more comprehensive search
         if data.get('tax', 0.0) == 0.0 or data.get('total', 0.0) == 0.0:
             logging.debug("DEBUG: Trying comprehensive financial data search...")
-            for i, line in enumerate(lines):
-                line = line.strip()
+            for i in index.lines_with('Tax Amount', 'Quote Total', 'Merchandise Total', '1,276.31', '11,094.06', '9,817.75'):
+                line = lines[i]
                 
                 # Debug: Print lines that might contain financial data
                 if any(keyword in line for keyword in ['Tax Amount', 'Quote Total', 'Merchandise Total', '1,276.31', '11,094.06']):
@@ -225,7 +482,7 @@ class IntelligentExtractor:
                 logging.debug(f"DEBUG: I/O South date: {data['quote_date']}")
         elif self.vendor_type == 'tdsynnex':
             # TD Synnex specific patterns
-            quote_num_match = re.search(r'cpo_(\d+)', text.lower())
+            quote_num_match = re.search(r'cpo_(\d+)', index.text_lower)
             if quote_num_match:
                 data['quote_number'] = quote_num_match.group(1).strip()
                 logging.debug(f"DEBUG: TD Synnex quote number: {data['quote_number']}")
@@ -249,16 +506,17 @@ class IntelligentExtractor:
                     logging.debug(f"DEBUG: TD Synnex quote date from filename: {data['quote_date']}")
         else:
             # Generic patterns for other vendors
-            for i, line in enumerate(lines):
+            for i in index.lines_with('Quote Number:', 'Date:'):
+                line = lines[i]
                 if 'Quote Number:' in line:
                     for j in range(i + 1, min(i + 10, len(lines))):
-                        next_line = lines[j].strip()
+                        next_line = lines[j]
                         if next_line.isdigit() and len(next_line) >= 6:
                             data['quote_number'] = next_line
                             break
                 elif 'Date:' in line:
                     for j in range(i + 1, min(i + 10, len(lines))):
-                        next_line = lines[j].strip()
+                        next_line = lines[j]
                         if re.match(r'\d{2}/\d{2}/\d{4}', next_line):
                             data['quote_date'] = next_line
                             break
@@ -270,256 +528,378 @@ class IntelligentExtractor:
         
         return data
     
-    def _extract_line_items_intelligent(self) -> List[LineItem]:
-        """Intelligently extract line items using multiple strategies."""
+    def _extract_line_items_intelligent(self, common_data: dict = None) -> List[LineItem]:
+        """Intelligently extract line items using multiple strategies.
+
+        Each candidate result is scored with score_line_items(); strategies stop
+        as soon as one clears the confidence threshold, otherwise the best-scoring
+        non-empty candidate is returned.
+        """
+        common_data = common_data if common_data is not None else self._extract_common_data()
         line_items = []
+        best_score = 0.0
+        self.line_item_strategy = None
+        self.line_item_confidence = 0.0
         
-        # Strategy 1: Try Camelot with multiple table areas
-        table_areas = [
-            '0,100,800,600',  # Standard area
-            '0,200,800,500',  # Lower area
-            '0,150,800,550',  # Middle area
-            '0,50,800,650',   # Larger area
-        ]
+        strategies = self._line_item_strategies()
+        threshold = self.settings.confidence_threshold
+        known_good = self.settings.known_good_strategies.get(self.vendor_type)
+        if known_good:
+            # Try the vendor's known-good strategy first; the rest are fallbacks
+            strategies.sort(key=lambda strategy: strategy[0] != known_good)
+        elif self.settings.race_strategies and len(strategies) > 1:
+            return self._race_line_item_strategies(strategies, common_data)
         
-        for area in table_areas:
-            try:
-                tables = camelot.read_pdf(self.file_path, pages='1', table_areas=[area])
-                if tables:
-                    df = tables[0].df
-                    logging.debug(f"DEBUG: Found table with area {area}")
-                    logging.debug(f"DEBUG: Table shape: {df.shape}")
-                    
-                    # Try to extract line items from DataFrame
-                    items = self._extract_from_dataframe(df)
-                    if items:
-                        line_items = items
-                        logging.debug(f"✓ Successfully extracted {len(line_items)} items using Camelot")
-                        break
-            except Exception as e:
-                logging.debug(f"DEBUG: Camelot failed with area {area}: {e}")
+        for name, strategy in strategies:
+            items = strategy()
+            if not items:
                 continue
+            score = score_line_items(items, common_data)
+            logging.debug(f"DEBUG: Strategy {name} extracted {len(items)} items with confidence {score:.2f}")
+            if not line_items or score > best_score:
+                line_items = items
+                best_score = score
+                self.line_item_strategy = name
+                self.line_item_confidence = score
+            if score >= threshold:
+                logging.debug(f"✓ Strategy {name} cleared confidence threshold {threshold}")
+                break
         
-        # Strategy 2: I/O South specific extraction if Camelot fails
-        if not line_items and self.vendor_type == 'iosouth':
-            logging.debug("DEBUG: Camelot failed, trying I/O South specific extraction")
-            line_items = self._extract_iosouth_line_items()
+        return line_items
+    
+    def _race_line_item_strategies(self, strategies: list, common_data: dict) -> List[LineItem]:
+        """Run the strategies concurrently, one process each and at most race_workers at a time.
+
+        The first result that clears the confidence threshold wins and the
+        processes of the strategies still running are killed, so nothing
+        is left to delay the next race. If none clears it, the best-scoring
+        non-empty result is used, preferring earlier strategies on ties.
+        Transient errors, table reads and metrics of the strategies that
+        reported back are merged into this extractor.
+        """
+        logging.debug(f"DEBUG: Racing {len(strategies)} strategies for vendor {self.vendor_type}")
+        order = {name: index for index, (name, _) in enumerate(strategies)}
+        results = []
+        ctx = multiprocessing.get_context()
+        tasks = [(self, name, strategy, common_data) for name, strategy in strategies]
+        running = {}  # connection -> process
+        won = False
+        try:
+            while (tasks or running) and not won:
+                while tasks and len(running) < max(1, self.settings.race_workers):
+                    conn, child_conn = ctx.Pipe(duplex=False)
+                    process = ctx.Process(target=_race_worker, args=(child_conn, tasks.pop(0)), daemon=True)
+                    process.start()
+                    child_conn.close()
+                    running[conn] = process
+                for conn in wait(list(running)):
+                    process = running.pop(conn)
+                    try:
+                        outcome = conn.recv()
+                    except EOFError:
+                        outcome = RuntimeError(f"racing process exited with code {process.exitcode}")
+                    conn.close()
+                    process.join()
+                    if isinstance(outcome, Exception):
+                        raise outcome
+                    name, items, score, errors, reads, metrics = outcome
+                    self.transient_errors.extend(errors)
+                    self.table_reads += reads
+                    self.metrics.merge(metrics)
+                    if not items:
+                        continue
+                    logging.debug(f"DEBUG: Strategy {name} extracted {len(items)} items with confidence {score:.2f}")
+                    if score >= self.settings.confidence_threshold:
+                        logging.debug(f"✓ Strategy {name} won the race")
+                        results = [(name, items, score)]
+                        won = True
+                        break
+                    results.append((name, items, score))
+        finally:
+            for conn, process in running.items():  # the losers still running
+                process.kill()
+                process.join()
+                conn.close()
+        
+        if not results:
+            self.line_item_strategy = None
+            self.line_item_confidence = 0.0
+            return []
+        name, items, score = max(results, key=lambda result: (result[2], -order[result[0]]))
+        self.line_item_strategy = name
+        self.line_item_confidence = score
+        return items
+    
+    def _line_item_strategies(self) -> list:
+        """Ordered (name, callable) candidates for line item extraction."""
+        strategies = []
+        spec = self.registry.get(self.vendor_type)
+        
+        # Strategy 1: Table backend (Camelot unless the vendor chooses another).
+        # Known vendors get one targeted call with their configured table areas
+        # and headers; only unknown vendors sweep generic areas. A scanned
+        # first page has no text layer for a table backend to read.
+        if 0 in self.ocr_pages:
+            logging.debug("DEBUG: Skipping table strategies, the first page is a scan")
+        elif spec and spec.table_areas:
+            backend = get_backend(spec.backend, self.backends)
+            strategies.append((f'{backend.name}:vendor', partial(
+                self._extract_table_line_items, backend.name, list(spec.table_areas),
+                spec.header_lookup, list(spec.columns) or None)))
+        elif not spec:
+            for area in GENERIC_TABLE_AREAS:
+                strategies.append((f'camelot:{area}', partial(self._extract_table_line_items, 'camelot', [area])))
+        
+        # Strategy 2: I/O South specific extraction
+        if self.vendor_type == 'iosouth' and 0 not in self.ocr_pages:
+            strategies.append(('iosouth', self._extract_iosouth_line_items))
         
         # Strategy 3: TD Synnex specific extraction for Excel/CSV files
-        if not line_items and self.vendor_type == 'tdsynnex':
-            logging.debug("DEBUG: Trying TD Synnex specific extraction")
-            line_items = self._extract_tdsynnex_line_items()
+        if self.vendor_type == 'tdsynnex':
+            strategies.append(('tdsynnex', self._extract_tdsynnex_line_items))
         
-        # Strategy 4: Structured text extraction if other methods fail
-        if not line_items:
-            logging.debug("DEBUG: Other methods failed, trying structured text extraction")
-            line_items = self._extract_structured_line_items()
+        # Strategy 4: Structured text extraction
+        strategies.append(('structured', self._extract_structured_line_items))
         
-        return line_items
+        return strategies
+    
+    def _extract_table_line_items(self, backend_name: str, table_areas: List[str], header_lookup: dict = None,
+                                  columns: List[str] = None) -> List[LineItem]:
+        """Extract line items with a single table-backend call over the given table areas."""
+        try:
+            frames = self._read_tables(backend_name, table_areas, columns)
+        except Exception as e:
+            logging.debug(f"DEBUG: {backend_name} failed with areas {table_areas}: {e}")
+            if is_transient_error(e):
+                self.transient_errors.append(f"{backend_name}: {e}")
+            return []
+        for df in frames:
+            logging.debug(f"DEBUG: {backend_name} found table with areas {table_areas}")
+            logging.debug(f"DEBUG: Table shape: {df.shape}")
+            
+            # Try to extract line items from DataFrame
+            items = self._extract_from_dataframe(df, header_lookup)
+            if items:
+                return items
+        return []
     
     def _extract_iosouth_line_items(self) -> List[LineItem]:
         """Extract line items specifically for I/O South format."""
         line_items = []
+        spec = self.registry.get('iosouth')
+        headers = dict(IOSOUTH_DEFAULT_HEADERS, **(spec.headers if spec else {}))
+        item_col, desc_col, qty_col, cost_col, total_col = (
+            headers['item_number'], headers['description'], headers['quantity'], headers['unit_price'], headers['line_total'])
         
-        # Try different table areas specifically for I/O South
-        iosouth_table_areas = [
-            '10,200,590,750',  # Original I/O South area
-            '0,150,800,600',   # Wider area
-            '0,200,800,500',   # Lower area
-            '0,100,800,650',   # Higher area
-        ]
+        # One stream call over the configured I/O South table areas
+        table_areas = list(spec.table_areas) if spec and spec.table_areas else ['10,200,590,750']
+        try:
+            frames = self._read_tables('camelot-stream', table_areas)
+        except Exception as e:
+            logging.debug(f"DEBUG: I/O South extraction failed with areas {table_areas}: {e}")
+            if is_transient_error(e):
+                self.transient_errors.append(f"camelot-stream: {e}")
+            return line_items
         
-        for area in iosouth_table_areas:
-            try:
-                tables = camelot.read_pdf(
-                    self.file_path,
-                    pages='1',
-                    flavor='stream',
-                    table_areas=[area],
-                    strip_text='\n'
-                )
-                if tables:
-                    df = tables[0].df
-                    logging.debug(f"DEBUG: I/O South table with area {area}")
-                    logging.debug(f"DEBUG: Table shape: {df.shape}")
-                    logging.debug(f"DEBUG: First few rows:")
-                    logging.debug(df.head(10))
-                    
-                    # Look for the header row with I/O South specific columns
-                    header_row_index = -1
-                    for i, row in df.iterrows():
-                        row_str = " ".join(row.astype(str)).lower()
-                        if 'item' in row_str and 'description' in row_str and 'qty' in row_str and 'cost' in row_str and 'total' in row_str:
-                            header_row_index = i
-                            logging.debug(f"DEBUG: Found I/O South header at row {i}")
-                            break
-                    
-                    if header_row_index == -1:
-                        logging.debug(f"DEBUG: Could not find I/O South header, trying row 12")
-                        header_row_index = 12
-                    
-                    # Set the header and process the data
-                    df.columns = df.iloc[header_row_index]
-                    df = df[header_row_index + 1:].reset_index(drop=True)
-                    df.dropna(how='all', inplace=True)
-                    
-                    logging.debug(f"DEBUG: Processed DataFrame:")
-                    logging.debug(df.head())
-                    
-                    # Clean up multi-line descriptions
-                    cleaned_rows = []
-                    current_item = {}
-                    
-                    for index, row in df.iterrows():
-                        item_number_val = str(row.get('Item', '')).strip()
-                        description_val = str(row.get('Description', '')).strip()
-                        qty_val = str(row.get('Qty', '')).strip()
-                        cost_val = str(row.get('Cost', '')).strip()
-                        total_val = str(row.get('Total', '')).strip()
-                        
-                        if item_number_val:  # This is a new item
-                            if current_item:  # If there was a previous item, add it to cleaned_rows
-                                cleaned_rows.append(current_item)
-                            current_item = {
-                                'Item': item_number_val,
-                                'Description': description_val,
-                                'Qty': qty_val,
-                                'Cost': cost_val,
-                                'Total': total_val
-                            }
-                        else:  # This is a continuation of the previous item's description
-                            if current_item and description_val:
-                                current_item['Description'] += "\n" + description_val
-                    
-                    if current_item:  # Add the last item
+        for df in frames:
+            df = df.replace('\n', '', regex=True)  # cells wrap mid-value, e.g. prices
+            logging.debug(f"DEBUG: I/O South table with areas {table_areas}")
+            logging.debug(f"DEBUG: Table shape: {df.shape}")
+            logging.debug(f"DEBUG: First few rows:")
+            logging.debug(df.head(10))
+            
+            # Look for the header row with the configured I/O South columns
+            header_row_index = self._find_header_row(df, spec.header_lookup if spec else {})
+            if header_row_index == -1:
+                logging.debug(f"DEBUG: Could not find I/O South header, trying row 12")
+                header_row_index = 12
+            if header_row_index >= len(df):
+                continue
+            logging.debug(f"DEBUG: Found I/O South header at row {header_row_index}")
+            
+            # Set the header and process the data
+            df.columns = df.iloc[header_row_index]
+            df = df[header_row_index + 1:].reset_index(drop=True)
+            df.dropna(how='all', inplace=True)
+            
+            logging.debug(f"DEBUG: Processed DataFrame:")
+            logging.debug(df.head())
+            
+            # Clean up multi-line descriptions
+            cleaned_rows = []
+            current_item = {}
+            
+            for index, row in df.iterrows():
+                item_number_val = str(row.get(item_col, '')).strip()
+                description_val = str(row.get(desc_col, '')).strip()
+                
+                if item_number_val:  # This is a new item
+                    if current_item:  # If there was a previous item, add it to cleaned_rows
                         cleaned_rows.append(current_item)
-                    
-                    df_cleaned = pd.DataFrame(cleaned_rows)
-                    logging.debug(f"DEBUG: Cleaned DataFrame:")
-                    logging.debug(df_cleaned.head())
-                    
-                    # Convert to LineItem objects
-                    expected_headers = {
-                        'Item': 'item_number',
-                        'Description': 'description',
-                        'Qty': 'quantity',
-                        'Cost': 'unit_price',
-                        'Total': 'line_total'
+                    current_item = {
+                        'item_number': item_number_val,
+                        'description': description_val,
+                        'quantity': str(row.get(qty_col, '')).strip(),
+                        'unit_price': str(row.get(cost_col, '')).strip(),
+                        'line_total': str(row.get(total_col, '')).strip()
                     }
+                else:  # This is a continuation of the previous item's description
+                    if current_item and description_val:
+                        current_item['description'] += "\n" + description_val
+            
+            if current_item:  # Add the last item
+                cleaned_rows.append(current_item)
+            
+            # Convert to LineItem objects
+            for row in cleaned_rows:
+                try:
+                    item_number = row['item_number']
+                    description = row['description']
                     
-                    # Remove duplicate columns if any
-                    df_cleaned = df_cleaned.loc[:, ~df_cleaned.columns.duplicated()]
-                    
-                    # Process each row
-                    for _, row in df_cleaned.iterrows():
-                        try:
-                            item_number = str(row.get('Item', '')).strip()
-                            description = str(row.get('Description', '')).strip()
-                            
-                            # Clean up quantity - remove any non-numeric characters except decimal points
-                            qty_str = str(row.get('Qty', '0')).strip()
-                            qty_str = re.sub(r'[^\d.]', '', qty_str)
-                            quantity = float(qty_str) if qty_str else 0.0
-                            
-                            # Clean up cost - remove $, commas, and any trailing letters like 'T'
-                            cost_str = str(row.get('Cost', '0')).strip()
-                            cost_str = re.sub(r'[^\d.]', '', cost_str)
-                            unit_price = float(cost_str) if cost_str else 0.0
-                            
-                            # Clean up total - remove $, commas, and any trailing letters like 'T'
-                            total_str = str(row.get('Total', '0')).strip()
-                            total_str = re.sub(r'[^\d.]', '', total_str)
-                            line_total = float(total_str) if total_str else 0.0
-                            
-                            if description and description != 'nan' and quantity > 0:
-                                line_items.append(LineItem(
-                                    item_number=item_number,
-                                    description=description,
-                                    quantity=quantity,
-                                    unit_price=unit_price,
-                                    line_total=line_total
-                                ))
-                                logging.debug(f"✓ Extracted I/O South item: {item_number} - {description} - Qty: {quantity} - Price: {unit_price} - Total: {line_total}")
-                        except (ValueError, TypeError) as e:
-                            logging.debug(f"DEBUG: Error processing I/O South row: {e}")
-                            continue
+                    # Clean up quantity, cost and total - remove $, commas and trailing letters like 'T'
+                    quantity = _parse_amount(row['quantity']) or 0.0
+                    unit_price = _parse_amount(row['unit_price']) or 0.0
+                    line_total = _parse_amount(row['line_total']) or 0.0
                     
-                    if line_items:
-                        logging.debug(f"✓ Successfully extracted {len(line_items)} I/O South items")
-                        break
-                        
-            except Exception as e:
-                logging.debug(f"DEBUG: I/O South extraction failed with area {area}: {e}")
-                continue
+                    if description and description != 'nan' and quantity > 0:
+                        line_items.append(LineItem(
+                            item_number=item_number,
+                            description=description,
+                            quantity=quantity,
+                            unit_price=unit_price,
+                            line_total=line_total
+                        ))
+                        logging.debug(f"✓ Extracted I/O South item: {item_number} - {description} - Qty: {quantity} - Price: {unit_price} - Total: {line_total}")
+                except (ValueError, TypeError) as e:
+                    logging.debug(f"DEBUG: Error processing I/O South row: {e}")
+                    continue
+            
+            if line_items:
+                logging.debug(f"✓ Successfully extracted {len(line_items)} I/O South items")
+                break
         
         return line_items
     
-    def _extract_from_dataframe(self, df: pd.DataFrame) -> List[LineItem]:
-        """Extract line items from DataFrame."""
-        line_items = []
-        
-        # Try to identify headers and map columns
+    # --- Parser Access ---
+    # All reads of the source document go through these methods, so the
+    # extraction logic can be replayed against recorded parser output.
+    def _read_tables(self, backend_name: str, table_areas: List[str] = None, columns: List[str] = None,
+                     page_number: int = 0) -> List[pd.DataFrame]:
+        """Read the tables inside table_areas on one page with a table backend."""
+        self.table_reads += 1
+        self.metrics.inc('po_table_reads', backend=backend_name)
+        return get_backend(backend_name, self.backends).read_tables(self.source, page_number, table_areas, columns)
+    
+    def _read_spreadsheet(self, skip_rows: int = 0) -> pd.DataFrame:
+        """Read an Excel or CSV quote, skipping skip_rows rows above the header."""
+        source = io.BytesIO(self.data) if self.data is not None else self.file_path
+        if self.file_path.lower().endswith(('.xlsx', '.xls')):
+            logging.debug("DEBUG: Processing Excel file")
+            return pd.read_excel(source, skiprows=skip_rows)
+        logging.debug("DEBUG: Processing CSV file")
+        return pd.read_csv(source, encoding='utf-8', skiprows=skip_rows)
+    
+    def _find_header_row(self, df: pd.DataFrame, header_lookup: dict) -> int:
+        """Index of the first row naming at least three line item columns, or -1."""
+        for i, row in enumerate(df.itertuples(index=False)):
+            if len(self._map_header_cells(row, header_lookup)) >= 3:
+                return i
+        return -1
+    
+    def _map_header_cells(self, cells, header_lookup: dict = None) -> dict:
+        """Map line item fields to column positions for one candidate header row."""
         column_mapping = {}
-        for col_idx, col in enumerate(df.columns):
-            col_text = str(col).lower()
-            
-            if 'item' in col_text or 'part' in col_text or 'sku' in col_text:
-                column_mapping['item_number'] = col_idx
+        for col_idx, cell in enumerate(cells):
+            col_text = str(cell).strip().lower()
+            if header_lookup:
+                field_name = header_lookup.get(col_text)
+            elif 'item' in col_text or 'part' in col_text or 'sku' in col_text:
+                field_name = 'item_number'
             elif 'description' in col_text or 'desc' in col_text:
-                column_mapping['description'] = col_idx
+                field_name = 'description'
             elif 'qty' in col_text or 'quantity' in col_text:
-                column_mapping['quantity'] = col_idx
+                field_name = 'quantity'
             elif 'price' in col_text or 'cost' in col_text or 'unit' in col_text:
-                column_mapping['unit_price'] = col_idx
+                field_name = 'unit_price'
             elif 'total' in col_text or 'extended' in col_text:
-                column_mapping['line_total'] = col_idx
+                field_name = 'line_total'
+            else:
+                field_name = None
+            if field_name and field_name not in column_mapping:
+                column_mapping[field_name] = col_idx
+        return column_mapping
+    
+    def _extract_from_dataframe(self, df: pd.DataFrame, header_lookup: dict = None) -> List[LineItem]:
+        """Extract line items from DataFrame.
+
+        With a vendor header_lookup (header text -> field) columns are mapped by
+        the vendor's configured headers; otherwise by generic keywords.
+        """
+        line_items = []
+        
+        # The header is either the DataFrame's columns or a row inside it (Camelot)
+        column_mapping = self._map_header_cells(df.columns, header_lookup)
+        data_start = 0
+        if len(column_mapping) < 3:
+            header_row = self._find_header_row(df, header_lookup)
+            if header_row == -1:
+                logging.debug("DEBUG: Could not find a line item header row")
+                return line_items
+            column_mapping = self._map_header_cells(df.iloc[header_row], header_lookup)
+            data_start = header_row + 1
         
         logging.debug(f"DEBUG: Column mapping: {column_mapping}")
         
-        # Process data rows
-        for idx, row in df.iterrows():
-            try:
-                if len(column_mapping) >= 3:  # Need at least item, description, quantity
-                    item_number = str(row[column_mapping.get('item_number', 0)])
-                    description = str(row[column_mapping.get('description', 1)])
-                    quantity = float(str(row[column_mapping.get('quantity', 2)]).replace(',', ''))
-                    unit_price = float(str(row[column_mapping.get('unit_price', 3)]).replace(',', ''))
-                    line_total = float(str(row[column_mapping.get('line_total', 4)]).replace(',', ''))
-                    
-                    # Validate the data
-                    if (description and description != 'nan' and 
-                        quantity > 0 and unit_price > 0):
-                        
-                        line_items.append(LineItem(
-                            item_number=item_number,
-                            description=description,
-                            quantity=quantity,
-                            unit_price=unit_price,
-                            line_total=line_total
-                        ))
-                        
-            except (ValueError, IndexError) as e:
-                logging.debug(f"DEBUG: Error parsing row {idx}: {e}")
+        def cell(values, field_name):
+            col_idx = column_mapping.get(field_name)
+            return str(values[col_idx]).strip() if col_idx is not None else ''
+        
+        # Process data rows; rows with only a description continue the previous item
+        previous_item = None
+        for idx, values in enumerate(df.iloc[data_start:].itertuples(index=False), start=data_start):
+            item_number = cell(values, 'item_number')
+            description = cell(values, 'description')
+            quantity = _parse_amount(cell(values, 'quantity'))
+            unit_price = _parse_amount(cell(values, 'unit_price'))
+            line_total = _parse_amount(cell(values, 'line_total'))
+            
+            if (previous_item and not item_number and description and
+                    quantity is None and unit_price is None and line_total is None):
+                previous_item.description += "\n" + description
                 continue
+            
+            # Validate the data; zero-priced bundle components are real items on
+            # vendor-mapped tables, but too ambiguous to accept from generic guesses
+            has_price = unit_price is not None if header_lookup else bool(unit_price)
+            if description and description != 'nan' and quantity and quantity > 0 and has_price:
+                previous_item = LineItem(
+                    item_number=item_number,
+                    description=description,
+                    quantity=quantity,
+                    unit_price=unit_price,
+                    line_total=line_total or 0.0
+                )
+                line_items.append(previous_item)
+            else:
+                logging.debug(f"DEBUG: Skipping row {idx}")
+                previous_item = None
         
         return line_items
     
     def _extract_structured_line_items(self) -> List[LineItem]:
         """Extract line items from structured text formats (like D&H)."""
         line_items = []
-        lines = self.text_content.split('\n')
+        lines = self.index.stripped
         
         # Find the line items section
         header_start = -1
         data_start = -1
         
-        for i, line in enumerate(lines):
-            line = line.strip()
-            if not line:
-                continue
-                
+        for i in self.index.lines_with('Ln'):
+            line = lines[i]
+            
             # Find the header section
-            if 'Ln' in line and i + 9 < len(lines):
+            if i + 9 < len(lines):
                 if ('Ord' in lines[i + 1] and 'Shp' in lines[i + 2] and 'BO' in lines[i + 3] and
                     'Model' in lines[i + 5] and 'Description' in lines[i + 6] and 'Unit' in lines[i + 8] and 'Extended' in lines[i + 9]):
                     header_start = i
@@ -532,7 +912,7 @@ class IntelligentExtractor:
             
         # Find the data start (first line number after header)
         for i in range(header_start + 10, len(lines)):
-            line = lines[i].strip()
+            line = lines[i]
             if line.isdigit() and len(line) <= 3:  # Likely a line number
                 data_start = i
                 logging.debug(f"DEBUG: Found structured data start at line {i}: '{line}'")
@@ -545,7 +925,7 @@ class IntelligentExtractor:
         # Extract line items using the correct structure
         i = data_start
         while i < len(lines):
-            line = lines[i].strip()
+            line = lines[i]
             if not line:
                 i += 1
                 continue
@@ -560,16 +940,16 @@ class IntelligentExtractor:
                 try:
                     # Extract the line item data with correct offsets
                     ln = line
-                    ord_qty = lines[i + 1].strip() if i + 1 < len(lines) else "0"
-                    shp = lines[i + 2].strip() if i + 2 < len(lines) else "0"
-                    bo = lines[i + 3].strip() if i + 3 < len(lines) else "0"
-                    avail = lines[i + 4].strip() if i + 4 < len(lines) else "0"
-                    warehouse = lines[i + 5].strip() if i + 5 < len(lines) else ""
-                    model = lines[i + 6].strip() if i + 6 < len(lines) else ""
-                    description = lines[i + 7].strip() if i + 7 < len(lines) else ""
+                    ord_qty = lines[i + 1] if i + 1 < len(lines) else "0"
+                    shp = lines[i + 2] if i + 2 < len(lines) else "0"
+                    bo = lines[i + 3] if i + 3 < len(lines) else "0"
+                    avail = lines[i + 4] if i + 4 < len(lines) else "0"
+                    warehouse = lines[i + 5] if i + 5 < len(lines) else ""
+                    model = lines[i + 6] if i + 6 < len(lines) else ""
+                    description = lines[i + 7] if i + 7 < len(lines) else ""
                     # Skip rebates (line i+8 is empty)
-                    unit_price = lines[i + 8].strip() if i + 8 < len(lines) else "0"
-                    extended = lines[i + 9].strip() if i + 9 < len(lines) else "0"
+                    unit_price = lines[i + 8] if i + 8 < len(lines) else "0"
+                    extended = lines[i + 9] if i + 9 < len(lines) else "0"
                     
                     logging.debug(f"DEBUG: Parsing structured item at line {i}:")
                     logging.debug(f"  Ln: {ln}, Ord: {ord_qty}, Shp: {shp}, BO: {bo}")
@@ -580,7 +960,7 @@ class IntelligentExtractor:
                     # Additional debug: show the actual lines being read
                     logging.debug(f"DEBUG: Raw structured lines:")
                     for j in range(i, min(i + 11, len(lines))):
-                        logging.debug(f"    Line {j}: '{lines[j].strip()}'")
+                        logging.debug(f"    Line {j}: '{lines[j]}'")
                     
                     # Validate the data
                     if (ln.isdigit() and ord_qty.isdigit() and 
@@ -613,134 +993,89 @@ class IntelligentExtractor:
     def _extract_tdsynnex_line_items(self) -> List[LineItem]:
         """Extract line items specifically for TD Synnex Excel/CSV format."""
         line_items = []
+        spec = self.registry.get('tdsynnex')
+        header_lookup = spec.header_lookup if spec else {}
         
-        try:
-            # Try to read as Excel file first
-            if self.file_path.lower().endswith(('.xlsx', '.xls')):
-                logging.debug("DEBUG: Processing TD Synnex Excel file")
-                # Try different sheet names and skip rows
-                for skip_rows in [0, 1, 2, 3, 4, 5, 10, 15]:
-                    try:
-                        df = pd.read_excel(self.file_path, skiprows=skip_rows)
-                        logging.debug(f"DEBUG: TD Synnex Excel with skip_rows={skip_rows}, shape={df.shape}")
-                        logging.debug(f"DEBUG: Columns: {list(df.columns)}")
-                        
-                        # Look for the header row with TD Synnex specific columns
-                        header_found = False
-                        for i, row in df.iterrows():
-                            row_str = " ".join(row.astype(str)).lower()
-                            if any(keyword in row_str for keyword in ['quote line', 'description', 'qty', 'reseller price', 'ext. price']):
-                                header_found = True
-                                logging.debug(f"DEBUG: Found TD Synnex header at row {i}")
-                                # Set this row as header
-                                df.columns = df.iloc[i]
-                                df = df[i + 1:].reset_index(drop=True)
-                                break
-                        
-                        if header_found:
-                            # Process the data
-                            items = self._process_tdsynnex_dataframe(df)
-                            if items:
-                                line_items = items
-                                logging.debug(f"✓ Successfully extracted {len(line_items)} TD Synnex items from Excel")
-                                break
-                    except Exception as e:
-                        logging.debug(f"DEBUG: TD Synnex Excel processing failed with skip_rows={skip_rows}: {e}")
-                        continue
-            
-            # Try as CSV if Excel failed or file is CSV
-            if not line_items and self.file_path.lower().endswith('.csv'):
-                logging.debug("DEBUG: Processing TD Synnex CSV file")
-                for skip_rows in [0, 1, 2, 3, 4, 5, 10, 15]:
-                    try:
-                        df = pd.read_csv(self.file_path, skiprows=skip_rows, encoding='utf-8')
-                        logging.debug(f"DEBUG: TD Synnex CSV with skip_rows={skip_rows}, shape={df.shape}")
-                        logging.debug(f"DEBUG: Columns: {list(df.columns)}")
-                        
-                        # Look for the header row
-                        header_found = False
-                        for i, row in df.iterrows():
-                            row_str = " ".join(row.astype(str)).lower()
-                            if any(keyword in row_str for keyword in ['quote line', 'description', 'qty', 'reseller price', 'ext. price']):
-                                header_found = True
-                                logging.debug(f"DEBUG: Found TD Synnex header at row {i}")
-                                # Set this row as header
-                                df.columns = df.iloc[i]
-                                df = df[i + 1:].reset_index(drop=True)
-                                break
-                        
-                        if header_found:
-                            # Process the data
-                            items = self._process_tdsynnex_dataframe(df)
-                            if items:
-                                line_items = items
-                                logging.debug(f"✓ Successfully extracted {len(line_items)} TD Synnex items from CSV")
-                                break
-                    except Exception as e:
-                        logging.debug(f"DEBUG: TD Synnex CSV processing failed with skip_rows={skip_rows}: {e}")
-                        continue
-                        
-        except Exception as e:
-            logging.debug(f"DEBUG: TD Synnex extraction failed: {e}")
+        # The configured skip_rows lands just above the header; without it, sweep
+        skip_rows_options = [spec.skip_rows] if spec and spec.skip_rows else [0, 1, 2, 3, 4, 5, 10, 15]
+        
+        if not self.file_path.lower().endswith(('.xlsx', '.xls', '.csv')):
+            return line_items
+        
+        for skip_rows in skip_rows_options:
+            try:
+                df = self._read_spreadsheet(skip_rows)
+                logging.debug(f"DEBUG: TD Synnex table with skip_rows={skip_rows}, shape={df.shape}")
+                logging.debug(f"DEBUG: Columns: {list(df.columns)}")
+                
+                # Look for the header row with the configured TD Synnex columns
+                header_row = self._find_header_row(df, header_lookup)
+                if header_row == -1:
+                    continue
+                logging.debug(f"DEBUG: Found TD Synnex header at row {header_row}")
+                df.columns = [str(col).strip() for col in df.iloc[header_row]]
+                df = df[header_row + 1:].reset_index(drop=True)
+                
+                # Process the data
+                items = self._process_tdsynnex_dataframe(df)
+                if items:
+                    line_items = items
+                    logging.debug(f"✓ Successfully extracted {len(line_items)} TD Synnex items")
+                    break
+            except Exception as e:
+                logging.debug(f"DEBUG: TD Synnex processing failed with skip_rows={skip_rows}: {e}")
+                continue
         
         return line_items
     
     def _process_tdsynnex_dataframe(self, df: pd.DataFrame) -> List[LineItem]:
         """Process TD Synnex DataFrame to extract line items."""
         line_items = []
-        logging.debug("DEBUG: TD Synnex DataFrame columns:", list(df.columns))
+        logging.debug(f"DEBUG: TD Synnex DataFrame columns: {list(df.columns)}")
         logging.debug("DEBUG: TD Synnex DataFrame head:")
         logging.debug(df.head())
-        # Find the correct columns
-        col_item = None
-        for col in ['SKU#', 'Part#', 'MFG Part#']:
-            if col in df.columns:
-                col_item = col
-                break
-        # Find the index of 'Vendor Name'
-        vendor_idx = None
-        if 'Vendor Name' in df.columns:
-            vendor_idx = list(df.columns).index('Vendor Name')
-        col_qty = 'Qty' if 'Qty' in df.columns else None
-        col_unit_price = 'Reseller Price' if 'Reseller Price' in df.columns else None
-        col_line_total = 'Ext. Price' if 'Ext. Price' in df.columns else None
-        logging.debug(f"DEBUG: Using columns: item={col_item}, vendor_idx={vendor_idx}, qty={col_qty}, unit_price={col_unit_price}, line_total={col_line_total}")
-        for idx, row in df.iterrows():
+        spec = self.registry.get('tdsynnex')
+        headers = spec.headers if spec else {}
+        columns = list(df.columns)
+        
+        def column_positions(header):
+            return [i for i, col in enumerate(columns) if col == header]
+        
+        # Find the correct columns; the description header repeats across merged cells
+        item_cols = column_positions(headers.get('item_number', 'SKU#')) or column_positions('SKU#')
+        desc_cols = column_positions(headers.get('description', 'Description'))
+        qty_cols = column_positions(headers.get('quantity', 'Qty'))
+        price_cols = column_positions(headers.get('unit_price', 'Reseller Price'))
+        total_cols = column_positions(headers.get('line_total', 'Ext. Price'))
+        logging.debug(f"DEBUG: Using columns: item={item_cols}, description={desc_cols}, qty={qty_cols}, unit_price={price_cols}, line_total={total_cols}")
+        if not item_cols or not qty_cols:
+            return line_items
+        
+        for idx, values in enumerate(df.itertuples(index=False)):
             try:
+                item_number = '' if pd.isna(values[item_cols[0]]) else str(values[item_cols[0]]).strip()
                 # Skip summary/footer rows
-                if (col_item and (pd.isna(row[col_item]) or str(row[col_item]).strip() == '' or str(row[col_item]).lower().startswith('total'))):
+                if not item_number or item_number.lower().startswith('total'):
                     continue
-                if (col_qty and (pd.isna(row[col_qty]) or not str(row[col_qty]).replace('.', '', 1).isdigit())):
+                quantity = _parse_amount(values[qty_cols[0]]) if not pd.isna(values[qty_cols[0]]) else None
+                if not quantity:
                     continue
-                item_number = str(row[col_item]).strip() if col_item else ''
-                # Use the first non-NaN, non-empty, non-'Description' value in the next 4 columns after 'Vendor Name' as description
-                description = ''
-                if vendor_idx is not None:
-                    for offset in range(1, 5):
-                        col_idx = vendor_idx + offset
-                        if col_idx < len(df.columns):
-                            val = row.iloc[col_idx]
-                            if isinstance(val, str) and val.strip() and val.strip().lower() != 'description':
-                                description = val.strip()
-                                break
-                # Skip rows where description is NaN, 'Description', or empty
-                if not description or description.lower() == 'nan' or description.lower() == 'description':
+                # Use the first non-empty value across the description columns
+                description = next((str(values[i]).strip() for i in desc_cols
+                                    if isinstance(values[i], str) and values[i].strip()
+                                    and values[i].strip().lower() != 'description'), '')
+                if not description:
                     continue
-                qty_str = str(row[col_qty]).strip() if col_qty else '0'
-                quantity = float(qty_str) if qty_str.replace('.', '', 1).isdigit() else 0.0
-                unit_price_str = str(row[col_unit_price]).replace(',', '').replace('$', '').strip() if col_unit_price else '0'
-                unit_price = float(unit_price_str) if unit_price_str.replace('.', '', 1).isdigit() else 0.0
-                line_total_str = str(row[col_line_total]).replace(',', '').replace('$', '').strip() if col_line_total else '0'
-                line_total = float(line_total_str) if line_total_str.replace('.', '', 1).isdigit() else 0.0
-                if item_number and description and quantity > 0:
-                    line_items.append(LineItem(
-                        item_number=item_number,
-                        description=description,
-                        quantity=quantity,
-                        unit_price=unit_price,
-                        line_total=line_total
-                    ))
-                    logging.debug(f"✓ Extracted TD Synnex item: {item_number} - {description} - Qty: {quantity} - Price: {unit_price} - Total: {line_total}")
+                unit_price = _parse_amount(values[price_cols[0]]) if price_cols else None
+                line_total = _parse_amount(values[total_cols[0]]) if total_cols else None
+                line_items.append(LineItem(
+                    item_number=item_number,
+                    description=description,
+                    quantity=quantity,
+                    unit_price=unit_price or 0.0,
+                    line_total=line_total or 0.0
+                ))
+                logging.debug(f"✓ Extracted TD Synnex item: {item_number} - {description} - Qty: {quantity} - Price: {unit_price} - Total: {line_total}")
             except Exception as e:
                 logging.debug(f"DEBUG: Error processing TD Synnex row {idx}: {e}")
                 continue
@@ -748,37 +1083,11 @@ class IntelligentExtractor:
     
     def _get_vendor_info(self) -> dict:
         """Get vendor information based on detected type."""
-        vendor_info = {
-            'iosouth': {
-                'name': 'I/O South, LLC',
-                'address': '1061 Triad Ct, Ste 2, Marietta, GA 30062',
-                'phone': '770.919.9770',
-                'website': 'www.iosouth.com'
-            },
-            'dandh': {
-                'name': 'D&H Canada',
-                'address': '6370 Belgrave Rd, Mississauga, ON, L5R 0G7, CA',
-                'phone': '1-800-340-1008',
-                'website': 'www.dandh.ca'
-            },
-            'tdsynnex': {
-                'name': 'TD Synnex',
-                'address': 'TD Synnex Corporation',
-                'phone': '1-800-237-8931',
-                'website': 'www.tdsynnex.com'
-            }
-        }
-        
-        return vendor_info.get(self.vendor_type, {
-            'name': 'Unknown Vendor',
-            'address': 'Address Not Found',
-            'phone': 'Phone Not Found',
-            'website': 'Website Not Found'
-        })
+        return self.registry.vendor_info(self.vendor_type)
     
     def _get_customer_name(self) -> str:
         """Extract customer name from text."""
-        text = self.text_content
+        text = self.index.text
         customer_patterns = [
             r'bill\s+to\s*:?\s*([^\n]+)',
             r'ship\s+to\s*:?\s*([^\n]+)',
@@ -794,7 +1103,7 @@ class IntelligentExtractor:
     
     def _get_customer_address(self) -> str:
         """Extract customer address from text."""
-        text = self.text_content
+        text = self.index.text
         address_patterns = [
             r'bill\s+to\s*:?\s*([^\n]+)\n([^\n]+)\n([^\n]+)',
             r'ship\s+to\s*:?\s*([^\n]+)\n([^\n]+)\n([^\n]+)',
@@ -809,7 +1118,7 @@ class IntelligentExtractor:
     
     def _get_currency(self) -> str:
         """Detect currency from text."""
-        text = self.text_content.lower()
+        text = self.index.text_lower
         if 'canadian' in text or 'cad' in text or 'canada' in text:
             return 'CAD'
         elif 'usd' in text or 'dollar' in text:
@@ -819,8 +1128,8 @@ class IntelligentExtractor:
 
     def _get_ship_and_bill_to(self) -> (dict, dict):
         """Extract Ship To and Bill To blocks from text, with smart stopping at headers/fields/repeats."""
-        text = self.text_content
-        lines = text.split('\n')
+        index = self.index
+        lines = index.lines
         ship_to = {'name': 'Not Found', 'address': 'Not Found'}
         bill_to = {'name': 'Not Found', 'address': 'Not Found'}
         stop_words = [
@@ -835,32 +1144,24 @@ class IntelligentExtractor:
                 prefix = '>>' if i == idx else '  '
                 logging.debug(f"{prefix} {i}: {lines[i]}")
         def extract_block(labels):
-            start = -1
-            found_label = None
-            for i, line in enumerate(lines):
-                for label in labels:
-                    if re.match(rf"^{label}\s*:?.*", line.strip(), re.IGNORECASE):
-                        start = i
-                        found_label = label
-                        break
-                if start != -1:
-                    break
-            if start == -1:
+            found = index.find_label(labels)
+            if found is None:
                 logging.debug(f"DEBUG: Label(s) {labels} not found for block extraction.")
                 return None
+            start, found_label = found
             print_context(found_label, start)
             # Smart block extraction
             block_lines = []
             seen = set()
             j = start + 1
             while j < len(lines) and len(block_lines) < 5:
-                l = lines[j].strip()
-                l_lower = l.lower()
+                l = index.stripped[j]
+                l_lower = index.lower[j]
                 if not l:
                     j += 1
                     continue
                 # Stop if another label, stop-word, or repeated line
-                if any(re.match(rf"^{x}\s*:?.*", l, re.IGNORECASE) for x in labels):
+                if index.is_label(j, labels):
                     break
                 if any(sw in l_lower for sw in stop_words):
                     break
@@ -876,18 +1177,17 @@ class IntelligentExtractor:
         # Try to extract Bill To and Ship To strictly by label
         bill_to_block = extract_block(['Bill To'])
         ship_to_block = extract_block(['Ship To'])
-        # Fallback: try 'Customer' or 'End User' if not found
-        if not bill_to_block or bill_to_block['name'] == 'Not Found':
-            customer_block = extract_block(['Customer', 'End User'])
-            if customer_block:
-                bill_to_block = customer_block
-        if not ship_to_block or ship_to_block['name'] == 'Not Found':
+        # Fallback: try 'Customer' or 'End User' if not found (extracted once for both)
+        customer_block = None
+        if not bill_to_block or bill_to_block['name'] == 'Not Found' or not ship_to_block or ship_to_block['name'] == 'Not Found':
             customer_block = extract_block(['Customer', 'End User'])
-            if customer_block:
-                ship_to_block = customer_block
+        if customer_block and (not bill_to_block or bill_to_block['name'] == 'Not Found'):
+            bill_to_block = customer_block
+        if customer_block and (not ship_to_block or ship_to_block['name'] == 'Not Found'):
+            ship_to_block = customer_block
         logging.debug(f"DEBUG: Final Bill To: {bill_to_block if bill_to_block else bill_to}")
         logging.debug(f"DEBUG: Final Ship To: {ship_to_block if ship_to_block else ship_to}")
-        text_lower = text.lower()
+        text_lower = index.text_lower
         if (not bill_to_block or bill_to_block['name'] == 'Not Found') and (not ship_to_block or ship_to_block['name'] == 'Not Found'):
             if 'egate' in text_lower:
                 egate_block = {'name': 'Egate', 'address': ''}
@@ -896,8 +1196,26 @@ class IntelligentExtractor:
         return ship_to_block or ship_to, bill_to_block or bill_to
 
 # --- PDF Generation Function ---
+def po_pdf_filename(po_data: PurchaseOrder) -> str:
+    if po_data.issued_po_number:
+        return f"PO {po_data.issued_po_number}.pdf"
+    return f"Generated_PO_{po_data.po_number}.pdf"
+
+def render_po_pdf(po_data: PurchaseOrder, buffer=None) -> bytes:
+    """Render the PO PDF in memory. Returns the bytes, also written to buffer if one is given."""
+    data = bytes(_build_po_pdf(po_data).output())
+    if buffer is not None:
+        buffer.write(data)
+    return data
+
 def generate_po_pdf(po_data: PurchaseOrder, output_path: str):
     """Generates a new, clean PO PDF from the structured PurchaseOrder data."""
+    final_output_path = os.path.join(output_path, po_pdf_filename(po_data))
+    _write_once(render_po_pdf(po_data), final_output_path)
+    logging.info(f"\n--- Successfully generated new PO: {final_output_path} ---")
+
+def _build_po_pdf(po_data: PurchaseOrder) -> FPDF:
+    """Lay out the PO PDF from the structured PurchaseOrder data."""
     pdf = FPDF()
     pdf.add_page()
     pdf.set_auto_page_break(auto=True, margin=15)
@@ -925,7 +1243,10 @@ def generate_po_pdf(po_data: PurchaseOrder, output_path: str):
 
     pdf.set_x(130)
     pdf.set_font("Helvetica", "B", 10)
-    pdf.cell(0, 7, f"PO Number: {po_data.po_number}", 0, new_x=XPos.LMARGIN, new_y=YPos.NEXT, align='R')
+    pdf.cell(0, 7, f"PO Number: {po_data.issued_po_number or po_data.po_number}", 0, new_x=XPos.LMARGIN, new_y=YPos.NEXT, align='R')
+    if po_data.issued_po_number:
+        pdf.set_x(130)
+        pdf.cell(0, 7, f"Quote Number: {po_data.po_number}", 0, new_x=XPos.LMARGIN, new_y=YPos.NEXT, align='R')
     pdf.set_x(130)
     pdf.cell(0, 7, f"Date: {po_data.order_date}", 0, new_x=XPos.LMARGIN, new_y=YPos.NEXT, align='R')
     pdf.ln(10)
@@ -1028,13 +1349,223 @@ def generate_po_pdf(po_data: PurchaseOrder, output_path: str):
     pdf.cell(35, 8, "TOTAL:", 0, new_x=XPos.RIGHT, new_y=YPos.TOP, align='R')
     pdf.cell(40, 8, f"{currency_symbol}{po_data.total:,.2f}", 0, new_x=XPos.LMARGIN, new_y=YPos.NEXT, align='R')
 
-    # Save the PDF
-    final_output_path = os.path.join(output_path, f"Generated_PO_{po_data.po_number}.pdf")
-    pdf.output(final_output_path)
-    logging.info(f"\n--- Successfully generated new PO: {final_output_path} ---")
+    return pdf
+
+# --- Batch Output ---
+def _write_once(data: bytes, target):
+    """Write data to a binary file object in a single sequential write, or publish it atomically to a path."""
+    if hasattr(target, 'write'):
+        target.write(data)
+    else:
+        publish(data, target)
+
+def write_po_zip(po_list: List[PurchaseOrder], target) -> int:
+    """Pack the rendered POs into one zip archive (a path or binary file object). Returns the archive size."""
+    buffer = io.BytesIO()
+    names = set()
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for po_data in po_list:
+            name = po_pdf_filename(po_data)
+            stem, suffix = os.path.splitext(name)
+            copy = 1
+            while name in names:
+                copy += 1
+                name = f"{stem}_{copy}{suffix}"
+            names.add(name)
+            archive.writestr(name, render_po_pdf(po_data))
+    _write_once(buffer.getvalue(), target)
+    return buffer.tell()
+
+def write_combined_po_pdf(po_list: List[PurchaseOrder], target) -> int:
+    """Render the POs into one combined PDF (a path or binary file object). Returns its size."""
+    with fitz.open() as combined:
+        for po_data in po_list:
+            with fitz.open('pdf', render_po_pdf(po_data)) as doc:
+                combined.insert_pdf(doc)
+        data = combined.tobytes(garbage=3, deflate=True)
+    _write_once(data, target)
+    return len(data)
+
+BATCH_WRITERS = {
+    'zip': write_po_zip,
+    'pdf': write_combined_po_pdf,
+}
+
+# --- Per-File Extraction ---
+def extract_file(file_path: str, data: bytes = None) -> dict:
+    """Extract one quote without raising, in this process or a worker.
+
+    With data, the quote is read from those bytes and file_path is only its name.
+    Returns {'file_path', 'po', 'vendor', 'table_reads', 'category', 'error', 'seconds', 'cached',
+    'source_key'}; po is None and category/error say why when extraction failed. source_key
+    (None if the file cannot be read) is what the PO store keys the quote's PO by.
+    """
+    logging.info(f"\n--- Processing: {os.path.basename(file_path)} ---")
+    result = {'file_path': file_path, 'po': None, 'vendor': None, 'table_reads': 0, 'category': None, 'error': None,
+              'seconds': 0.0, 'cached': False, 'source_key': None}
+    started = time.perf_counter()
+    extractor = None
+    key = None
+    with METRICS.time('po_stage_seconds', stage='extract'):
+        try:
+            # Pick up vendor_config.json edits made while the batch is running
+            if VENDOR_REGISTRY.reload_if_changed():
+                logging.info("  Reloaded vendor registry")
+            
+            content = data
+            if content is None:
+                try:
+                    with open(file_path, 'rb') as f:
+                        content = f.read()
+                except OSError:
+                    pass  # extraction reports why
+            if content is not None:
+                result['source_key'] = source_key(content)
+            
+            # A quote extracted before with the same registry, settings and code
+            if RESULT_CACHE is not None:
+                key = result_cache_key(file_path, content) if content is not None else None
+                cached = RESULT_CACHE.get(key) if key else None
+                METRICS.inc('po_result_cache', result='hit' if cached else 'miss')
+                if cached:
+                    result['vendor'], result['po'] = cached
+                    result['cached'] = True
+                    logging.info(f"  Served from the result cache ({result['vendor']})")
+                    return result
+            
+            # Use intelligent extractor for automatic vendor detection
+            extractor = IntelligentExtractor(file_path, data=data)
+            purchase_order_data = extractor.extract_purchase_order()
+            
+            if purchase_order_data and purchase_order_data.po_number and purchase_order_data.po_number != "Unknown":
+                result['po'] = purchase_order_data
+                if key:
+                    try:
+                        RESULT_CACHE.put(key, extractor.vendor_type, purchase_order_data)
+                    except OSError as e:
+                        logging.warning(f"  Could not cache the result: {e}")
+            else:
+                result['category'] = classify_failure(extractor=extractor)
+                result['error'] = '; '.join(extractor.transient_errors) or "no complete purchase order extracted"
+        except Exception as e:
+            logging.error(f"  An unexpected error occurred while processing {os.path.basename(file_path)}: {e}")
+            result['category'] = classify_failure(e, extractor)
+            result['error'] = f"{type(e).__name__}: {e}"
+    result['seconds'] = time.perf_counter() - started
+    if extractor is not None:
+        result['vendor'] = extractor.vendor_type
+        result['table_reads'] = extractor.table_reads
+        METRICS.observe('po_table_reads_per_file', extractor.table_reads)
+    return result
+
+def result_cache_key(file_path: str, data: bytes = None) -> str:
+    """Result cache key: the quote's bytes, the vendor registry, the extraction settings and code.
+
+    None if the file cannot be read; extraction then reports why.
+    """
+    if data is None:
+        try:
+            with open(file_path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return None
+    registry = json.dumps(VENDOR_REGISTRY.raw_config(), sort_keys=True).encode('utf-8')
+    settings = repr(EXTRACTOR_SETTINGS).encode('utf-8')
+    return cache_key(data, os.path.splitext(file_path)[1].lower().encode('utf-8'), registry, settings,
+                     EXTRACTION_CODE_DIGEST)
+
+def extract_file_encoded(file_path: str) -> dict:
+    """Worker entry point: extract_file() with the purchase order in its compact binary encoding."""
+    result = extract_file(file_path)
+    if result['po'] is not None:
+        result['po'] = encode_purchase_order(result['po'])
+    return result
+
+def decode_result(result: dict) -> dict:
+    """Parent side of extract_file_encoded(): decode the purchase order a worker sent back."""
+    if isinstance(result.get('po'), bytes):
+        result['po'] = decode_purchase_order(result['po'])
+    return result
+
+def extract_mail(mail: MailIngest, scheduler: RetryScheduler, awaiting_archive: list = None):
+    """Extract the quote attachments of new mail, yielding extract_file results (with 'data').
+
+    Results are named by MailMessage.attachment_name(). A message is
+    marked consumed once the caller has handled all of its results,
+    unless one of them was left for a retry or deferred (result['outcome']).
+    A message with a result whose PO waits for the batch archive
+    (result['awaiting_archive']) is appended to awaiting_archive instead,
+    for the caller to mark consumed once the archive is written.
+    """
+    for message in mail.new_messages():
+        logging.info(f"\n--- Mail {message.message_id}: {message.subject} ---")
+        results, waiting = [], False
+        for attachment in message.attachments:
+            name = message.attachment_name(attachment)  # retries and quarantine are per message
+            if not scheduler.is_due(name):
+                logging.info(f"\n--- Deferring: {name} (retry not due yet) ---")
+                METRICS.inc('po_files', vendor='pending', outcome='deferred')
+                waiting = True
+                continue
+            result = extract_file(attachment.filename, attachment.data)
+            result['file_path'] = name
+            result['data'] = attachment.data
+            results.append(result)
+            yield result
+        if not waiting and all(result.get('outcome') not in ('retry', 'deferred') for result in results):
+            if awaiting_archive is not None and any(result.get('awaiting_archive') for result in results):
+                awaiting_archive.append(message)
+            else:
+                mail.mark_consumed(message)
+
+def drain_metrics() -> dict:
+    """Worker side of metrics shipping: snapshot and reset this process's metrics."""
+    return METRICS.drain()
+
+# --- Batch Summary ---
+def batch_summary_lines(metrics: MetricsRegistry = METRICS) -> List[str]:
+    """Human-readable summary of the metrics collected so far."""
+    files = metrics.counter('po_files')
+    handled = files.total() - files.total(outcome='deferred')
+    minutes = max(time.time() - metrics.started, 1e-6) / 60
+    lines = [f"Files handled: {handled:.0f} ({handled / minutes:.1f} files/minute)"]
+    lines.append("  " + ", ".join(f"{outcome}: {files.total(outcome=outcome):.0f}" for outcome in FILE_OUTCOMES))
+    
+    vendors = sorted({dict(key)['vendor'] for key in files.values})
+    for vendor in vendors:
+        vendor_handled = files.total(vendor=vendor) - files.total(vendor=vendor, outcome='deferred')
+        if vendor_handled:
+            succeeded = files.total(vendor=vendor, outcome='success') + files.total(vendor=vendor, outcome='duplicate')
+            lines.append(f"  {vendor}: {succeeded / vendor_handled:.0%} success ({vendor_handled:.0f} files)")
+    
+    reads = metrics.histogram('po_table_reads_per_file', buckets=COUNT_BUCKETS)
+    read_count = sum(series['count'] for series in reads.values.values())
+    if read_count:
+        lines.append(f"Table reads per file: {sum(series['sum'] for series in reads.values.values()) / read_count:.1f}")
+    
+    wins = metrics.counter('po_strategy_wins')
+    if wins.values:
+        by_strategy = {}
+        for key, count in wins.values.items():
+            strategy = dict(key)['strategy']
+            by_strategy[strategy] = by_strategy.get(strategy, 0) + count
+        lines.append("Winning strategies: " + ", ".join(f"{name}: {count:.0f}" for name, count in
+                                                      sorted(by_strategy.items(), key=lambda x: -x[1])))
+    
+    stages = metrics.histogram('po_stage_seconds')
+    if stages.values:
+        lines.append("Stage latency:")
+    for key in sorted(stages.values):
+        stage = dict(key)['stage']
+        series = stages.values[key]
+        lines.append(f"  {stage:<12} mean {series['sum'] / series['count'] * 1000:.0f} ms, "
+                     f"p95 <= {stages.quantile(0.95, stage=stage) * 1000:.0f} ms ({series['count']} calls)")
+    return lines
 
 # --- Main Execution ---
-if __name__ == "__main__":
+def main():
+    setup_logging()
+    os.makedirs(FAILED_DIR, exist_ok=True)
     logging.info("--- Starting PO Extraction and Generation Process ---")
     
     # Configuration
@@ -1048,7 +1579,7 @@ if __name__ == "__main__":
     all_files = [f for f in os.listdir(po_directory) 
                  if f.lower().endswith(('.pdf', '.csv', '.xlsx', '.xls'))]
     
-    if not all_files:
+    if not all_files and not MAIL_SOURCE:
         logging.error(f"No PDF, CSV, or Excel files found in '{po_directory}' directory.")
         exit(1)
     
@@ -1058,43 +1589,241 @@ if __name__ == "__main__":
         logging.info(f"  - {filename}")
     logging.info("")
     
-    successful_generations = 0
-    failed_generations = 0
+    duplicates = []
+    near_duplicates = []  # same vendor, items and total as an earlier quote; rendered, but worth a look
+    batch_pos = []  # collected for a single archive write unless batch_output is 'files'
+    fingerprints = FingerprintIndex(FINGERPRINT_INDEX_PATH) if DEDUPE_QUOTES else None
+    scheduler = RetryScheduler(RETRY_STATE_PATH, RETRY_BASE_DELAY, RETRY_MAX_DELAY, RETRY_MAX_ATTEMPTS)
+    store = POStore(PO_STORE_PATH) if PO_STORE_PATH else None
+    stored = 0
+    prices = PriceHistory(store.conn, PRICE_CHANGE_THRESHOLD) if store is not None and PRICE_HISTORY else None
+    allocator = PONumberAllocator(PO_NUMBER_LOG, PO_NUMBER_START, PO_NUMBER_BLOCK, FINALIZED_DIR,
+                                  PO_NUMBER_BLOCK_TTL) if PO_NUMBER_LOG else None
+    price_alerts = []
+    pending = []  # (po, filename, vendor, source key) in an archive not yet written; recorded once it is
+    pending_mail = []  # messages consumed once the archive holding their POs is written
     
-    # Process each file using intelligent auto-detection
+    def record_po(purchase_order_data, filename, vendor, key):
+        """Record a published PO in the price history and the PO store, keyed by its quote's content."""
+        nonlocal stored
+        if prices is not None:
+            for alert in prices.record(purchase_order_data, filename, vendor, key):
+                price_alerts.append((filename, alert))
+                METRICS.inc('po_price_alerts', kind=alert['kind'])
+                logging.warning(f"  {alert['kind']}: {alert['item_number']} at {alert['unit_price']:.2f} "
+                                f"vs {alert['previous_price']:.2f} from {alert['previous_vendor']} "
+                                f"on {alert['previous_date']} ({alert['change']:+.1%})")
+        if store is not None:
+            store.add(purchase_order_data, filename, vendor, key)
+            stored += 1
+    
+    if METRICS_PORT:
+        METRICS.serve(METRICS_PORT)
+        logging.info(f"Serving metrics at http://127.0.0.1:{METRICS_PORT}/metrics")
+    
+    # Hosts sharing the input folder each process only the quotes they claim
+    claims = FileClaims(po_directory, CLAIMS_DIR, lease_seconds=LEASE_SECONDS) if CLAIM_FILES else None
+    finished = []  # batch-output quotes marked done once their archive is published
+    if claims is not None:
+        claims.start_heartbeat()
+        logging.info(f"Claiming files as {claims.owner} (lease {LEASE_SECONDS}s)")
+    
+    # Transient failures wait out their backoff; files still being written wait to settle
+    ready = []
     for filename in all_files:
-        file_path = os.path.join(po_directory, filename)
-        logging.info(f"\n--- Processing: {filename} ---")
+        if not scheduler.is_due(filename):
+            logging.info(f"\n--- Deferring: {filename} (retry not due yet) ---")
+            METRICS.inc('po_files', vendor='pending', outcome='deferred')
+            continue
+        try:
+            settled = file_is_settled(os.path.join(po_directory, filename), SETTLE_SECONDS)
+        except FileNotFoundError:  # moved or quarantined by another host since the listing
+            logging.info(f"\n--- Skipping: {filename} (no longer in the input folder) ---")
+            continue
+        if not settled:
+            logging.info(f"\n--- Deferring: {filename} (modified in the last {SETTLE_SECONDS}s) ---")
+            METRICS.inc('po_files', vendor='pending', outcome='deferred')
+        else:
+            ready.append(os.path.join(po_directory, filename))
+    
+    # Shortest predicted extraction first, urgent quotes ahead when they would otherwise be late
+    jobs = {}
+    if SCHEDULE_JOBS and ready:
+        costs = CostModel(JOB_COSTS_PATH)
+        jobs = {job.file_path: job for job in (make_job(file_path, costs, VENDOR_REGISTRY, URGENT_PATTERN)
+                                               for file_path in ready) if job is not None}
+        ready = [job.file_path for job in schedule(list(jobs.values()), WORKER_PROCESSES or 1, AGING_PER_HOUR)]
+        for job in jobs.values():
+            logging.debug(f"DEBUG: {os.path.basename(job.file_path)}: predicted {job.cost:.1f}s "
+                          f"({job.vendor}, {job.pages} pages{', deadline' if job.deadline is not None else ''})")
+    if claims is not None:
+        ready = claims.claim_each(ready)
+    
+    # Extract in this process, or in recycled workers that keep memory flat over long batches
+    if WORKER_PROCESSES:
+        pool = WorkerPool(extract_file_encoded, WORKER_PROCESSES, WORKER_MAX_FILES, WORKER_RSS_CEILING_MB,
+                          FILE_MEMORY_BUDGET_MB, metrics=METRICS, drain_metrics=drain_metrics)
+        results = (decode_result(result) for result in pool.run(ready))
+    else:
+        results = (extract_file(file_path) for file_path in ready)
+    
+    # Then the attachments of new mail, extracted in memory in this process
+    if MAIL_SOURCE:
+        mail = MailIngest(MAIL_SOURCE, MAIL_STATE_PATH)
+        logging.info(f"Reading new mail from {MAIL_SOURCE}")
+        results = itertools.chain(results, extract_mail(mail, scheduler, pending_mail))
+    
+    # Process each file using intelligent auto-detection
+    for result in results:
+        file_path = result['file_path']
+        filename = os.path.basename(file_path)
+        purchase_order_data = result['po']
+        outcome = 'quarantined'
         
         try:
-            # Use intelligent extractor for automatic vendor detection
-            extractor = IntelligentExtractor(file_path)
-            purchase_order_data = extractor.extract_purchase_order()
-            
-            if purchase_order_data and purchase_order_data.po_number and purchase_order_data.po_number != "Unknown":
-                generate_po_pdf(purchase_order_data, OUTPUT_DIR)
-                successful_generations += 1
+            if purchase_order_data is not None:
+                scheduler.record_success(filename)
+                if file_path in jobs and not result.get('cached'):
+                    costs.observe(jobs[file_path], result['seconds'])
+                
+                # Short-circuit quotes a PO was already generated for; near matches are only reported
+                duplicate = fingerprints.find_duplicate(purchase_order_data) if fingerprints is not None else None
+                if duplicate and duplicate['kind'] == 'exact':
+                    duplicates.append((filename, duplicate))
+                    outcome = 'duplicate'
+                    logging.warning(f"  Skipping {filename}: exact duplicate of quote "
+                                    f"{duplicate['po_number']} from {duplicate['file']}")
+                    if result.get('source_key') and duplicate.get('source_key') == result['source_key']:
+                        # The same quote file extracted again: its PO is not re-rendered, but the stored
+                        # PO and prices take the new extraction (dates and totals are not fingerprinted)
+                        purchase_order_data.issued_po_number = duplicate.get('issued') or ""
+                        fingerprints.add(purchase_order_data, filename, save=BATCH_OUTPUT not in BATCH_WRITERS,
+                                         source_key=result['source_key'])
+                        record_po(purchase_order_data, filename, result['vendor'], result['source_key'])
+                    continue
+                if duplicate:
+                    near_duplicates.append((filename, duplicate))
+                    logging.warning(f"  {filename} looks like quote {duplicate['po_number']} from {duplicate['file']} "
+                                    f"(same vendor, items and total); generating its PO anyway")
+                
+                # Mail attachments are not in the shared folder, so they have no lease to lose
+                if claims is not None and 'data' not in result and not claims.holds(filename):
+                    outcome = 'deferred'
+                    logging.warning(f"  Not publishing {filename}: its lease expired and was taken over")
+                    continue
+                
+                if allocator is not None:
+                    purchase_order_data.issued_po_number = str(allocator.allocate(ref=filename))
+                try:
+                    with METRICS.time('po_stage_seconds', stage='render'):
+                        if BATCH_OUTPUT in BATCH_WRITERS:
+                            batch_pos.append(purchase_order_data)
+                        else:
+                            generate_po_pdf(purchase_order_data, OUTPUT_DIR)
+                except Exception:
+                    if purchase_order_data.issued_po_number:
+                        allocator.cancel(int(purchase_order_data.issued_po_number))  # reissued, not left as a gap
+                        purchase_order_data.issued_po_number = ""
+                    raise
+                if BATCH_OUTPUT in BATCH_WRITERS:
+                    # Saved and recorded once the archive is written; until then only this batch knows it
+                    if fingerprints is not None:
+                        fingerprints.add(purchase_order_data, filename, save=False, source_key=result.get('source_key'))
+                    pending.append((purchase_order_data, filename, result['vendor'], result.get('source_key')))
+                else:
+                    if fingerprints is not None:
+                        fingerprints.add(purchase_order_data, filename, source_key=result.get('source_key'))
+                    record_po(purchase_order_data, filename, result['vendor'], result.get('source_key'))
+                outcome = 'success'
                 logging.info(f"  ✓ Successfully generated PO for {filename}")
                 logging.info(f"  Vendor: {purchase_order_data.vendor_name}")
-                logging.info(f"  PO Number: {purchase_order_data.po_number}")
+                logging.info(f"  PO Number: {purchase_order_data.issued_po_number or purchase_order_data.po_number}")
                 logging.info(f"  Total: ${purchase_order_data.total:.2f} {purchase_order_data.currency}")
                 logging.info(f"  Line Items: {len(purchase_order_data.line_items)}")
             else:
                 logging.error(f"  ✗ Failed to extract complete Purchase Order data from {filename}")
-                failed_generations += 1
-                shutil.move(file_path, os.path.join(FAILED_DIR, filename))
+                if handle_failure(scheduler, file_path, FAILED_DIR, result['category'], result['error'],
+                                  result['vendor'], result.get('data')) != QUARANTINE:
+                    outcome = 'retry'
                 
-        except FileNotFoundError as e:
-            logging.error(f"  Error: {e}")
-            failed_generations += 1
-            shutil.move(file_path, os.path.join(FAILED_DIR, filename))
         except Exception as e:
             logging.error(f"  An unexpected error occurred while processing {filename}: {e}")
-            failed_generations += 1
-            shutil.move(file_path, os.path.join(FAILED_DIR, filename))
+            if handle_failure(scheduler, file_path, FAILED_DIR, classify_failure(e), f"{type(e).__name__}: {e}",
+                              result['vendor'], result.get('data')) != QUARANTINE:
+                outcome = 'retry'
+        finally:
+            result['outcome'] = outcome
+            result['awaiting_archive'] = outcome == 'success' and BATCH_OUTPUT in BATCH_WRITERS
+            if claims is not None and outcome != 'deferred' and 'data' not in result:
+                if outcome == 'success' and BATCH_OUTPUT in BATCH_WRITERS:
+                    finished.append(filename)
+                else:
+                    claims.release(filename, done=outcome != 'retry')
+            METRICS.inc('po_files', vendor=result['vendor'] or 'unknown', outcome=outcome)
+            if METRICS_FILE:
+                METRICS.write_textfile(METRICS_FILE)
+    
+    if jobs:
+        costs.save()
+    if WORKER_PROCESSES:
+        logging.info(f"Workers recycled: {pool.recycled}, killed by the memory watchdog: {pool.killed}")
+    
+    if batch_pos:
+        archive_name = f"Generated_POs_{time.strftime('%Y%m%d-%H%M%S')}"
+        if claims is not None:
+            archive_name += f"_{claims.owner}"
+        archive_path = os.path.join(OUTPUT_DIR, f"{archive_name}.{BATCH_OUTPUT}")
+        try:
+            size = BATCH_WRITERS[BATCH_OUTPUT](batch_pos, archive_path)
+        except Exception as e:
+            logging.error(f"Could not write {archive_path}: {e}; its {len(batch_pos)} quotes are left for the next run")
+            for po_data in batch_pos:
+                if po_data.issued_po_number:
+                    allocator.cancel(int(po_data.issued_po_number))  # reissued, not left as a gap
+            archived = False
+        else:
+            logging.info(f"\n--- Wrote {len(batch_pos)} POs to {archive_path} ({size / 1024:.0f} KB) ---")
+            if fingerprints is not None:
+                fingerprints.save()
+            for purchase_order_data, filename, vendor, key in pending:
+                record_po(purchase_order_data, filename, vendor, key)
+            for message in pending_mail:
+                mail.mark_consumed(message)
+            archived = True
+    else:
+        archived = True
+    if claims is not None:
+        for filename in finished:
+            claims.release(filename, done=archived)
+        claims.stop_heartbeat()
+    
+    if allocator is not None:
+        allocator.close()
+    if store is not None:
+        store.close()
+        logging.info(f"Stored {stored} POs in {PO_STORE_PATH}")
     
     logging.info(f"\n--- Processing Complete ---")
-    logging.info(f"Successfully generated: {successful_generations} POs")
-    logging.info(f"Failed to process: {failed_generations} files")
-    logging.info(f"Total files processed: {len(all_files)}")
-    logging.info(f"\nGenerated POs are saved in: {OUTPUT_DIR}")
\ No newline at end of file
+    for line in batch_summary_lines():
+        logging.info(line)
+    if duplicates:
+        logging.info("Duplicates skipped:")
+    for filename, duplicate in duplicates:
+        logging.info(f"  - {filename} ({duplicate['kind']} duplicate of {duplicate['file']})")
+    if near_duplicates:
+        logging.info("Possible duplicates (POs generated, check them):")
+    for filename, duplicate in near_duplicates:
+        logging.info(f"  - {filename} (like quote {duplicate['po_number']} from {duplicate['file']})")
+    if price_alerts:
+        logging.info("Price alerts:")
+    for filename, alert in price_alerts:
+        logging.info(f"  - {filename}: {alert['item_number']} {alert['kind']} "
+                     f"({alert['previous_vendor']} {alert['previous_price']:.2f} -> {alert['unit_price']:.2f})")
+    if METRICS_FILE:
+        METRICS.write_textfile(METRICS_FILE)
+        logging.info(f"Metrics written to {METRICS_FILE}")
+    logging.info(f"\nGenerated POs are saved in: {OUTPUT_DIR}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Allocation of our own sequential PO numbers (PO 8277, PO 8278, ...).
+
+Several processes and hosts can render POs at once, so numbers are handed
+out in blocks: a process reserves a block under the log's lock and then
+issues numbers from it. Every reservation and every issued number is
+appended to a committed log (fsync'd before a number is returned), so
+nothing issued is ever reissued after a crash. Issuing takes the lock
+only long enough to read the records appended since the last look, so a
+number from a block that another process has since reclaimed is dropped,
+not issued twice.
+
+The allocator is gap-aware. Numbers that were reserved but never issued
+are handed out again before the sequence grows:
+
+    - numbers a process gives back when it closes
+    - numbers cancelled because their PO failed to render
+    - the rest of a block whose owner died (a dead process on this host,
+      or a block older than block_ttl anywhere)
+
+Numbers of the documents already in the finalized PO folder ("PO 8276.pdf")
+count as issued, so hand-assigned numbers are never reused.
+
+Show the log's state:
+    python po_numbers.py
+"""
+
+import json
+import logging
+import os
+import re
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from typing import List
+
+try:
+    import fcntl
+except ImportError:  # Windows: block reservations are then not locked across processes
+    fcntl = None
+
+from file_claims import default_owner
+
+DEFAULT_LOG_PATH = 'po_numbers.log'
+DEFAULT_BLOCK_SIZE = 20
+DEFAULT_BLOCK_TTL = 24 * 3600
+
+RESERVED = 'reserved'
+ISSUED = 'issued'
+FREE = 'free'
+
+FINALIZED_PATTERN = re.compile(r'^PO (\d+)\.pdf$', re.IGNORECASE)
+
+
+def finalized_numbers(finalized_dir: str) -> List[int]:
+    """PO numbers of the documents in the finalized folder ('PO 8276.pdf' -> 8276)."""
+    if not finalized_dir or not os.path.isdir(finalized_dir):
+        return []
+    return [int(match.group(1)) for match in map(FINALIZED_PATTERN.match, os.listdir(finalized_dir)) if match]
+
+
+def _ranges(numbers: List[int]) -> List[List[int]]:
+    """[8277, 8278, 8279, 8290] -> [[8277, 8279], [8290, 8290]]"""
+    ranges = []
+    for number in sorted(numbers):
+        if ranges and ranges[-1][1] == number - 1:
+            ranges[-1][1] = number
+        else:
+            ranges.append([number, number])
+    return ranges
+
+
+def _expand(ranges) -> List[int]:
+    return [number for first, last in ranges for number in range(first, last + 1)]
+
+
+def _owner_is_dead(owner: str) -> bool:
+    """True only for owners on this host whose process has exited."""
+    host, _, pid = owner.rpartition('-')
+    if host != socket.gethostname() or not pid.isdigit():
+        return False
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return True
+    except OSError:
+        pass
+    return False
+
+
+class PONumberAllocator:
+    """Hands out our PO numbers from blocks reserved in a shared, append-only log."""
+
+    def __init__(self, path: str = DEFAULT_LOG_PATH, start: int = 1, block_size: int = DEFAULT_BLOCK_SIZE,
+                 finalized_dir: str = None, block_ttl: float = DEFAULT_BLOCK_TTL, owner: str = None):
+        self.path = path
+        self.start = start
+        self.block_size = max(1, block_size)
+        self.block_ttl = block_ttl
+        self.owner = owner or default_owner()
+        self._block = []
+        self._lock = threading.Lock()
+        self._status = {}  # number -> (status, owner, at)
+        self._offset = 0
+        for number in finalized_numbers(finalized_dir):
+            self._status[number] = (ISSUED, None, 0)
+        open(self.path, 'a').close()
+
+    # --- Log ---
+    def _append(self, record: dict):
+        # Leading newline: a record torn by a crash never runs into the next one
+        line = ('\n' + json.dumps(record, separators=(',', ':')) + '\n').encode('utf-8')
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, line)  # one O_APPEND write per record: concurrent appends never interleave
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        self._apply(record)
+
+    def _apply(self, record: dict):
+        op, owner, at = record.get('op'), record.get('owner'), record.get('at', 0)
+        if op == 'reserve':
+            for number in _expand(record['numbers']):
+                self._status[number] = (RESERVED, owner, at)
+        elif op == 'issue':
+            self._status[record['number']] = (ISSUED, owner, at)
+        elif op == 'release':
+            for number in _expand(record['numbers']):
+                if self._status.get(number, (None, None))[1] == owner:  # a reclaimed block is not ours to free
+                    self._status[number] = (FREE, owner, at)
+
+    def _replay(self, f):
+        """Apply the complete records appended since the last replay, in log order."""
+        f.seek(self._offset)
+        data = f.read()
+        end = data.rfind(b'\n') + 1  # an unterminated tail is still being written (or was torn)
+        for line in data[:end].splitlines():
+            if not line:
+                continue
+            try:
+                self._apply(json.loads(line))
+            except (ValueError, KeyError, TypeError):
+                logging.debug(f"DEBUG: Skipping unreadable PO number log record: {line[:80]!r}")
+        self._offset += end
+
+    # --- Allocation ---
+    def _reclaimable(self, status, owner, at, now) -> bool:
+        if status == FREE:
+            return True
+        return (status == RESERVED and owner != self.owner
+                and (now - at > self.block_ttl or _owner_is_dead(owner)))
+
+    @contextmanager
+    def _locked_log(self):
+        """Hold the log's lock, with the records appended since the last replay applied."""
+        with open(self.path, 'rb') as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                self._replay(f)
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _reserve(self):
+        """Reserve the next block (call under the log's lock): reclaimed gaps first, then new numbers."""
+        now = time.time()
+        numbers = sorted(number for number, (status, owner, at) in self._status.items()
+                         if number >= self.start and self._reclaimable(status, owner, at, now))
+        numbers = numbers[:self.block_size]
+        next_number = max([self.start - 1, *self._status]) + 1
+        while len(numbers) < self.block_size:
+            numbers.append(next_number)
+            next_number += 1
+        self._append({'op': 'reserve', 'owner': self.owner, 'numbers': _ranges(numbers), 'at': now})
+        self._block = numbers
+        logging.debug(f"DEBUG: Reserved PO numbers {_ranges(numbers)} for {self.owner}")
+
+    def allocate(self, ref: str = None) -> int:
+        """The next PO number, committed to the log before it is returned. ref notes what it was issued for."""
+        with self._lock, self._locked_log():
+            # Another process may have reclaimed the block (it outlived block_ttl, or this one looked dead)
+            reclaimed = [number for number in self._block if self._status.get(number, (None, None, 0))[:2]
+                         != (RESERVED, self.owner)]
+            if reclaimed:
+                logging.warning(f"PO numbers {_ranges(reclaimed)} were reclaimed by another process; skipping them")
+                self._block = [number for number in self._block if number not in reclaimed]
+            if not self._block:
+                self._reserve()
+            number = self._block.pop(0)
+            self._append({'op': 'issue', 'owner': self.owner, 'number': number, 'ref': ref, 'at': time.time()})
+            return number
+
+    def cancel(self, number: int):
+        """Give back an issued number whose PO was never published, so it is reissued."""
+        with self._lock:
+            self._append({'op': 'release', 'owner': self.owner, 'numbers': [[number, number]], 'at': time.time()})
+
+    def close(self):
+        """Give back the unissued rest of this process's block."""
+        with self._lock:
+            if self._block:
+                self._append({'op': 'release', 'owner': self.owner, 'numbers': _ranges(self._block),
+                              'at': time.time()})
+                self._block = []
+
+    def state(self) -> dict:
+        """Issued count, highest number and the gaps (numbers below it not issued)."""
+        with open(self.path, 'rb') as f:
+            self._replay(f)
+        issued = sorted(number for number, (status, _, _) in self._status.items() if status == ISSUED)
+        highest = max(self._status, default=self.start - 1)
+        gaps = [number for number in range(self.start, highest + 1)
+                if self._status.get(number, (FREE,))[0] != ISSUED]
+        return {'issued': len(issued), 'highest': highest, 'gaps': gaps}
+
+
+def main():
+    from po_extractor import PO_NUMBER_LOG, PO_NUMBER_START, FINALIZED_DIR  # deferred: loads the extractor's config
+    allocator = PONumberAllocator(PO_NUMBER_LOG or DEFAULT_LOG_PATH, PO_NUMBER_START, finalized_dir=FINALIZED_DIR)
+    state = allocator.state()
+    print(f"Issued: {state['issued']}, highest: {state['highest']}")
+    print(f"Not issued (reserved or free): {_ranges(state['gaps']) or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+"""
+Embedded SQLite store of extracted purchase orders.
+
+Every PO a batch generates is kept with its line items, so questions like
+"which PO had SKU X" or "all D&H quotes this month" are answered from
+indexed tables instead of re-running extraction over the source files.
+Writes are buffered and committed in one transaction per batch (or every
+batch_size POs). Each PO is keyed by its source: a hash of the quote's
+bytes (see source_key()), so re-extracting a quote replaces what was stored
+for it while different quotes that share a file name, such as mail
+attachments all called "Quote.pdf", are kept apart.
+
+Spend per vendor, month and currency (PO count, subtotal, tax, total) is
+kept in the spend_rollups table. Each write adjusts one or two rollup rows
+in the same transaction (a replaced PO's amounts come out of its old row),
+so rollups never need a scan of the stored POs. Amounts are held in
+integer cents, so the running sums stay exact however often a quote is
+re-extracted.
+
+Query from the command line:
+    python po_store.py --item 'JL4-PD1503'
+    python po_store.py --vendor dandh --since 2025-10-01
+    python po_store.py --rollup --since 2025-01 --currency CAD
+"""
+
+import argparse
+import hashlib
+import re
+import sqlite3
+import time
+from datetime import datetime
+from typing import List, Optional
+
+DEFAULT_STORE_PATH = 'po_store.sqlite'
+
+PO_COLUMNS = (
+    'po_number', 'order_date', 'vendor_name', 'vendor_address', 'vendor_phone', 'vendor_website',
+    'customer_name', 'customer_address', 'customer_phone', 'ship_to_name', 'ship_to_address',
+    'bill_to_name', 'bill_to_address', 'subtotal', 'tax', 'total', 'currency', 'issued_po_number'
+)
+ITEM_COLUMNS = ('item_number', 'description', 'quantity', 'unit_price', 'line_total')
+
+PO_TABLE = f"""
+CREATE TABLE IF NOT EXISTS {{table}} (
+    id INTEGER PRIMARY KEY,
+    source_key TEXT NOT NULL UNIQUE,
+    source_file TEXT NOT NULL,
+    vendor TEXT,
+    order_day TEXT,
+    stored_at REAL NOT NULL,
+    {', '.join(f'{column} TEXT' if column not in ('subtotal', 'tax', 'total') else f'{column} REAL'
+               for column in PO_COLUMNS)}
+)"""
+SCHEMA = PO_TABLE.format(table='purchase_orders') + """;
+CREATE TABLE IF NOT EXISTS line_items (
+    po_id INTEGER NOT NULL REFERENCES purchase_orders(id) ON DELETE CASCADE,
+    line_no INTEGER NOT NULL,
+    item_number TEXT,
+    description TEXT,
+    quantity REAL,
+    unit_price REAL,
+    line_total REAL,
+    item_key TEXT,
+    PRIMARY KEY (po_id, line_no)
+);
+CREATE INDEX IF NOT EXISTS idx_po_number ON purchase_orders(po_number);
+CREATE INDEX IF NOT EXISTS idx_po_vendor_day ON purchase_orders(vendor, order_day);
+CREATE INDEX IF NOT EXISTS idx_po_day ON purchase_orders(order_day);
+CREATE INDEX IF NOT EXISTS idx_item_key ON line_items(item_key);
+"""
+
+ROLLUP_SCHEMA = """
+CREATE TABLE IF NOT EXISTS spend_rollups (
+    vendor TEXT NOT NULL,
+    period TEXT NOT NULL,
+    currency TEXT NOT NULL,
+    po_count INTEGER NOT NULL,
+    subtotal_cents INTEGER NOT NULL,
+    tax_cents INTEGER NOT NULL,
+    total_cents INTEGER NOT NULL,
+    PRIMARY KEY (vendor, period, currency)
+);
+CREATE INDEX IF NOT EXISTS idx_rollup_period ON spend_rollups(period);
+"""
+UNDATED_PERIOD = 'undated'  # rollup period of POs whose quote date could not be parsed
+
+DATE_FORMATS = ('%m/%d/%Y', '%m-%d-%Y', '%Y-%m-%d', '%d.%m.%Y')
+
+
+def normalise_date(value: str) -> Optional[str]:
+    """ISO date (YYYY-MM-DD) for a quote date such as '10/14/2025'; None if it cannot be parsed."""
+    value = str(value or '').strip()
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, date_format).strftime('%Y-%m-%d')
+        except ValueError:
+            continue
+    return None
+
+
+def rollup_key(vendor: str, order_day: str, currency: str) -> tuple:
+    """(vendor, period, currency) a PO is rolled up under; period is its quote month, YYYY-MM."""
+    return (vendor or 'unknown', order_day[:7] if order_day else UNDATED_PERIOD, currency or 'USD')
+
+
+def to_cents(amount) -> int:
+    return int(round(float(amount or 0) * 100))
+
+
+def source_key(data: bytes) -> str:
+    """Key a quote's PO is stored under: a hash of the quote's bytes."""
+    return 'sha256:' + hashlib.sha256(data).hexdigest()
+
+
+def normalise_item_number(value: str) -> str:
+    """Lookup key for an item number: case and whitespace are ignored."""
+    return re.sub(r'\s+', '', str(value)).upper()
+
+
+class POStore:
+    """Purchase orders and line items in SQLite, indexed by PO number, vendor, date and item number."""
+
+    def __init__(self, path: str = DEFAULT_STORE_PATH, batch_size: int = 500):
+        self.path = path
+        self.batch_size = batch_size
+        self._pending = []  # (source_key, source_file, vendor, po)
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+        if path != ':memory:':
+            self.conn.execute('PRAGMA journal_mode = WAL')  # readers are not blocked by a running batch
+        self._key_by_source()
+        self.conn.execute('PRAGMA foreign_keys = ON')
+        self.conn.executescript(SCHEMA)
+        new_rollups = not self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'spend_rollups'").fetchone()
+        self.conn.executescript(ROLLUP_SCHEMA)
+        existing = {row[1] for row in self.conn.execute('PRAGMA table_info(purchase_orders)')}
+        for column in PO_COLUMNS:
+            if column not in existing:  # stores created before the column was added
+                self.conn.execute(f'ALTER TABLE purchase_orders ADD COLUMN {column} TEXT')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS idx_issued_po_number ON purchase_orders(issued_po_number)')
+        if new_rollups:
+            self.rebuild_rollups()  # stores created before rollups were kept
+        self.conn.commit()
+
+    def _key_by_source(self):
+        """Rebuild a store created when POs were unique per file name, keying its POs by that name."""
+        existing = [row[1] for row in self.conn.execute('PRAGMA table_info(purchase_orders)')]
+        if not existing or 'source_key' in existing:
+            return
+        with self.conn:  # foreign keys are still off, so the line items stay with their PO ids
+            self.conn.execute(PO_TABLE.format(table='purchase_orders_keyed'))
+            columns = ', '.join(existing)
+            self.conn.execute(f'INSERT INTO purchase_orders_keyed (source_key, {columns}) '
+                              f'SELECT source_file, {columns} FROM purchase_orders')
+            self.conn.execute('DROP TABLE purchase_orders')
+            self.conn.execute('ALTER TABLE purchase_orders_keyed RENAME TO purchase_orders')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    # --- Writing ---
+    def add(self, po, source_file: str, vendor: str = None, source_key: str = None):
+        """Queue a PO for the next flush(); flushes every batch_size POs.
+
+        A stored PO with the same source_key (default: source_file) is replaced.
+        """
+        self._pending.append((source_key or source_file, source_file, vendor, po))
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> int:
+        """Write the queued POs in one transaction. Returns how many were written."""
+        if not self._pending:
+            return 0
+        pending, self._pending = self._pending, []
+        now = time.time()
+        with self.conn:
+            for key, source_file, vendor, po in pending:
+                previous = self.conn.execute(
+                    'SELECT vendor, order_day, currency, subtotal, tax, total FROM purchase_orders '
+                    'WHERE source_key = ?', (key,)).fetchone()
+                if previous is not None:  # a re-extraction: take the old amounts out of their rollup
+                    self.conn.execute('DELETE FROM purchase_orders WHERE source_key = ?', (key,))
+                    self._roll_up(rollup_key(previous['vendor'], previous['order_day'], previous['currency']), -1,
+                                  previous['subtotal'], previous['tax'], previous['total'])
+                order_day = normalise_date(po.order_date)
+                self._roll_up(rollup_key(vendor, order_day, po.currency), 1, po.subtotal, po.tax, po.total)
+                cursor = self.conn.execute(
+                    f"INSERT INTO purchase_orders (source_key, source_file, vendor, order_day, stored_at, "
+                    f"{', '.join(PO_COLUMNS)}) VALUES ({', '.join('?' * (len(PO_COLUMNS) + 5))})",
+                    (key, source_file, vendor, order_day, now,
+                     *(getattr(po, column) for column in PO_COLUMNS)))
+                self.conn.executemany(
+                    f"INSERT INTO line_items (po_id, line_no, {', '.join(ITEM_COLUMNS)}, item_key) "
+                    f"VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    [(cursor.lastrowid, line_no, *(getattr(item, column) for column in ITEM_COLUMNS),
+                      normalise_item_number(item.item_number))
+                     for line_no, item in enumerate(po.line_items, start=1)])
+        return len(pending)
+
+    def _roll_up(self, key: tuple, count: int, subtotal, tax, total):
+        """Add one PO (count 1) to, or take one (count -1) out of, the rollup row for key."""
+        sign = 1 if count > 0 else -1
+        self.conn.execute(
+            'INSERT INTO spend_rollups (vendor, period, currency, po_count, subtotal_cents, tax_cents, total_cents) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT (vendor, period, currency) DO UPDATE SET '
+            'po_count = po_count + excluded.po_count, subtotal_cents = subtotal_cents + excluded.subtotal_cents, '
+            'tax_cents = tax_cents + excluded.tax_cents, total_cents = total_cents + excluded.total_cents',
+            (*key, count, sign * to_cents(subtotal), sign * to_cents(tax), sign * to_cents(total)))
+        if count < 0:
+            self.conn.execute('DELETE FROM spend_rollups WHERE vendor = ? AND period = ? AND currency = ? '
+                              'AND po_count <= 0', key)
+
+    def rebuild_rollups(self):
+        """Recompute spend_rollups from the stored POs (a full scan; writes keep it current otherwise)."""
+        self.flush()
+        sums = {}
+        for row in self.conn.execute('SELECT vendor, order_day, currency, subtotal, tax, total FROM purchase_orders'):
+            counts = sums.setdefault(rollup_key(row['vendor'], row['order_day'], row['currency']), [0, 0, 0, 0])
+            for index, value in enumerate((1, to_cents(row['subtotal']), to_cents(row['tax']),
+                                           to_cents(row['total']))):
+                counts[index] += value
+        with self.conn:
+            self.conn.execute('DELETE FROM spend_rollups')
+            self.conn.executemany(
+                'INSERT INTO spend_rollups (vendor, period, currency, po_count, subtotal_cents, tax_cents, '
+                'total_cents) VALUES (?, ?, ?, ?, ?, ?, ?)', [(*key, *counts) for key, counts in sums.items()])
+
+    def close(self):
+        self.flush()
+        self.conn.commit()  # writes other indexes made on this connection
+        self.conn.close()
+
+    # --- Queries ---
+    def find(self, po_number: str = None, vendor: str = None, since: str = None, until: str = None,
+             item_number: str = None, limit: int = None) -> List[dict]:
+        """Stored POs matching every given filter, newest quote date first.
+
+        since/until are ISO dates (inclusive). Each result is a dict with
+        'id', 'source_file', 'vendor', 'order_day' and 'po' (a PurchaseOrder).
+        """
+        clauses, params = [], []
+        if po_number is not None:
+            clauses.append('po_number = ?')
+            params.append(str(po_number))
+        if vendor is not None:
+            clauses.append('vendor = ?')
+            params.append(vendor)
+        if since is not None:
+            clauses.append('order_day >= ?')
+            params.append(since)
+        if until is not None:
+            clauses.append('order_day <= ?')
+            params.append(until)
+        if item_number is not None:
+            clauses.append('id IN (SELECT po_id FROM line_items WHERE item_key = ?)')
+            params.append(normalise_item_number(item_number))
+        sql = 'SELECT * FROM purchase_orders'
+        if clauses:
+            sql += ' WHERE ' + ' AND '.join(clauses)
+        sql += ' ORDER BY order_day DESC, id DESC'
+        if limit:
+            sql += f' LIMIT {int(limit)}'
+        self.flush()
+        return self._load(self.conn.execute(sql, params).fetchall())
+
+    def find_by_item(self, item_number: str) -> List[dict]:
+        return self.find(item_number=item_number)
+
+    def count(self) -> int:
+        self.flush()
+        return self.conn.execute('SELECT COUNT(*) FROM purchase_orders').fetchone()[0]
+
+    def rollups(self, vendor: str = None, since: str = None, until: str = None, currency: str = None) -> List[dict]:
+        """Spend per vendor, month and currency from the maintained rollups, oldest month first.
+
+        since/until are months, YYYY-MM (inclusive); an ISO date works too.
+        Each result has 'vendor', 'period', 'currency', 'po_count',
+        'subtotal', 'tax' and 'total'. Amounts in different currencies are
+        never added together.
+        """
+        clauses, params = [], []
+        if vendor is not None:
+            clauses.append('vendor = ?')
+            params.append(vendor)
+        if currency is not None:
+            clauses.append('currency = ?')
+            params.append(currency)
+        if since is not None:
+            clauses.append('period >= ?')
+            params.append(since[:7])
+        if until is not None:
+            clauses.append('period <= ?')
+            params.append(until[:7])
+        sql = 'SELECT * FROM spend_rollups'
+        if clauses:
+            sql += ' WHERE ' + ' AND '.join(clauses)
+        sql += ' ORDER BY period, vendor, currency'
+        self.flush()
+        return [{'vendor': row['vendor'], 'period': row['period'], 'currency': row['currency'],
+                 'po_count': row['po_count'], 'subtotal': row['subtotal_cents'] / 100, 'tax': row['tax_cents'] / 100,
+                 'total': row['total_cents'] / 100}
+                for row in self.conn.execute(sql, params)]
+
+    def _load(self, rows) -> List[dict]:
+        from po_extractor import LineItem, PurchaseOrder  # deferred: po_extractor imports this module
+        if not rows:
+            return []
+        ids = [row['id'] for row in rows]
+        items = {po_id: [] for po_id in ids}
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            for item in self.conn.execute(
+                    f"SELECT * FROM line_items WHERE po_id IN ({', '.join('?' * len(chunk))}) ORDER BY po_id, line_no",
+                    chunk):
+                items[item['po_id']].append(LineItem(*(item[column] for column in ITEM_COLUMNS)))
+        return [{'id': row['id'], 'source_file': row['source_file'], 'vendor': row['vendor'],
+                 'order_day': row['order_day'],
+                 'po': PurchaseOrder(**{column: row[column] for column in PO_COLUMNS}, line_items=items[row['id']])}
+                for row in rows]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the store of extracted purchase orders.")
+    parser.add_argument('--po', help="PO (quote) number")
+    parser.add_argument('--vendor', help="vendor key, e.g. dandh")
+    parser.add_argument('--item', help="item number / SKU on any line")
+    parser.add_argument('--since', help="first quote date, YYYY-MM-DD")
+    parser.add_argument('--until', help="last quote date, YYYY-MM-DD")
+    parser.add_argument('--limit', type=int, default=100)
+    parser.add_argument('--rollup', action='store_true', help="spend per vendor, month and currency instead of POs")
+    parser.add_argument('--currency', help="with --rollup: only this currency, e.g. CAD")
+    parser.add_argument('--store', default=None, help="store path (default: po_store from config.yaml)")
+    args = parser.parse_args()
+
+    if args.store is None:
+        from po_extractor import PO_STORE_PATH  # deferred: loads the extractor's config
+        args.store = PO_STORE_PATH or DEFAULT_STORE_PATH
+    started = time.perf_counter()
+    if args.rollup:
+        with POStore(args.store) as store:
+            rollups = store.rollups(args.vendor, args.since, args.until, args.currency)
+        for rollup in rollups:
+            print(f"{rollup['period']:<8} {rollup['vendor']:<12} {rollup['currency']:<4} {rollup['po_count']:>5} POs "
+                  f"{rollup['subtotal']:>14.2f} {rollup['tax']:>12.2f} {rollup['total']:>14.2f}")
+        print(f"{len(rollups)} rollups in {(time.perf_counter() - started) * 1000:.1f} ms")
+        return
+    with POStore(args.store) as store:
+        results = store.find(args.po, args.vendor, args.since, args.until, args.item, args.limit)
+    for result in results:
+        po = result['po']
+        print(f"{po.po_number:<12} {result['order_day'] or po.order_date:<10} {result['vendor'] or '':<12} "
+              f"{po.total:>12.2f} {po.currency}  {len(po.line_items)} items  {result['source_file']}")
+    print(f"{len(results)} POs in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Price history of every item number across vendors, and price-change alerts.
+
+Each stored line item adds a (item, vendor, quote date, unit price) entry
+to an index kept in the PO store's SQLite database. When a new quote is
+processed each of its items is checked with two index seeks, never a scan
+of the history:
+
+    price-change    the vendor's unit price moved by more than the threshold
+                    since its previous quote for the item
+    cheaper-vendor  another vendor's latest price for the item is lower by
+                    more than the threshold
+
+The latest price per (item, vendor) is kept in its own small table so the
+cheaper-vendor check only reads one row per vendor.
+"""
+
+import time
+from typing import List
+
+from po_store import normalise_date, normalise_item_number
+
+PRICE_CHANGE = 'price-change'
+CHEAPER_VENDOR = 'cheaper-vendor'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS price_history (
+    id INTEGER PRIMARY KEY,
+    item_key TEXT NOT NULL,
+    vendor TEXT NOT NULL,
+    day TEXT NOT NULL,
+    unit_price REAL NOT NULL,
+    po_number TEXT,
+    source_file TEXT,
+    source_key TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_price_item_vendor_day ON price_history(item_key, vendor, day);
+CREATE TABLE IF NOT EXISTS latest_prices (
+    item_key TEXT NOT NULL,
+    vendor TEXT NOT NULL,
+    day TEXT NOT NULL,
+    unit_price REAL NOT NULL,
+    po_number TEXT,
+    PRIMARY KEY (item_key, vendor)
+);
+"""
+
+
+class PriceHistory:
+    """Time-ordered unit prices per item number, stored next to the POs (pass POStore.conn)."""
+
+    def __init__(self, conn, threshold: float = 0.02):
+        self.conn = conn
+        self.threshold = threshold
+        self.conn.executescript(SCHEMA)
+        columns = {row[1] for row in self.conn.execute('PRAGMA table_info(price_history)')}
+        if 'source_key' not in columns:  # histories created when entries were keyed by file name
+            self.conn.execute('ALTER TABLE price_history ADD COLUMN source_key TEXT')
+            self.conn.execute('UPDATE price_history SET source_key = source_file')
+        self.conn.execute('DROP INDEX IF EXISTS idx_price_source')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS idx_price_source_key ON price_history(source_key)')
+        self.conn.commit()
+
+    def _changed(self, new_price: float, old_price: float) -> bool:
+        return old_price > 0 and abs(new_price - old_price) > old_price * self.threshold
+
+    def check(self, item_number: str, vendor: str, day: str, unit_price: float) -> List[dict]:
+        """Deviations of one quoted price from the history (the entry itself is not recorded)."""
+        item_key = normalise_item_number(item_number)
+        alerts = []
+        previous = self.conn.execute(
+            'SELECT unit_price, day, po_number FROM price_history WHERE item_key = ? AND vendor = ? AND day <= ? '
+            'ORDER BY day DESC, id DESC LIMIT 1', (item_key, vendor, day)).fetchone()
+        if previous and self._changed(unit_price, previous[0]):
+            alerts.append({'kind': PRICE_CHANGE, 'item_number': item_number, 'vendor': vendor,
+                           'unit_price': unit_price, 'previous_price': previous[0], 'previous_vendor': vendor,
+                           'previous_date': previous[1], 'previous_po': previous[2],
+                           'change': (unit_price - previous[0]) / previous[0]})
+        cheaper = self.conn.execute(
+            'SELECT vendor, unit_price, day, po_number FROM latest_prices WHERE item_key = ? AND vendor != ? '
+            'AND unit_price < ? ORDER BY unit_price LIMIT 1',
+            (item_key, vendor, unit_price * (1 - self.threshold))).fetchone()
+        if cheaper:
+            alerts.append({'kind': CHEAPER_VENDOR, 'item_number': item_number, 'vendor': vendor,
+                           'unit_price': unit_price, 'previous_price': cheaper[1], 'previous_vendor': cheaper[0],
+                           'previous_date': cheaper[2], 'previous_po': cheaper[3],
+                           'change': (unit_price - cheaper[1]) / cheaper[1]})
+        return alerts
+
+    def add(self, item_number: str, vendor: str, day: str, unit_price: float, po_number: str = None,
+            source_file: str = None, source_key: str = None):
+        item_key = normalise_item_number(item_number)
+        self.conn.execute(
+            'INSERT INTO price_history (item_key, vendor, day, unit_price, po_number, source_file, source_key) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?)',
+            (item_key, vendor, day, unit_price, po_number, source_file, source_key or source_file))
+        self.conn.execute(
+            'INSERT INTO latest_prices (item_key, vendor, day, unit_price, po_number) VALUES (?, ?, ?, ?, ?) '
+            'ON CONFLICT (item_key, vendor) DO UPDATE SET day = excluded.day, unit_price = excluded.unit_price, '
+            'po_number = excluded.po_number WHERE excluded.day >= latest_prices.day',
+            (item_key, vendor, day, unit_price, po_number))
+
+    def _refresh_latest(self, item_key: str, vendor: str):
+        """Recompute one latest_prices row from the history, e.g. after entries were removed."""
+        latest = self.conn.execute(
+            'SELECT day, unit_price, po_number FROM price_history WHERE item_key = ? AND vendor = ? '
+            'ORDER BY day DESC, id DESC LIMIT 1', (item_key, vendor)).fetchone()
+        if latest is None:
+            self.conn.execute('DELETE FROM latest_prices WHERE item_key = ? AND vendor = ?', (item_key, vendor))
+        else:
+            self.conn.execute('INSERT OR REPLACE INTO latest_prices (item_key, vendor, day, unit_price, po_number) '
+                              'VALUES (?, ?, ?, ?, ?)', (item_key, vendor, *latest))
+
+    def record(self, po, source_file: str = None, vendor: str = None, source_key: str = None) -> List[dict]:
+        """Check every priced line item of a new PO against the history, then add them. Returns the alerts.
+
+        Entries recorded earlier under the same source_key (default:
+        source_file) are replaced, as in the PO store. Writes join the
+        connection's open transaction and are committed with the store's next flush.
+        """
+        vendor = vendor or po.vendor_name
+        day = normalise_date(po.order_date) or time.strftime('%Y-%m-%d')
+        source_key = source_key or source_file
+        alerts = []
+        if source_key:  # re-extraction replaces the quote's earlier entries
+            replaced = self.conn.execute('SELECT DISTINCT item_key, vendor FROM price_history WHERE source_key = ?',
+                                         (source_key,)).fetchall()
+            self.conn.execute('DELETE FROM price_history WHERE source_key = ?', (source_key,))
+            for item_key, item_vendor in replaced:
+                self._refresh_latest(item_key, item_vendor)
+        for item in po.line_items:
+            if not item.item_number or not item.unit_price:
+                continue
+            alerts.extend(self.check(item.item_number, vendor, day, item.unit_price))
+            self.add(item.item_number, vendor, day, item.unit_price, po.po_number, source_file, source_key)
+        return alerts
+
+    def history(self, item_number: str) -> List[dict]:
+        """Every recorded price of an item, oldest first."""
+        rows = self.conn.execute(
+            'SELECT vendor, day, unit_price, po_number, source_file FROM price_history WHERE item_key = ? '
+            'ORDER BY day, id', (normalise_item_number(item_number),)).fetchall()
+        return [dict(zip(('vendor', 'day', 'unit_price', 'po_number', 'source_file'), row)) for row in rows]
+
+    def rebuild(self):
+        """Recreate the index from the POs already in the store."""
+        with self.conn:
+            self.conn.execute('DELETE FROM price_history')
+            self.conn.execute('DELETE FROM latest_prices')
+            rows = self.conn.execute(
+                'SELECT li.item_number, COALESCE(po.vendor, po.vendor_name), '
+                "COALESCE(po.order_day, date(po.stored_at, 'unixepoch')), li.unit_price, po.po_number, "
+                'po.source_file, po.source_key FROM line_items li JOIN purchase_orders po ON po.id = li.po_id '
+                "WHERE li.unit_price > 0 AND li.item_number != '' ORDER BY 3, po.id, li.line_no").fetchall()
+            for row in rows:
+                self.add(*row)
@@ -0,0 +1,101 @@
+"""
+Duplicate quote detection.
+
+The same quote often arrives more than once: as a TD Synnex CPO spreadsheet
+and as a PDF, or re-sent under a new filename. Each extracted
+PurchaseOrder gets two fingerprints:
+
+    canonical   vendor + quote number + normalised line items (item number,
+                quantity, unit price, line total), order-independent
+    near        vendor + item numbers + total rounded to whole currency units,
+                which survives a missing or reformatted quote number,
+                re-worded descriptions and cent-level rounding differences
+
+Both are kept in a persistent index so duplicates are caught within a
+batch and across batches. Only an exact (canonical) match means the quote
+was already handled and stops a second PO being rendered; a near match may
+be a legitimate repeat order of the same items, so it is only reported.
+The canonical fingerprint leaves out the date and the totals, so an exact
+match from the same quote file (same source_key) can be a corrected
+re-extraction: its stored PO and prices are still updated.
+"""
+
+import hashlib
+import json
+import os
+import re
+from typing import Optional
+
+DEFAULT_INDEX_PATH = 'quote_fingerprints.json'
+
+
+def _normalise_text(value) -> str:
+    return re.sub(r'[^0-9a-z]', '', str(value).lower())
+
+
+def _digest(payload) -> str:
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def canonical_fingerprint(po) -> str:
+    """Hash of vendor, quote number and the normalised line items, ignoring item order."""
+    items = sorted(
+        (_normalise_text(item.item_number), round(float(item.quantity), 3),
+         round(float(item.unit_price), 2), round(float(item.line_total), 2))
+        for item in po.line_items
+    )
+    return _digest([_normalise_text(po.vendor_name), _normalise_text(po.po_number).lstrip('0'), items])
+
+
+def near_duplicate_signature(po) -> Optional[str]:
+    """Hash of vendor, the set of item numbers and the rounded total; None without line items."""
+    item_numbers = sorted({_normalise_text(item.item_number) for item in po.line_items} - {''})
+    if not item_numbers:
+        return None
+    return _digest([_normalise_text(po.vendor_name), item_numbers, int(round(po.total))])
+
+
+class FingerprintIndex:
+    """Persistent index of the quotes a PO has already been generated for."""
+
+    def __init__(self, path: str = DEFAULT_INDEX_PATH):
+        self.path = path
+        self._quotes = {}      # canonical fingerprint -> {'file', 'po_number', 'near', 'source_key', 'issued'}
+        self._near = {}        # near-duplicate signature -> canonical fingerprint
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                self._quotes = json.load(f).get('quotes', {})
+        for fingerprint, entry in self._quotes.items():
+            if entry.get('near'):
+                self._near[entry['near']] = fingerprint
+
+    def __len__(self):
+        return len(self._quotes)
+
+    def find_duplicate(self, po) -> Optional[dict]:
+        """The indexed quote po duplicates, as {'kind': 'exact'|'near', 'file', 'po_number', ...}, or None."""
+        fingerprint = canonical_fingerprint(po)
+        if fingerprint in self._quotes:
+            return dict(self._quotes[fingerprint], kind='exact')
+        signature = near_duplicate_signature(po)
+        if signature in self._near:
+            return dict(self._quotes[self._near[signature]], kind='near')
+        return None
+
+    def add(self, po, source_file: str, save: bool = True, source_key: str = None):
+        """Record a quote a PO was generated for (source_key: the PO store's key for the quote file)."""
+        signature = near_duplicate_signature(po)
+        fingerprint = canonical_fingerprint(po)
+        self._quotes[fingerprint] = {'file': source_file, 'po_number': po.po_number, 'near': signature,
+                                     'source_key': source_key, 'issued': po.issued_po_number}
+        if signature:
+            self._near[signature] = fingerprint
+        if save:
+            self.save()
+
+    def save(self):
+        """Atomically write the index file."""
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'quotes': self._quotes}, f, indent=2)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Failure classification, retries and quarantine for quotes that fail to process.
+
+Every failure is classified as one of:
+
+    transient           file still being written, unreadable for now, or a
+                        Ghostscript / OS-level crash; retried with exponential
+                        backoff up to a cap, then quarantined
+    parse               the quote was read but no complete PO came out of it
+    unsupported-vendor  the vendor is not in the vendor registry
+
+Transient failures stay in the input directory and are picked up again by
+a later batch once their backoff has elapsed; retry state persists in a
+JSON file between runs. Permanent failures are moved to the quarantine
+directory next to a <filename>.reason.json describing why.
+
+Quarantined files can be put back in the input directory once the cause
+is fixed (e.g. after adding the vendor):
+    python retry_scheduler.py --requeue [--category unsupported-vendor]
+"""
+
+import argparse
+import json
+import logging
+import os
+import shutil
+import time
+
+TRANSIENT = 'transient'
+PARSE = 'parse'
+UNSUPPORTED_VENDOR = 'unsupported-vendor'
+
+RETRY = 'retry'
+QUARANTINE = 'quarantine'
+
+DEFAULT_STATE_PATH = 'retry_state.json'
+REASON_SUFFIX = '.reason.json'
+
+TRANSIENT_MESSAGES = ('ghostscript', 'timed out', 'temporarily unavailable', 'resource busy', 'broken document')
+
+
+# --- Classification ---
+def is_transient_error(error: Exception) -> bool:
+    """OS-level errors and crashes of external tools are worth retrying; logic errors are not."""
+    if isinstance(error, (OSError, TimeoutError, MemoryError)):
+        return True
+    message = str(error).lower()
+    return any(text in message for text in TRANSIENT_MESSAGES)
+
+
+def classify_failure(error: Exception = None, extractor=None) -> str:
+    """Classify a failed quote from the exception raised (if any) and the extractor's state."""
+    if error is not None and is_transient_error(error):
+        return TRANSIENT
+    if extractor is not None and getattr(extractor, 'transient_errors', None):
+        return TRANSIENT  # a table backend crashed; the result is incomplete, not wrong
+    if extractor is not None and extractor.vendor_type == 'unknown':
+        return UNSUPPORTED_VENDOR
+    return PARSE
+
+
+def file_is_settled(file_path: str, settle_seconds: float, now: float = None) -> bool:
+    """False while the file was modified within the last settle_seconds (probably still being written)."""
+    now = time.time() if now is None else now
+    return now - os.stat(file_path).st_mtime >= settle_seconds
+
+
+# --- Scheduling ---
+class RetryScheduler:
+    """Persistent per-file retry state with capped exponential backoff."""
+
+    def __init__(self, path: str = DEFAULT_STATE_PATH, base_delay: float = 60, max_delay: float = 3600,
+                 max_attempts: int = 5):
+        self.path = path
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_attempts = max_attempts
+        self._state = {}
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                self._state = json.load(f)
+
+    def entry(self, filename: str) -> dict:
+        return self._state.get(filename)
+
+    def is_due(self, filename: str, now: float = None) -> bool:
+        entry = self._state.get(filename)
+        return entry is None or entry['next_attempt'] <= (time.time() if now is None else now)
+
+    def delay(self, attempts: int) -> float:
+        return min(self.max_delay, self.base_delay * 2 ** (attempts - 1))
+
+    def record_failure(self, filename: str, category: str, error: str, now: float = None) -> str:
+        """Count a failed attempt. Returns RETRY or QUARANTINE."""
+        now = time.time() if now is None else now
+        attempts = self._state.get(filename, {}).get('attempts', 0) + 1
+        if category != TRANSIENT or attempts >= self.max_attempts:
+            self._state.pop(filename, None)
+            self.save()
+            return QUARANTINE
+        self._state[filename] = {
+            'category': category,
+            'error': error,
+            'attempts': attempts,
+            'next_attempt': now + self.delay(attempts)
+        }
+        self.save()
+        return RETRY
+
+    def record_success(self, filename: str):
+        if self._state.pop(filename, None) is not None:
+            self.save()
+
+    def save(self):
+        """Atomically write the retry state file."""
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self._state, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+# --- Quarantine ---
+def quarantine_file(file_path: str, quarantine_dir: str, category: str, error: str, attempts: int = 1,
+                    vendor: str = None, data: bytes = None) -> str:
+    """Move a permanently failed quote into quarantine with a structured reason file.
+
+    With data (a quote that was never on disk, e.g. a mail attachment), those bytes are written instead.
+    """
+    os.makedirs(quarantine_dir, exist_ok=True)
+    filename = os.path.basename(file_path)
+    destination = os.path.join(quarantine_dir, filename)
+    if data is not None:
+        with open(destination, 'wb') as f:
+            f.write(data)
+    elif os.path.exists(file_path):
+        shutil.move(file_path, destination)
+    reason = {
+        'file': filename,
+        'category': category,
+        'error': error,
+        'attempts': attempts,
+        'vendor': vendor,
+        'quarantined_at': time.strftime('%Y-%m-%dT%H:%M:%S')
+    }
+    with open(destination + REASON_SUFFIX, 'w') as f:
+        json.dump(reason, f, indent=2)
+    return destination
+
+
+def handle_failure(scheduler: RetryScheduler, file_path: str, quarantine_dir: str, category: str, error: str,
+                   vendor: str = None, data: bytes = None) -> str:
+    """Schedule a retry for a transient failure, or quarantine the file. Returns RETRY or QUARANTINE."""
+    filename = os.path.basename(file_path)
+    attempts = (scheduler.entry(filename) or {}).get('attempts', 0) + 1
+    decision = scheduler.record_failure(filename, category, error)
+    if decision == RETRY:
+        logging.warning(f"  Transient failure on {filename} ({error}); retry {attempts} "
+                        f"in {scheduler.delay(attempts):.0f}s")
+    else:
+        quarantine_file(file_path, quarantine_dir, category, error, attempts, vendor, data)
+        logging.error(f"  Quarantined {filename}: {category} ({error})")
+    return decision
+
+
+def requeue_quarantined(quarantine_dir: str, input_dir: str, category: str = None) -> list:
+    """Move quarantined files (optionally of one category) back to the input directory."""
+    requeued = []
+    for name in sorted(os.listdir(quarantine_dir)):
+        if not name.endswith(REASON_SUFFIX):
+            continue
+        reason_path = os.path.join(quarantine_dir, name)
+        with open(reason_path, 'r') as f:
+            reason = json.load(f)
+        if category and reason.get('category') != category:
+            continue
+        file_path = os.path.join(quarantine_dir, reason['file'])
+        if os.path.exists(file_path):
+            shutil.move(file_path, os.path.join(input_dir, reason['file']))
+            requeued.append(reason['file'])
+        os.remove(reason_path)
+    return requeued
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Requeue quarantined quotes for another batch.")
+    parser.add_argument('--requeue', action='store_true', help="move quarantined files back to the input directory")
+    parser.add_argument('--category', choices=[TRANSIENT, PARSE, UNSUPPORTED_VENDOR], help="only this failure category")
+    args = parser.parse_args()
+
+    from po_extractor import FAILED_DIR, INPUT_DIR  # deferred: loads the extractor's config
+    if not args.requeue:
+        for name in sorted(os.listdir(FAILED_DIR)):
+            if name.endswith(REASON_SUFFIX):
+                with open(os.path.join(FAILED_DIR, name), 'r') as f:
+                    reason = json.load(f)
+                print(f"{reason['file']:<40} {reason['category']:<20} {reason['error']}")
+        return
+    for filename in requeue_quarantined(FAILED_DIR, INPUT_DIR, args.category):
+        print(f"Requeued {filename}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+"""
+Pluggable table-extraction backends.
+
+Every backend reads the tables inside a set of Camelot-style table areas
+('x1,y1,x2,y2' in PDF space, origin bottom-left) on one page and returns
+them as DataFrames with positional columns, header rows left in place,
+so IntelligentExtractor can map columns the same way whichever engine
+produced the table.
+
+Available backends:
+    camelot          Camelot, lattice only when the page has vector rulings
+    camelot-stream   Camelot stream flavor
+    camelot-lattice  Camelot lattice flavor (rasterizes the page)
+    pdfplumber       pdfplumber (optional dependency)
+    pymupdf          PyMuPDF's native table finder
+
+Backends read from a file path or from the PDF's bytes held in memory,
+and can be called from several threads at once.
+"""
+
+import io
+import logging
+from typing import List, Mapping
+
+import fitz  # PyMuPDF
+import pandas as pd
+
+from page_text import open_pdf, pdf_lock
+
+try:
+    import pdfplumber
+except ImportError:  # optional backend
+    pdfplumber = None
+
+# --- Ruling Detection ---
+RULING_MIN_LENGTH = 15  # points; shorter strokes are underlines or glyph art
+
+
+def camelot_area_to_rect(area: str, page_height: float) -> fitz.Rect:
+    """Convert a Camelot 'x1,y1,x2,y2' area (PDF space, origin bottom-left) to a PyMuPDF rect.
+
+    Camelot accepts the two corners in either order, so the rect is normalized.
+    """
+    x1, y1, x2, y2 = (float(v) for v in area.split(','))
+    return fitz.Rect(min(x1, x2), page_height - max(y1, y2), max(x1, x2), page_height - min(y1, y2))
+
+
+def _merge_collinear(segments: list) -> list:
+    """Join ruling segments on the same line that touch, e.g. per-cell borders."""
+    merged = []
+    for position, start, end in sorted((round(p), s, e) for p, s, e in segments):
+        if merged and merged[-1][0] == position and start <= merged[-1][2] + 2:
+            merged[-1][2] = max(merged[-1][2], end)
+        else:
+            merged.append([position, start, end])
+    return merged
+
+
+def page_has_ruled_table(page: fitz.Page, table_areas: List[str] = None) -> bool:
+    """Cheaply decide from vector drawings whether a page holds a ruled table.
+
+    Collects stroked lines, stroked rectangle edges and hairline filled
+    rectangles, joins per-cell borders into continuous rulings, and reports a
+    ruled table when some region (each table area, or the whole page) holds
+    at least three horizontal rulings spanning a third of its width and three
+    vertical rulings. Small boxed fields (dates, quote numbers) do not count.
+    Nothing is rasterized.
+    """
+    horizontal, vertical = [], []  # (position, start, end)
+    for path in page.get_drawings():
+        stroked = 's' in (path.get('type') or '')
+        for item in path['items']:
+            if item[0] == 'l' and stroked:
+                p1, p2 = item[1], item[2]
+                if abs(p1.y - p2.y) < 1:
+                    horizontal.append((p1.y, min(p1.x, p2.x), max(p1.x, p2.x)))
+                elif abs(p1.x - p2.x) < 1:
+                    vertical.append((p1.x, min(p1.y, p2.y), max(p1.y, p2.y)))
+            elif item[0] == 're':
+                r = item[1]
+                if stroked:
+                    horizontal += [(r.y0, r.x0, r.x1), (r.y1, r.x0, r.x1)]
+                    vertical += [(r.x0, r.y0, r.y1), (r.x1, r.y0, r.y1)]
+                elif r.height <= 2:
+                    horizontal.append(((r.y0 + r.y1) / 2, r.x0, r.x1))
+                elif r.width <= 2:
+                    vertical.append(((r.x0 + r.x1) / 2, r.y0, r.y1))
+    horizontal, vertical = _merge_collinear(horizontal), _merge_collinear(vertical)
+
+    if table_areas:
+        regions = [camelot_area_to_rect(area, page.rect.height) & page.rect for area in table_areas]
+    else:
+        regions = [page.rect]
+    for region in regions:
+        min_width = max(RULING_MIN_LENGTH, region.width / 3)
+        rows = {y for y, x0, x1 in horizontal
+                if x1 - x0 >= min_width and region.y0 <= y <= region.y1
+                and x0 >= region.x0 - 1 and x1 <= region.x1 + 1}
+        cols = {x for x, y0, y1 in vertical
+                if y1 - y0 >= RULING_MIN_LENGTH and region.x0 <= x <= region.x1
+                and y0 >= region.y0 - 1 and y1 <= region.y1 + 1}
+        if len(rows) >= 3 and len(cols) >= 3:
+            return True
+    return False
+
+
+def pdf_has_ruled_table(file_path: str, table_areas: List[str] = None, page_number: int = 0) -> bool:
+    """page_has_ruled_table() for one page of a file; False if the file cannot be read."""
+    try:
+        with pdf_lock, open_pdf(file_path) as doc:
+            return page_has_ruled_table(doc[page_number], table_areas)
+    except Exception as e:
+        logging.debug(f"DEBUG: Ruling detection failed: {e}")
+        return False
+
+
+# --- Backends ---
+class TableBackend:
+    """Base class: read the tables inside table areas on one page."""
+    name = None
+
+    def read_tables(self, file_path: str, page_number: int = 0, table_areas: List[str] = None,
+                    columns: List[str] = None) -> List[pd.DataFrame]:
+        """Return one DataFrame per table found.
+
+        columns, when given, holds one comma-separated string of x separators
+        per table area (Camelot's format).
+        """
+        raise NotImplementedError
+
+
+class CamelotBackend(TableBackend):
+    """Camelot with a fixed flavor, or flavor=None to choose from the page's rulings."""
+
+    def __init__(self, flavor: str = None):
+        self.flavor = flavor
+        self.name = f'camelot-{flavor}' if flavor else 'camelot'
+
+    def read_tables(self, file_path, page_number=0, table_areas=None, columns=None):
+        flavor = self.flavor
+        if flavor is None:
+            # Lattice (rasterize + line detection) only pays off on ruled tables
+            flavor = 'lattice' if pdf_has_ruled_table(file_path, table_areas, page_number) else 'stream'
+        tables = self._read(file_path, page_number, flavor, table_areas, columns)
+        if not tables and self.flavor is None and flavor == 'lattice':
+            logging.debug(f"DEBUG: Lattice found no tables in {table_areas}, trying stream")
+            tables = self._read(file_path, page_number, 'stream', table_areas, columns)
+        return [table.df for table in tables]
+
+    def _read(self, file_path, page_number, flavor, table_areas, columns):
+        import camelot  # deferred: slow to import and only needed by this backend
+        kwargs = {}
+        if table_areas:
+            kwargs['table_areas'] = list(table_areas)
+        if columns and flavor == 'stream':
+            kwargs['columns'] = list(columns)
+        logging.debug(f"DEBUG: Camelot {flavor} on page {page_number + 1} areas {table_areas}")
+        if flavor == 'lattice':
+            with pdf_lock:  # lattice rasterizes the page with PDFium
+                return camelot.read_pdf(file_path, pages=str(page_number + 1), flavor=flavor, **kwargs)
+        return camelot.read_pdf(file_path, pages=str(page_number + 1), flavor=flavor, **kwargs)
+
+
+class PdfplumberBackend(TableBackend):
+    name = 'pdfplumber'
+
+    def read_tables(self, file_path, page_number=0, table_areas=None, columns=None):
+        if pdfplumber is None:
+            raise RuntimeError("pdfplumber is not installed")
+        frames = []
+        source = io.BytesIO(file_path) if isinstance(file_path, (bytes, bytearray)) else file_path
+        with pdfplumber.open(source) as pdf:
+            page = pdf.pages[page_number]
+            page_rect = fitz.Rect(0, 0, float(page.width), float(page.height))
+            regions = [camelot_area_to_rect(area, page_rect.height) & page_rect for area in table_areas or []]
+            for index, region in enumerate(regions or [None]):
+                region_page = page.crop(tuple(region)) if region is not None else page
+                settings = {'vertical_strategy': 'text', 'horizontal_strategy': 'text'}
+                if columns and index < len(columns):
+                    settings.update(vertical_strategy='explicit',
+                                    explicit_vertical_lines=[float(x) for x in columns[index].split(',')])
+                for table in region_page.extract_tables(table_settings=settings):
+                    frames.append(pd.DataFrame(table).fillna(''))
+        return frames
+
+
+class PyMuPDFBackend(TableBackend):
+    name = 'pymupdf'
+
+    def read_tables(self, file_path, page_number=0, table_areas=None, columns=None):
+        frames = []
+        with pdf_lock, open_pdf(file_path) as doc:
+            page = doc[page_number]
+            regions = [camelot_area_to_rect(area, page.rect.height) for area in table_areas or []]
+            for index, region in enumerate(regions or [page.rect]):
+                kwargs = {'clip': region}
+                if columns and index < len(columns):
+                    kwargs['vertical_lines'] = [float(x) for x in columns[index].split(',')]
+                    kwargs['vertical_strategy'] = 'explicit'
+                    kwargs['horizontal_strategy'] = 'text'
+                else:
+                    kwargs['strategy'] = 'lines' if page_has_ruled_table(page, [table_areas[index]] if table_areas else None) else 'text'
+                for table in page.find_tables(**kwargs).tables:
+                    frames.append(pd.DataFrame(table.extract()).fillna(''))
+        return frames
+
+
+BACKENDS = {
+    backend.name: backend for backend in (
+        CamelotBackend(),
+        CamelotBackend('stream'),
+        CamelotBackend('lattice'),
+        PdfplumberBackend(),
+        PyMuPDFBackend(),
+    )
+}
+
+DEFAULT_BACKEND = 'camelot'
+
+
+def get_backend(name: str = None, backends: Mapping[str, TableBackend] = None) -> TableBackend:
+    """Look up a backend by name in backends (default: BACKENDS); None selects the default."""
+    backends = backends if backends is not None else BACKENDS
+    try:
+        return backends[name or DEFAULT_BACKEND]
+    except KeyError:
+        raise ValueError(f"unknown table backend '{name}' (available: {', '.join(backends)})") from None
@@ -0,0 +1,36 @@
+"""
+Test modes.
+
+By default only the fast suite runs: extraction logic is replayed against
+recorded parser output in tests/fixtures (see fixture_recorder.py).
+Pass --slow to also run the tests marked slow, which parse the real sample
+files with PyMuPDF, Camelot (needs Ghostscript) and pandas, and the
+test_camelot* diagnostic scripts.
+"""
+
+import pytest
+
+
+def pytest_addoption(parser):
+    parser.addoption('--slow', action='store_true', default=False,
+                     help="also run tests that parse the real sample files")
+
+
+def pytest_configure(config):
+    config.addinivalue_line('markers', 'slow: parses real files with PyMuPDF/Camelot; runs only with --slow')
+
+
+def pytest_ignore_collect(collection_path, config):
+    # The Camelot diagnostic scripts call Camelot at import time
+    if collection_path.name.startswith('test_camelot') and not config.getoption('--slow'):
+        return True
+    return None
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption('--slow'):
+        return
+    skip_slow = pytest.mark.skip(reason="parses real files; run with --slow")
+    for item in items:
+        if 'slow' in item.keywords:
+            item.add_marker(skip_slow)
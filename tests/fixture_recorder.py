@@ -0,0 +1,136 @@
+"""
+Record and replay parser output for the sample quotes.
+
+The recorder runs the real parsers (PyMuPDF, Camelot, pandas) once per
+sample and saves the text layer, word boxes, every table DataFrame and
+every spreadsheet read the extractor asked for to tests/fixtures/<name>.json.
+ReplayExtractor runs the unchanged extraction logic against a recording,
+so the regression tests need neither Ghostscript nor the sample files.
+
+Re-record after changing table areas, backends or the samples:
+    python tests/fixture_recorder.py
+"""
+
+import json
+import os
+import sys
+
+import fitz  # PyMuPDF
+import pandas as pd
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT_DIR)
+from po_extractor import IntelligentExtractor
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), 'fixtures')
+SAMPLES = [
+    "PO's/111651.pdf",
+    "PO's/DandH-Quote-11931304-0.Pdf",
+    "PO's/email_quote_excel_cpo_42566579.xlsx",
+]
+
+
+# --- Serialization ---
+def frame_to_json(df: pd.DataFrame) -> dict:
+    """DataFrame as {'columns': [...], 'data': [[...]]} with NaN stored as null."""
+    values = df.astype(object).where(df.notna(), None)
+    return {'columns': list(df.columns), 'data': values.values.tolist()}
+
+
+def frame_from_json(data: dict) -> pd.DataFrame:
+    return pd.DataFrame(data['data'], columns=data['columns'])
+
+
+def table_key(backend_name, table_areas, columns, page_number) -> str:
+    return '|'.join([backend_name, str(page_number), ';'.join(table_areas or []), ';'.join(columns or [])])
+
+
+def fixture_path(sample: str, fixture_dir: str = FIXTURE_DIR) -> str:
+    return os.path.join(fixture_dir, os.path.basename(sample) + '.json')
+
+
+def load_fixture(sample: str, fixture_dir: str = FIXTURE_DIR) -> dict:
+    with open(fixture_path(sample, fixture_dir), 'r') as f:
+        return json.load(f)
+
+
+# --- Recording ---
+class RecordingExtractor(IntelligentExtractor):
+    """IntelligentExtractor that keeps a copy of every parser result it sees."""
+
+    def __init__(self, file_path: str, registry=None, **dependencies):
+        self.recording = {'file_path': file_path, 'text': '', 'words': [], 'tables': {}, 'spreadsheets': {}}
+        super().__init__(file_path, registry, **dependencies)
+
+    def _load_pdf_content(self) -> str:
+        text = super()._load_pdf_content()
+        self.recording['text'] = text
+        try:
+            with fitz.open(self.file_path) as doc:
+                self.recording['words'] = [[list(word[:5]) for word in page.get_text('words')] for page in doc]
+        except Exception:
+            pass  # spreadsheets have no word boxes
+        return text
+
+    def _read_tables(self, backend_name, table_areas=None, columns=None, page_number=0):
+        frames = super()._read_tables(backend_name, table_areas, columns, page_number)
+        key = table_key(backend_name, table_areas, columns, page_number)
+        self.recording['tables'][key] = [frame_to_json(df) for df in frames]
+        return [df.copy() for df in frames]
+
+    def _read_spreadsheet(self, skip_rows=0):
+        df = super()._read_spreadsheet(skip_rows)
+        self.recording['spreadsheets'][str(skip_rows)] = frame_to_json(df)
+        return df.copy()
+
+
+def record_fixture(sample: str, fixture_dir: str = FIXTURE_DIR) -> dict:
+    """Run the full extraction plus every line item strategy on a sample and save what the parsers returned."""
+    extractor = RecordingExtractor(sample)
+    extractor.extract_purchase_order()
+    for _, strategy in extractor._line_item_strategies():
+        strategy()  # fallbacks skipped by the early exit must be replayable too
+    os.makedirs(fixture_dir, exist_ok=True)
+    with open(fixture_path(sample, fixture_dir), 'w') as f:
+        json.dump(extractor.recording, f, indent=1, default=str)
+    return extractor.recording
+
+
+# --- Replay ---
+class ReplayExtractor(IntelligentExtractor):
+    """IntelligentExtractor that reads a recording instead of the source file.
+
+    Parser calls that were not recorded are listed in self.missing and
+    return nothing, so a test can tell a stale fixture from a regression.
+    """
+
+    def __init__(self, fixture: dict, registry=None, **dependencies):
+        self.fixture = fixture
+        self.word_boxes = fixture['words']
+        self.missing = []
+        super().__init__(fixture['file_path'], registry, **dependencies)
+
+    def _load_pdf_content(self) -> str:
+        return self.fixture['text']
+
+    def _read_tables(self, backend_name, table_areas=None, columns=None, page_number=0):
+        key = table_key(backend_name, table_areas, columns, page_number)
+        if key not in self.fixture['tables']:
+            self.missing.append(key)
+            return []
+        return [frame_from_json(data) for data in self.fixture['tables'][key]]
+
+    def _read_spreadsheet(self, skip_rows=0):
+        data = self.fixture['spreadsheets'].get(str(skip_rows))
+        if data is None:
+            self.missing.append(f'spreadsheet|{skip_rows}')
+            raise ValueError(f"no recorded spreadsheet read with skip_rows={skip_rows}")
+        return frame_from_json(data)
+
+
+if __name__ == "__main__":
+    os.chdir(ROOT_DIR)
+    for sample in SAMPLES:
+        recording = record_fixture(sample)
+        print(f"Recorded {sample}: {len(recording['tables'])} table read(s), "
+              f"{len(recording['spreadsheets'])} spreadsheet read(s) -> {fixture_path(sample)}")
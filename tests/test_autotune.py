@@ -0,0 +1,52 @@
+import sys
+import os
+import shutil
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import pytest
+from autotune import candidate_columns, evaluate_current, load_samples, pick_winner, tune_vendor, write_winner
+from vendor_registry import VendorRegistry
+
+def test_candidate_columns_from_header_words():
+    words = [(72, 317, 90, 327), (236, 317, 281, 327), (400, 317, 414, 327)]
+    assert candidate_columns(words) == [None, '163,340', '234,398']
+    assert candidate_columns(words[:1]) == [None]
+
+def test_pick_winner_prefers_accuracy_then_speed():
+    results = [
+        {'backend': 'slow-exact', 'accuracy': 1.0, 'seconds': 0.40},
+        {'backend': 'fast-exact', 'accuracy': 1.0, 'seconds': 0.02},
+        {'backend': 'fast-wrong', 'accuracy': 0.5, 'seconds': 0.01},
+    ]
+    assert pick_winner(results)['backend'] == 'fast-exact'
+
+def test_write_winner_refuses_regressions(tmp_path):
+    registry_path = tmp_path / 'vendor_config.json'
+    shutil.copy('vendor_config.json', registry_path)
+    registry = VendorRegistry(str(registry_path))
+    configured = registry.get('dandh')
+    winner = {'backend': 'pymupdf', 'area': '0,500,600,100', 'columns': None, 'accuracy': 0.0, 'seconds': 0.01}
+    with pytest.raises(ValueError, match='minimum'):
+        write_winner('dandh', winner, registry)
+    with pytest.raises(ValueError, match='current'):
+        write_winner('dandh', dict(winner, accuracy=0.95), registry, current_accuracy=1.0)
+    assert VendorRegistry(str(registry_path)).get('dandh') == configured
+    write_winner('dandh', winner, registry, current_accuracy=1.0, force=True)
+    assert VendorRegistry(str(registry_path)).get('dandh').backend == 'pymupdf'
+
+@pytest.mark.slow
+def test_tune_dandh_and_write_winner(tmp_path):
+    winner, results = tune_vendor('dandh', workers=2, backends=('camelot-stream', 'pymupdf'))
+    assert winner['accuracy'] == 1.0
+    assert len(results) > 1
+
+    registry_path = tmp_path / 'vendor_config.json'
+    shutil.copy('vendor_config.json', registry_path)
+    registry = VendorRegistry(str(registry_path))
+    write_winner('dandh', winner, registry)
+    spec = VendorRegistry(str(registry_path)).get('dandh')
+    assert spec.table_areas == (winner['area'],)
+    assert spec.backend == winner['backend']
+
+@pytest.mark.slow
+def test_current_dandh_config_is_accurate():
+    assert evaluate_current('dandh', load_samples('dandh')) == 1.0
@@ -0,0 +1,68 @@
+import sys
+import os
+import mailbox
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import pytest
+import po_extractor
+from mail_ingest import MailIngest
+from po_extractor import LineItem, PurchaseOrder
+from po_store import POStore, source_key
+from test_mail_ingest import make_message
+
+def make_po(quote_number, total=200.0):
+    return PurchaseOrder(po_number=quote_number, order_date='10/14/2025', vendor_name='D&H Distributing',
+                         vendor_address='', vendor_phone='',
+                         line_items=[LineItem('JL4-PD1503', 'Jabra headset', 2.0, 100.0, 200.0)],
+                         subtotal=total, total=total)
+
+@pytest.fixture
+def batch(tmp_path, monkeypatch):
+    """Run main() on folders under tmp_path; quotes[name] is the PO each quote of that name extracts to."""
+    quotes = {}
+
+    def extract_file(file_path, data=None):
+        if data is None:
+            with open(file_path, 'rb') as f:
+                data = f.read()
+        return {'file_path': file_path, 'po': quotes[os.path.basename(file_path)](), 'vendor': 'dandh',
+                'table_reads': 0, 'category': None, 'error': None, 'seconds': 0.0, 'cached': False,
+                'source_key': source_key(data)}
+
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'in').mkdir()
+    (tmp_path / 'out').mkdir()
+    monkeypatch.setattr(po_extractor, 'setup_logging', lambda: None)
+    monkeypatch.setattr(po_extractor, 'extract_file', extract_file)
+    for name, value in {'INPUT_DIR': 'in', 'OUTPUT_DIR': 'out', 'FAILED_DIR': 'failed', 'SETTLE_SECONDS': 0,
+                        'WORKER_PROCESSES': 0, 'BATCH_OUTPUT': 'files', 'RESULT_CACHE': None,
+                        'FINGERPRINT_INDEX_PATH': 'fingerprints.json', 'RETRY_STATE_PATH': 'retry.json',
+                        'PO_STORE_PATH': 'store.sqlite', 'PO_NUMBER_LOG': 'po_numbers.log', 'PO_NUMBER_START': 100,
+                        'FINALIZED_DIR': 'finalized', 'JOB_COSTS_PATH': 'job_costs.json', 'MAIL_SOURCE': None,
+                        'MAIL_STATE_PATH': 'mail_state.json', 'CLAIM_FILES': False, 'CLAIMS_DIR': 'claims',
+                        'METRICS_FILE': None, 'METRICS_PORT': None}.items():
+        monkeypatch.setattr(po_extractor, name, value)
+    return quotes
+
+def test_mailed_quotes_are_published_when_files_are_claimed(batch, tmp_path, monkeypatch):
+    monkeypatch.setattr(po_extractor, 'CLAIM_FILES', True)
+    monkeypatch.setattr(po_extractor, 'MAIL_SOURCE', 'Maildir')
+    batch['quote.pdf'] = lambda: make_po('1001')
+    box = mailbox.Maildir(str(tmp_path / 'Maildir'))
+    box.add(make_message('<q1@vendor.example>', [('quote.pdf', b'%PDF quote 1001')]).as_bytes())
+    po_extractor.main()
+    assert os.listdir(tmp_path / 'out') == ['PO 100.pdf']
+    assert MailIngest('Maildir', 'mail_state.json').is_consumed('<q1@vendor.example>')
+
+def test_corrected_re_extraction_of_a_quote_updates_the_store(batch, tmp_path):
+    (tmp_path / 'in' / 'quote.pdf').write_bytes(b'%PDF quote 1001')
+    batch['quote.pdf'] = lambda: make_po('1001', total=200.0)
+    po_extractor.main()
+    # A parser fix reads the real total; the quote is the same, so no second PO is rendered
+    batch['quote.pdf'] = lambda: make_po('1001', total=216.5)
+    po_extractor.main()
+    assert os.listdir(tmp_path / 'out') == ['PO 100.pdf']
+    with POStore('store.sqlite') as store:
+        [rollup] = store.rollups()
+        [stored] = store.find(po_number='1001')
+    assert (rollup['po_count'], rollup['total']) == (1, 216.5)
+    assert stored['po'].total == 216.5 and stored['po'].issued_po_number == '100'
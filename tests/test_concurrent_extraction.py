@@ -0,0 +1,82 @@
+import sys
+import os
+import json
+import dataclasses
+import threading
+from concurrent.futures import ThreadPoolExecutor
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import pytest
+from fixture_recorder import ReplayExtractor, SAMPLES, load_fixture
+from metrics import MetricsRegistry
+from po_extractor import EXTRACTOR_SETTINGS, VENDOR_REGISTRY, IntelligentExtractor
+from vendor_registry import VendorRegistry
+
+THREADS = 16
+
+@pytest.fixture(autouse=True)
+def frequent_thread_switches():
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(interval)
+
+def summary(extractor, po):
+    return (extractor.vendor_type, extractor.line_item_strategy, po)
+
+def registry_without(vendor, tmp_path):
+    data = VENDOR_REGISTRY.raw_config()
+    del data['vendors'][vendor]
+    path = tmp_path / 'vendor_config.json'
+    path.write_text(json.dumps(data))
+    return VendorRegistry(str(path))
+
+def test_two_configurations_hammered_side_by_side(tmp_path):
+    fixtures = [load_fixture(sample) for sample in SAMPLES]
+    configs = {
+        'default': {'registry': VENDOR_REGISTRY, 'settings': EXTRACTOR_SETTINGS, 'metrics': MetricsRegistry()},
+        'no-dandh': {'registry': registry_without('dandh', tmp_path),
+                     'settings': dataclasses.replace(EXTRACTOR_SETTINGS, confidence_threshold=1.1),
+                     'metrics': MetricsRegistry()},
+    }
+
+    def extract(name, fixture):
+        extractor = ReplayExtractor(fixture, configs[name]['registry'], settings=configs[name]['settings'],
+                                    metrics=configs[name]['metrics'])
+        return summary(extractor, extractor.extract_purchase_order())
+
+    expected = {(name, index): extract(name, fixture) for name in configs for index, fixture in enumerate(fixtures)}
+    assert expected[('default', 1)][0] == 'dandh' and expected[('no-dandh', 1)][0] == 'unknown'
+    for config in configs.values():
+        config['metrics'] = MetricsRegistry()
+
+    # Registry hot reloads run alongside the extractions
+    stop = threading.Event()
+    def reload_registry():
+        while not stop.is_set():
+            configs['default']['registry'].load()
+    reloader = threading.Thread(target=reload_registry)
+    reloader.start()
+    tasks = [(name, index) for _ in range(10) for name in configs for index in range(len(fixtures))]
+    try:
+        with ThreadPoolExecutor(max_workers=THREADS) as pool:
+            results = list(pool.map(lambda task: extract(task[0], fixtures[task[1]]), tasks))
+    finally:
+        stop.set()
+        reloader.join()
+
+    assert results == [expected[task] for task in tasks]
+    for config in configs.values():
+        loads = config['metrics'].histogram('po_stage_seconds')
+        assert loads.values[(('stage', 'load'),)]['count'] == len(tasks) / 2
+
+@pytest.mark.slow
+def test_real_files_extracted_from_many_threads():
+    def extract(sample):
+        extractor = IntelligentExtractor(sample, metrics=MetricsRegistry())
+        return summary(extractor, extractor.extract_purchase_order())
+
+    expected = {sample: extract(sample) for sample in SAMPLES}
+    tasks = SAMPLES * 8
+    with ThreadPoolExecutor(max_workers=THREADS) as pool:
+        results = list(pool.map(extract, tasks))
+    assert results == [expected[sample] for sample in tasks]
@@ -0,0 +1,23 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from po_extractor import LineItem, score_line_items
+
+def test_consistent_items_score_full_confidence():
+    items = [LineItem('A1', 'Widget', 25, 392.71, 9817.75)]
+    common_data = {'subtotal': 9817.75, 'tax': 1276.31, 'total': 11094.06}
+    assert score_line_items(items, common_data) == 1.0
+
+def test_row_arithmetic_mismatch_lowers_confidence():
+    items = [
+        LineItem('A1', 'Widget', 2, 100.0, 200.0),
+        LineItem('B2', 'Gadget', 3, 100.0, 250.0),
+    ]
+    assert score_line_items(items, {}) == 0.5
+
+def test_subtotal_mismatch_lowers_confidence():
+    items = [LineItem('A1', 'Widget', 2, 100.0, 200.0)]
+    assert score_line_items(items, {'subtotal': 500.0}) == 0.5
+
+def test_empty_candidate_has_no_confidence():
+    assert score_line_items([], {'subtotal': 10.0}) == 0.0
@@ -1,8 +1,11 @@
 import sys
 import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import pytest
 from po_extractor import IntelligentExtractor
 
+pytestmark = pytest.mark.slow
+
 def test_dandh_extraction():
     sample_file = "PO's/DandH-Quote-11931304-0.Pdf"  # Update path if needed
     extractor = IntelligentExtractor(sample_file)
@@ -0,0 +1,45 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from document_index import DocumentIndex
+from fixture_recorder import SAMPLES, load_fixture, ReplayExtractor
+
+TEXT = "Quote Number:\n  11931304 \nBill To: ACME\n12 Main St\nShip To\nbill to later\nMerchandise Total\n9,817.75\n"
+
+def test_lines_are_split_stripped_and_lowered_once():
+    index = DocumentIndex(TEXT)
+    assert index.lines == TEXT.split('\n')
+    assert index.stripped[1] == '11931304'
+    assert index.lower[2] == 'bill to: acme'
+    assert index.text_lower == TEXT.lower()
+
+def test_lines_with_matches_keywords_case_sensitively():
+    index = DocumentIndex(TEXT)
+    assert index.lines_with('Merchandise Total') == [6]
+    assert index.lines_with('Quote Number:', '9,817.75') == [0, 7]
+    assert index.lines_with('merchandise total') == []
+    assert index.lines_with('Nowhere') == []
+
+def test_keywords_inside_longer_words_are_found():
+    index = DocumentIndex("QuoteDate: 10/14/2025\nSubtotalUSD 9,817.75\nTax Amount\nTotal 19,817.750\n")
+    assert index.lines_with('Date:') == [0]
+    assert index.lines_with('Subtotal') == [1]
+    assert index.lines_with('ax Amou') == [2]
+    assert index.lines_with('9,817.75') == [1, 3]
+    assert index.lines_with('Total 1') == [3]
+
+def test_labels_match_line_prefixes_case_insensitively():
+    index = DocumentIndex(TEXT)
+    assert index.label_lines('Bill To') == [2, 5]
+    assert index.find_label(['Ship To', 'Bill To']) == (2, 'Bill To')
+    assert index.find_label(['Customer', 'End User']) is None
+    assert index.is_label(4, ['Bill To', 'Ship To'])
+    assert not index.is_label(3, ['Bill To'])
+
+def test_extractor_builds_the_index_once():
+    extractor = ReplayExtractor(load_fixture(SAMPLES[1]))
+    index = extractor.index
+    extractor.extract_purchase_order()
+    assert extractor.index is index
+    extractor.text_content = "Ship To\nSomeone"
+    assert extractor.index is not index
@@ -0,0 +1,66 @@
+import sys
+import os
+import multiprocessing
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from file_claims import FileClaims, publish
+
+def make_quotes(directory, count):
+    names = [f"quote_{i:03d}.pdf" for i in range(count)]
+    for name in names:
+        with open(os.path.join(directory, name), 'wb') as f:
+            f.write(b'%PDF-1.4 ' + name.encode())
+    return names
+
+def _claim_all(input_dir, owner, names, results):
+    claims = FileClaims(input_dir, owner=owner, lease_seconds=60)
+    for name in claims.claim_each(names):
+        results.put((owner, name))
+        claims.release(name)
+
+def test_each_file_is_claimed_by_exactly_one_process(tmp_path):
+    names = make_quotes(tmp_path, 40)
+    results = multiprocessing.Queue()
+    processes = [multiprocessing.Process(target=_claim_all, args=(str(tmp_path), f"host{i}", names, results))
+                 for i in range(4)]
+    for process in processes:
+        process.start()
+    claimed = [results.get(timeout=30) for _ in names]
+    for process in processes:
+        process.join(timeout=30)
+    assert sorted(name for _, name in claimed) == names
+    assert results.empty()
+
+def test_held_lease_blocks_others_until_it_expires(tmp_path):
+    make_quotes(tmp_path, 1)
+    host_a = FileClaims(str(tmp_path), owner='a', lease_seconds=60)
+    host_b = FileClaims(str(tmp_path), owner='b', lease_seconds=60)
+    assert host_a.claim('quote_000.pdf', now=1000)
+    assert not host_b.claim('quote_000.pdf', now=1030)
+    assert host_b.claim('quote_000.pdf', now=1061)
+    assert host_b.holds('quote_000.pdf')
+    assert not host_a.holds('quote_000.pdf')
+    assert not host_a.renew('quote_000.pdf')
+
+def test_done_files_are_not_claimed_again_until_they_change(tmp_path):
+    make_quotes(tmp_path, 1)
+    claims = FileClaims(str(tmp_path), owner='a')
+    assert claims.claim('quote_000.pdf')
+    claims.release('quote_000.pdf')
+    assert not claims.claim('quote_000.pdf')
+    with open(tmp_path / 'quote_000.pdf', 'ab') as f:
+        f.write(b' re-sent')
+    assert claims.claim('quote_000.pdf')
+
+def test_released_retry_can_be_claimed_again(tmp_path):
+    make_quotes(tmp_path, 1)
+    claims = FileClaims(str(tmp_path), owner='a')
+    assert claims.claim('quote_000.pdf')
+    claims.release('quote_000.pdf', done=False)
+    assert FileClaims(str(tmp_path), owner='b').claim('quote_000.pdf')
+
+def test_publish_replaces_atomically(tmp_path):
+    target = tmp_path / 'Generated_PO_1.pdf'
+    publish(b'first', str(target), owner='a')
+    publish(b'second', str(target), owner='a')
+    assert target.read_bytes() == b'second'
+    assert os.listdir(tmp_path) == ['Generated_PO_1.pdf']
@@ -0,0 +1,84 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import pytest
+from job_scheduler import CostModel, Job, completion_times, make_job, read_deadline, schedule
+
+NOW = 1_750_000_000.0
+
+def job(name, cost, waited_hours=0.0, deadline=None):
+    return Job(name, '.pdf', 1000, 1, 'unknown', cost, NOW - waited_hours * 3600, deadline)
+
+def names(jobs):
+    return [job.file_path for job in jobs]
+
+def test_predictions_fall_back_from_vendor_to_type_to_defaults(tmp_path):
+    model = CostModel(str(tmp_path / 'costs.json'))
+    assert model.predict('.pdf', 50_000, 4) == pytest.approx(4 * 0.5)
+    assert model.predict('.csv', 1_024_000, 1) == pytest.approx(10 * 0.1)
+    model.observe(Job('a.pdf', '.pdf', 1000, 2, 'dandh', 1.0, NOW), 6.0)
+    assert model.predict('.pdf', 1000, 10, 'dandh') == pytest.approx(30.0)
+    assert model.predict('.pdf', 1000, 10, 'tdsynnex') == pytest.approx(30.0)  # the type's rate
+    model.observe(Job('b.pdf', '.pdf', 1000, 1, 'tdsynnex', 1.0, NOW), 1.0)
+    assert model.predict('.pdf', 1000, 10, 'tdsynnex') == pytest.approx(10.0)
+    assert model.predict('.pdf', 1000, 10, 'dandh') == pytest.approx(30.0)
+
+def test_observed_rates_are_smoothed_and_persisted(tmp_path):
+    path = str(tmp_path / 'costs.json')
+    model = CostModel(path, smoothing=0.5)
+    quote = Job('a.pdf', '.pdf', 1000, 1, 'dandh', 1.0, NOW)
+    model.observe(quote, 2.0)
+    model.observe(quote, 4.0)
+    model.save()
+    reloaded = CostModel(path)
+    assert reloaded.rate('.pdf', 'dandh') == pytest.approx(3.0)
+    assert reloaded.rates['dandh|.pdf']['samples'] == 2
+
+def test_shortest_predicted_job_first():
+    jobs = [job('catalog.pdf', 120), job('small.pdf', 1), job('medium.pdf', 10)]
+    assert names(schedule(jobs, now=NOW)) == ['small.pdf', 'medium.pdf', 'catalog.pdf']
+
+def test_aging_moves_a_long_waiting_job_forward():
+    jobs = [job('catalog.pdf', 120, waited_hours=3), job('small.pdf', 1), job('medium.pdf', 100)]
+    assert names(schedule(jobs, now=NOW)) == ['small.pdf', 'medium.pdf', 'catalog.pdf']
+    assert names(schedule(jobs, aging_per_hour=10, now=NOW)) == ['small.pdf', 'catalog.pdf', 'medium.pdf']
+
+def test_deadline_jobs_jump_the_queue_only_when_they_would_be_late():
+    urgent = job('URGENT catalog.pdf', 60, deadline=NOW)
+    relaxed = job('catalog.pdf', 60, deadline=NOW + 3600)
+    others = [job(f"quote{i}.pdf", 5) for i in range(4)]
+    assert names(schedule(others + [urgent], now=NOW))[0] == 'URGENT catalog.pdf'
+    assert names(schedule(others + [relaxed], now=NOW))[-1] == 'catalog.pdf'
+    soon = job('soon.pdf', 60, deadline=NOW + 30)
+    assert names(schedule(others + [soon, urgent], now=NOW))[:2] == ['URGENT catalog.pdf', 'soon.pdf']
+
+def test_schedule_lowers_mean_completion_time_across_workers():
+    jobs = [job('catalog.pdf', 300), job('b.pdf', 20)] + [job(f"q{i}.pdf", 2) for i in range(10)]
+    for workers in (1, 2, 4):
+        fifo = sum(completion_times(jobs, workers)) / len(jobs)
+        ordered = sum(completion_times(schedule(jobs, workers, now=NOW), workers)) / len(jobs)
+        assert ordered < fifo
+    assert sum(completion_times(schedule(jobs, now=NOW))) < sum(completion_times(jobs)) / 5
+
+def test_deadlines_from_sidecars_and_file_names(tmp_path):
+    quote = tmp_path / 'quote.pdf'
+    quote.write_bytes(b'not really a pdf')
+    assert read_deadline(str(quote), now=NOW) is None
+    assert read_deadline(str(tmp_path / 'RUSH quote.pdf'), now=NOW) == NOW
+    (tmp_path / 'quote.pdf.deadline').write_text('2030-06-15T12:00:00')
+    assert read_deadline(str(quote), now=NOW) > NOW
+    (tmp_path / 'quote.pdf.deadline').write_text('')
+    assert read_deadline(str(quote), now=NOW) == NOW
+    (tmp_path / 'quote.pdf.deadline').write_text('next tuesday')
+    assert read_deadline(str(quote), now=NOW) is None
+
+def test_jobs_for_real_files():
+    from po_extractor import VENDOR_REGISTRY
+    quote = make_job("PO's/DandH-Quote-11931304-0.Pdf", CostModel(None), VENDOR_REGISTRY)
+    assert quote.file_type == '.pdf' and quote.pages >= 1
+    assert quote.vendor == 'dandh'
+    assert quote.cost == pytest.approx(0.5 * quote.pages)
+    assert quote.deadline is None
+
+def test_vanished_files_get_no_job(tmp_path):
+    assert make_job(str(tmp_path / 'moved-by-another-host.pdf'), CostModel(None)) is None
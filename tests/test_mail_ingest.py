@@ -0,0 +1,105 @@
+import sys
+import os
+import mailbox
+from email.message import EmailMessage
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import fitz
+import pytest
+from mail_ingest import Attachment, MailIngest, MailMessage, message_id_of
+
+def make_pdf_bytes(text):
+    with fitz.open() as doc:
+        doc.new_page().insert_text((72, 72), text)
+        return doc.tobytes()
+
+def make_message(message_id, attachments, subject="Quote"):
+    message = EmailMessage()
+    message['From'] = 'sales@vendor.example'
+    message['To'] = 'purchasing@example.com'
+    message['Subject'] = subject
+    if message_id:
+        message['Message-ID'] = message_id
+    message.set_content("Please find our quote attached.")
+    for filename, data in attachments:
+        subtype = 'pdf' if filename.endswith('.pdf') else 'octet-stream'
+        message.add_attachment(data, maintype='application', subtype=subtype, filename=filename)
+    return message
+
+def test_quote_attachments_are_read_into_memory(tmp_path):
+    pdf = make_pdf_bytes("Quote 1001")
+    message = make_message('<q1@vendor.example>', [('quote.pdf', pdf), ('items.csv', b'a,b\n1,2\n'),
+                                                    ('logo.png', b'\x89PNG')])
+    (tmp_path / 'q1.eml').write_bytes(message.as_bytes())
+    mail = MailIngest(str(tmp_path), str(tmp_path / 'state.json'))
+    [received] = list(mail.new_messages())
+    assert received.message_id == '<q1@vendor.example>'
+    assert [attachment.filename for attachment in received.attachments] == ['quote.pdf', 'items.csv']
+    assert received.attachments[0].data == pdf
+    with fitz.open(stream=received.attachments[0].data, filetype='pdf') as doc:
+        assert 'Quote 1001' in doc[0].get_text()
+
+def test_maildir_is_deduped_by_message_id_and_incremental(tmp_path):
+    box = mailbox.Maildir(str(tmp_path / 'Maildir'))
+    first = make_message('<q1@vendor.example>', [('a.pdf', make_pdf_bytes("A"))])
+    box.add(first.as_bytes())
+    box.add(first.as_bytes())  # delivered twice
+    box.add(make_message('<q2@vendor.example>', [('b.pdf', make_pdf_bytes("B"))]).as_bytes())
+    state = str(tmp_path / 'state.json')
+
+    mail = MailIngest(str(tmp_path / 'Maildir'), state)
+    messages = list(mail.new_messages())
+    assert sorted(message.message_id for message in messages) == ['<q1@vendor.example>', '<q2@vendor.example>']
+    mail.mark_consumed(messages[0])
+
+    # A later run (new state object) only sees the unconsumed message and new mail
+    box.add(make_message('<q3@vendor.example>', [('c.pdf', make_pdf_bytes("C"))]).as_bytes())
+    mail = MailIngest(str(tmp_path / 'Maildir'), state)
+    assert mail.is_consumed(messages[0].message_id)
+    remaining = sorted(message.message_id for message in mail.new_messages())
+    assert remaining == sorted({'<q1@vendor.example>', '<q2@vendor.example>', '<q3@vendor.example>'}
+                               - {messages[0].message_id})
+
+def test_mbox_and_messages_without_a_message_id(tmp_path):
+    path = str(tmp_path / 'quotes.mbox')
+    box = mailbox.mbox(path)
+    anonymous = make_message(None, [('quote.csv', b'Item,Qty\nX1,2\n')])
+    box.add(anonymous.as_bytes())
+    box.add(make_message('<q9@vendor.example>', []).as_bytes())
+    box.close()
+    mail = MailIngest(path, str(tmp_path / 'state.json'))
+    messages = list(mail.new_messages())
+    assert messages[0].message_id.startswith('sha256:')
+    assert messages[0].attachments[0].data == b'Item,Qty\nX1,2\n'
+    assert messages[1].attachments == []
+    for message in messages:
+        mail.mark_consumed(message)
+    assert list(MailIngest(path, str(tmp_path / 'state.json')).new_messages()) == []
+
+def test_attachment_names_are_unique_per_message():
+    first = MailMessage('<q1@vendor.example>', 'Quote', [Attachment('Quote.pdf', b'1')])
+    second = MailMessage('<q2@other.example>', 'Quote', [Attachment('Quote.pdf', b'2')])
+    names = {first.attachment_name(first.attachments[0]), second.attachment_name(second.attachments[0])}
+    assert len(names) == 2 and all(name.endswith('_Quote.pdf') for name in names)
+    assert first.attachment_name(first.attachments[0]) == first.attachment_name(Attachment('Quote.pdf', b''))
+
+def test_message_id_is_read_from_the_headers():
+    raw = make_message('<abc@example>', []).as_bytes()
+    assert message_id_of(raw) == '<abc@example>'
+    assert message_id_of(b'Subject: hi\n\nbody') == message_id_of(b'Subject: hi\n\nbody')
+
+@pytest.mark.slow
+@pytest.mark.parametrize('sample', ["PO's/DandH-Quote-11931304-0.Pdf", "PO's/email_quote_excel_cpo_42566579.xlsx"])
+def test_attachments_are_extracted_from_memory(sample, tmp_path, monkeypatch):
+    import po_extractor
+    from po_extractor import extract_file
+    monkeypatch.setattr(po_extractor, 'RESULT_CACHE', None)  # both reads must really parse
+    with open(sample, 'rb') as f:
+        data = f.read()
+    box = mailbox.Maildir(str(tmp_path / 'Maildir'))
+    box.add(make_message('<quote@vendor.example>', [(os.path.basename(sample), data)]).as_bytes())
+    [message] = MailIngest(str(tmp_path / 'Maildir'), str(tmp_path / 'state.json')).new_messages()
+    [attachment] = message.attachments
+    from_mail = extract_file(attachment.filename, attachment.data)
+    from_disk = extract_file(sample)
+    assert from_mail['po'] is not None and from_mail['vendor'] == from_disk['vendor']
+    assert from_mail['po'] == from_disk['po']
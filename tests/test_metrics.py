@@ -0,0 +1,60 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import urllib.request
+from metrics import COUNT_BUCKETS, MetricsRegistry
+from po_extractor import batch_summary_lines
+
+def test_openmetrics_rendering():
+    metrics = MetricsRegistry()
+    metrics.counter('po_files', "Quote files handled")
+    metrics.inc('po_files', vendor='dandh', outcome='success')
+    metrics.inc('po_files', vendor='dandh', outcome='success')
+    metrics.histogram('po_table_reads_per_file', buckets=(0, 1, 2))
+    metrics.observe('po_table_reads_per_file', 1)
+    metrics.observe('po_table_reads_per_file', 5)
+    text = metrics.render()
+    assert '# TYPE po_files counter' in text
+    assert 'po_files_total{outcome="success",vendor="dandh"} 2' in text
+    assert 'po_table_reads_per_file_bucket{le="1"} 1' in text
+    assert 'po_table_reads_per_file_bucket{le="+Inf"} 2' in text
+    assert 'po_table_reads_per_file_sum 6' in text
+    assert text.endswith('# EOF\n')
+
+def test_histogram_quantile_and_counter_totals():
+    metrics = MetricsRegistry()
+    for seconds in (0.004, 0.004, 0.2, 3.0):
+        metrics.observe('po_stage_seconds', seconds, stage='line_items')
+    assert metrics.histogram('po_stage_seconds').quantile(0.5, stage='line_items') == 0.005
+    assert metrics.histogram('po_stage_seconds').quantile(0.95, stage='line_items') == 5.0
+    metrics.inc('po_files', vendor='dandh', outcome='success')
+    metrics.inc('po_files', vendor='iosouth', outcome='retry')
+    assert metrics.counter('po_files').total() == 2
+    assert metrics.counter('po_files').total(outcome='retry') == 1
+
+def test_textfile_endpoint_and_summary(tmp_path):
+    metrics = MetricsRegistry()
+    metrics.histogram('po_table_reads_per_file', buckets=COUNT_BUCKETS)
+    metrics.inc('po_files', vendor='dandh', outcome='success')
+    metrics.inc('po_files', vendor='dandh', outcome='quarantined')
+    metrics.inc('po_strategy_wins', vendor='dandh', strategy='structured')
+    metrics.observe('po_table_reads_per_file', 1)
+    metrics.observe('po_stage_seconds', 0.02, stage='load')
+
+    path = str(tmp_path / 'metrics.prom')
+    metrics.write_textfile(path)
+    with open(path) as f:
+        assert f.read() == metrics.render()
+
+    server = metrics.serve(0)
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{server.server_address[1]}/metrics") as response:
+            assert response.read().decode() == metrics.render()
+    finally:
+        server.shutdown()
+
+    summary = batch_summary_lines(metrics)
+    assert summary[0].startswith("Files handled: 2")
+    assert "  dandh: 50% success (2 files)" in summary
+    assert "Winning strategies: structured: 1" in summary
+    assert "Table reads per file: 1.0" in summary
@@ -0,0 +1,53 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import fitz
+import pytest
+import po_extractor
+from ocr import OCRCache, fill_missing_text, page_needs_ocr
+
+def fake_ocr(png):
+    return f"OCR {len(png) > 0}\n"
+
+def failing_ocr(png):
+    raise AssertionError("cached pages must not be OCRed again")
+
+def make_scan(path, pages=1):
+    """Image-only copy of the D&H sample: every page is a rendered bitmap."""
+    with fitz.open("PO's/DandH-Quote-11931304-0.Pdf") as source, fitz.open() as scan:
+        pixmap = source[0].get_pixmap(dpi=50)
+        for _ in range(pages):
+            page = scan.new_page(width=source[0].rect.width, height=source[0].rect.height)
+            page.insert_image(page.rect, pixmap=pixmap)
+        page = scan.new_page()
+        page.insert_text((72, 72), "Terms and conditions")  # a page that keeps its text layer
+        scan.save(path)
+    return path
+
+def test_only_pages_without_text_need_ocr(tmp_path):
+    path = make_scan(str(tmp_path / 'scan.pdf'))
+    with fitz.open(path) as doc:
+        assert [page_needs_ocr(page) for page in doc] == [True, False]
+
+def test_ocr_text_is_cached_by_page_content(tmp_path):
+    path = make_scan(str(tmp_path / 'scan.pdf'))
+    cache = OCRCache(str(tmp_path / 'cache'))
+    texts, ocr_pages = fill_missing_text(path, ['', 'Terms and conditions\n'], engine=fake_ocr, cache=cache, dpi=50)
+    assert ocr_pages == [0]
+    assert texts == ['OCR True\n', 'Terms and conditions\n']
+
+    again, _ = fill_missing_text(path, ['', 'Terms and conditions\n'], engine=failing_ocr, cache=cache)
+    assert again == texts
+
+@pytest.mark.slow
+def test_scanned_pages_are_ocred_in_worker_pool(tmp_path):
+    path = make_scan(str(tmp_path / 'scan.pdf'), pages=2)
+    texts, ocr_pages = fill_missing_text(path, ['', '', 'Terms and conditions\n'], engine=fake_ocr, workers=2, dpi=50)
+    assert ocr_pages == [0, 1]
+    assert texts == ['OCR True\n', 'OCR True\n', 'Terms and conditions\n']
+
+def test_scan_skips_table_sweep(tmp_path):
+    extractor = po_extractor.IntelligentExtractor(make_scan(str(tmp_path / 'DandH-scan.pdf')),
+                                                  ocr_cache=OCRCache(str(tmp_path / 'cache')))
+    assert extractor.ocr_pages == [0]
+    assert [name for name, _ in extractor._line_item_strategies()] == ['structured']
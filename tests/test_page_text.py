@@ -0,0 +1,32 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import fitz
+from page_text import extract_pages, page_ranges
+
+def make_pdf(path, pages):
+    with fitz.open() as doc:
+        for number in range(pages):
+            page = doc.new_page()
+            page.insert_text((72, 72), f"Page {number + 1} SKU-{number:04d}")
+        doc.save(path)
+    return path
+
+def test_page_ranges_cover_every_page_once():
+    assert page_ranges(10, 3) == [(0, 4), (4, 7), (7, 10)]
+    assert page_ranges(2, 8) == [(0, 1), (1, 2)]
+    assert sum(stop - start for start, stop in page_ranges(101, 8)) == 101
+
+def test_parallel_extraction_matches_serial_in_page_order(tmp_path):
+    path = make_pdf(str(tmp_path / 'catalog.pdf'), 25)
+    serial_texts, serial_words = extract_pages(path, workers=1, words=True)
+    texts, words = extract_pages(path, workers=3, words=True, min_pages=1)
+    assert texts == serial_texts
+    assert words == serial_words
+    assert [text.split()[1] for text in texts] == [str(number) for number in range(1, 26)]
+    assert words[24][-1][4] == 'SKU-0024'
+
+def test_short_documents_and_text_only_reads(tmp_path):
+    path = make_pdf(str(tmp_path / 'quote.pdf'), 2)
+    texts, words = extract_pages(path, workers=4)
+    assert len(texts) == 2 and words is None
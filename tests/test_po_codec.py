@@ -0,0 +1,82 @@
+import sys
+import os
+import pickle
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import numpy as np
+import pytest
+import po_codec
+from po_codec import LineItemBlock, ResultCache, cache_key, decode_purchase_order, encode_purchase_order
+from po_extractor import LineItem, PurchaseOrder, decode_result, score_line_items
+
+def make_po(items=3):
+    line_items = [LineItem(f"SKU-{i:05d}", f"Widget {i} — 10\" rack, café grade" if i % 2 else "", i + 1.0,
+                           19.99 + i, (i + 1.0) * (19.99 + i)) for i in range(items)]
+    return PurchaseOrder("11931304", "06/25/2025", "D&H Distributing", "909 Ridgebrook Rd\nSparks, MD",
+                         "(800) 340-1001", customer_name="Acme Corp.", ship_to_address="1 Main St\nToronto ON",
+                         line_items=line_items, subtotal=sum(item.line_total for item in line_items),
+                         tax=12.5, total=sum(item.line_total for item in line_items) + 12.5, currency="CAD",
+                         issued_po_number="8277")
+
+def test_round_trip_keeps_every_field():
+    po = make_po()
+    decoded = decode_purchase_order(encode_purchase_order(po))
+    assert decoded == po
+    assert isinstance(decoded.line_items, LineItemBlock)
+    assert list(decoded.line_items) == po.line_items
+    assert decoded.line_items[-1] == po.line_items[-1]
+    assert decoded.line_items[1:] == po.line_items[1:]
+    assert decode_purchase_order(encode_purchase_order(make_po(0))) == make_po(0)
+
+def test_line_items_decode_by_column_without_row_objects(monkeypatch):
+    po = make_po(1000)
+    built = []
+    monkeypatch.setattr(po_codec, '_models', lambda: built.append(1) or (LineItem, PurchaseOrder))
+    block = decode_purchase_order(encode_purchase_order(po)).line_items
+    assert built == [1]  # the PurchaseOrder only
+    assert len(block) == 1000
+    assert abs(block.line_totals.sum() - po.subtotal) < 1e-6
+    assert np.array_equal(block.quantities, [item.quantity for item in po.line_items])
+    assert block.item_numbers[999] == "SKU-00999"
+    assert score_line_items(list(block), {'subtotal': po.subtotal}) == 1.0
+
+def test_encoding_is_smaller_than_pickle_and_reencodes_identically():
+    po = make_po(1000)
+    data = encode_purchase_order(po)
+    assert len(data) < len(pickle.dumps(po)) * 0.75
+    assert encode_purchase_order(decode_purchase_order(data)) == data
+
+def test_unknown_versions_and_damaged_data_are_rejected():
+    data = encode_purchase_order(make_po())
+    with pytest.raises(ValueError, match="version 2"):
+        decode_purchase_order(data[:2] + bytes([2]) + data[3:])
+    with pytest.raises(ValueError):
+        decode_purchase_order(b'%PDF-1.7')
+    with pytest.raises(ValueError):
+        decode_purchase_order(data[:-20])
+
+def test_worker_results_are_decoded_in_the_parent():
+    po = make_po()
+    result = decode_result({'file_path': 'q.pdf', 'po': encode_purchase_order(po), 'vendor': 'dandh'})
+    assert result['po'] == po
+    assert decode_result({'file_path': 'q.pdf', 'po': None})['po'] is None
+
+def test_result_cache(tmp_path):
+    cache = ResultCache(str(tmp_path / 'cache'))
+    key = cache_key(b'%PDF quote bytes', b'registry v1')
+    assert key != cache_key(b'%PDF quote bytes', b'registry v2')
+    assert cache.get(key) is None
+    cache.put(key, 'dandh', make_po())
+    vendor, po = cache.get(key)
+    assert vendor == 'dandh' and po == make_po()
+    (tmp_path / 'cache' / f"{key}.po").write_bytes(b'\x05\x00\x00\x00dandhPO\x09')
+    assert cache.get(key) is None  # written by a newer build: extract again
+
+def test_cache_keys_cover_every_local_module_the_extractor_uses():
+    import po_extractor
+    # Modules that only run around extraction (scheduling, storage, metrics) do not change its results
+    around_extraction = {'retry_scheduler', 'metrics', 'worker_pool', 'quote_fingerprint', 'file_claims', 'po_store',
+                         'price_history', 'po_numbers', 'mail_ingest', 'job_scheduler'}
+    root = os.path.dirname(os.path.abspath(po_extractor.__file__))
+    imported = {getattr(value, '__module__', None) for value in vars(po_extractor).values()}
+    local = {name for name in imported if name and os.path.exists(os.path.join(root, f"{name}.py"))}
+    assert local - around_extraction <= {name[:-3] for name in po_extractor.EXTRACTION_SOURCES}
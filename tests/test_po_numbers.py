@@ -0,0 +1,68 @@
+import sys
+import os
+import multiprocessing
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from po_numbers import PONumberAllocator
+
+def _allocate_many(log_path, count, results):
+    allocator = PONumberAllocator(log_path, start=8277, block_size=7)
+    numbers = [allocator.allocate(ref=f"{os.getpid()}-{i}") for i in range(count)]
+    allocator.close()
+    results.put(numbers)
+
+def test_concurrent_processes_never_share_a_number(tmp_path):
+    log_path = str(tmp_path / 'po_numbers.log')
+    results = multiprocessing.Queue()
+    processes = [multiprocessing.Process(target=_allocate_many, args=(log_path, 30, results)) for _ in range(4)]
+    for process in processes:
+        process.start()
+    numbers = [number for _ in processes for number in results.get(timeout=30)]
+    for process in processes:
+        process.join(timeout=30)
+    assert len(numbers) == len(set(numbers)) == 120
+    assert min(numbers) == 8277
+
+    # Released block tails are the only gaps, and they are issued first next time
+    state = PONumberAllocator(log_path, start=8277).state()
+    assert state['issued'] == 120
+    assert sorted(set(range(8277, state['highest'] + 1)) - set(numbers)) == state['gaps']
+    if state['gaps']:
+        assert PONumberAllocator(log_path, start=8277).allocate() == state['gaps'][0]
+
+def test_starts_after_the_finalized_documents(tmp_path):
+    finalized = tmp_path / 'finalized'
+    finalized.mkdir()
+    for number in (8272, 8273, 8276):
+        (finalized / f"PO {number}.pdf").write_bytes(b'%PDF')
+    allocator = PONumberAllocator(str(tmp_path / 'log'), start=8270, block_size=3, finalized_dir=str(finalized))
+    assert [allocator.allocate() for _ in range(4)] == [8277, 8278, 8279, 8280]
+
+def test_cancelled_and_crashed_numbers_are_reissued(tmp_path):
+    log_path = str(tmp_path / 'log')
+    first = PONumberAllocator(log_path, start=100, block_size=5, owner='host-a-1')
+    assert first.allocate() == 100
+    assert first.allocate() == 101
+    first.cancel(101)
+    # host-a-1 never closes; its block is reclaimed once older than the TTL
+    second = PONumberAllocator(log_path, start=100, block_size=5, block_ttl=0, owner='host-b-2')
+    assert [second.allocate() for _ in range(4)] == [101, 102, 103, 104]
+    assert second.allocate() == 105
+
+def test_block_reclaimed_while_its_owner_is_still_alive(tmp_path):
+    log_path = str(tmp_path / 'log')
+    first = PONumberAllocator(log_path, start=100, block_size=5, owner='host-a-1')
+    assert first.allocate() == 100
+    # host-b-2 takes over the rest of host-a-1's block (older than its TTL) while host-a-1 keeps issuing
+    second = PONumberAllocator(log_path, start=100, block_size=5, block_ttl=0, owner='host-b-2')
+    assert [second.allocate() for _ in range(4)] == [101, 102, 103, 104]
+    assert first.allocate() == 106  # 105 is in host-b-2's block
+    assert second.allocate() == 105
+
+def test_torn_records_are_skipped(tmp_path):
+    log_path = str(tmp_path / 'log')
+    allocator = PONumberAllocator(log_path, start=1, block_size=2)
+    assert allocator.allocate() == 1
+    with open(log_path, 'ab') as f:
+        f.write(b'{"op":"issue","own')  # crash mid-write
+    assert PONumberAllocator(log_path, start=1, block_size=2).allocate() == 3
+    assert allocator.allocate() == 2
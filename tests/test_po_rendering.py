@@ -0,0 +1,45 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import io
+import zipfile
+import fitz
+from po_extractor import (LineItem, PurchaseOrder, generate_po_pdf, render_po_pdf,
+                          write_combined_po_pdf, write_po_zip)
+
+def make_po(po_number):
+    return PurchaseOrder(po_number=po_number, order_date='06/25/2025', vendor_name='D&H Distributing',
+                         vendor_address='Harrisburg, PA', vendor_phone='1-800-340-1001',
+                         line_items=[LineItem('SKU-1', 'Laptop', 2, 500.0, 1000.0)],
+                         subtotal=1000.0, total=1000.0)
+
+def test_render_returns_bytes_and_fills_buffer(tmp_path):
+    buffer = io.BytesIO()
+    data = render_po_pdf(make_po('111'), buffer)
+    assert data.startswith(b'%PDF') and buffer.getvalue() == data
+
+    generate_po_pdf(make_po('111'), str(tmp_path))
+    with fitz.open(str(tmp_path / 'Generated_PO_111.pdf')) as doc:
+        assert 'PO Number: 111' in doc[0].get_text()
+
+def test_zip_archive_holds_one_pdf_per_po(tmp_path):
+    path = str(tmp_path / 'batch.zip')
+    write_po_zip([make_po('111'), make_po('222'), make_po('111')], path)
+    with zipfile.ZipFile(path) as archive:
+        assert archive.namelist() == ['Generated_PO_111.pdf', 'Generated_PO_222.pdf', 'Generated_PO_111_2.pdf']
+        assert archive.read('Generated_PO_222.pdf').startswith(b'%PDF')
+
+def test_combined_pdf_concatenates_pos():
+    buffer = io.BytesIO()
+    write_combined_po_pdf([make_po('111'), make_po('222')], buffer)
+    with fitz.open('pdf', buffer.getvalue()) as doc:
+        assert len(doc) == 2
+        assert 'PO Number: 222' in doc[1].get_text()
+
+def test_issued_po_number_names_and_heads_the_pdf(tmp_path):
+    po = make_po('111')
+    po.issued_po_number = '8277'
+    generate_po_pdf(po, str(tmp_path))
+    with fitz.open(str(tmp_path / 'PO 8277.pdf')) as doc:
+        text = doc[0].get_text()
+    assert 'PO Number: 8277' in text and 'Quote Number: 111' in text
@@ -0,0 +1,148 @@
+import sys
+import os
+import sqlite3
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from po_extractor import LineItem, PurchaseOrder
+from po_store import POStore, normalise_date, source_key
+
+def make_po(po_number, order_date='10/14/2025', items=None, vendor_name='D&H Distributing'):
+    items = items if items is not None else [LineItem('JL4-PD1503', 'Jabra headset', 2.0, 100.0, 200.0)]
+    return PurchaseOrder(po_number=po_number, order_date=order_date, vendor_name=vendor_name, vendor_address='',
+                         vendor_phone='', line_items=items, subtotal=200.0, total=200.0)
+
+def test_round_trips_purchase_orders(tmp_path):
+    po = make_po('11931304', items=[LineItem('JL4-PD1503', 'Jabra headset', 2.0, 100.0, 200.0),
+                                    LineItem('X-1', 'Cable', 1.0, 5.5, 5.5)])
+    with POStore(str(tmp_path / 'store.sqlite')) as store:
+        store.add(po, 'DandH-Quote-11931304-0.Pdf', 'dandh')
+    with POStore(str(tmp_path / 'store.sqlite')) as store:
+        [result] = store.find(po_number='11931304')
+    assert result['po'] == po
+    assert result['vendor'] == 'dandh'
+    assert result['order_day'] == '2025-10-14'
+
+def test_queries_by_item_vendor_and_date():
+    store = POStore(':memory:')
+    store.add(make_po('1', '09/30/2025'), 'a.pdf', 'dandh')
+    store.add(make_po('2', '10/02/2025', items=[LineItem('ABC', 'Other', 1, 1, 1)]), 'b.pdf', 'dandh')
+    store.add(make_po('3', '10/03/2025', vendor_name='I/O South'), 'c.pdf', 'iosouth')
+    assert [r['po'].po_number for r in store.find_by_item('jl4-pd1503')] == ['3', '1']
+    assert [r['po'].po_number for r in store.find(vendor='dandh', since='2025-10-01', until='2025-10-31')] == ['2']
+    assert [r['po'].po_number for r in store.find(limit=1)] == ['3']
+
+def test_re_extraction_replaces_the_stored_po():
+    store = POStore(':memory:', batch_size=1)
+    store.add(make_po('1'), 'a.pdf', 'dandh')
+    store.add(make_po('1', items=[]), 'a.pdf', 'dandh')
+    assert store.count() == 1
+    assert store.find(po_number='1')[0]['po'].line_items == []
+    assert store.conn.execute('SELECT COUNT(*) FROM line_items').fetchone()[0] == 0
+
+def test_same_file_name_different_quotes_are_kept_apart():
+    store = POStore(':memory:', batch_size=1)
+    store.add(make_priced_po('1', '10/01/2025', 100.0), 'Quote.pdf', 'dandh', source_key(b'first quote'))
+    store.add(make_priced_po('2', '10/02/2025', 50.0), 'Quote.pdf', 'dandh', source_key(b'second quote'))
+    assert store.count() == 2
+    [october] = store.rollups()
+    assert (october['po_count'], october['total']) == (2, 150.0)
+    store.add(make_priced_po('2', '10/02/2025', 60.0), 'Quote.pdf', 'dandh', source_key(b'second quote'))
+    assert store.count() == 2
+    assert store.rollups()[0]['total'] == 160.0
+
+def test_stores_keyed_by_file_name_are_migrated(tmp_path):
+    path = str(tmp_path / 'store.sqlite')
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE purchase_orders (id INTEGER PRIMARY KEY, source_file TEXT NOT NULL UNIQUE, vendor TEXT,
+                                      order_day TEXT, stored_at REAL NOT NULL, po_number TEXT, order_date TEXT,
+                                      vendor_name TEXT, total REAL);
+        CREATE TABLE line_items (po_id INTEGER NOT NULL REFERENCES purchase_orders(id) ON DELETE CASCADE,
+                                 line_no INTEGER NOT NULL, item_number TEXT, description TEXT, quantity REAL,
+                                 unit_price REAL, line_total REAL, item_key TEXT, PRIMARY KEY (po_id, line_no));
+        INSERT INTO purchase_orders VALUES (1, 'Quote.pdf', 'dandh', '2025-10-01', 0, '1', '10/01/2025', 'D&H', 200);
+        INSERT INTO line_items VALUES (1, 1, 'JL4-PD1503', 'Jabra headset', 2, 100, 200, 'JL4-PD1503');
+    """)
+    conn.close()
+    with POStore(path) as store:
+        store.add(make_po('2'), 'Quote.pdf', 'dandh', source_key(b'new quote'))
+        assert [r['po'].po_number for r in store.find_by_item('JL4-PD1503')] == ['2', '1']
+        store.add(make_po('1', items=[]), 'Quote.pdf', 'dandh')  # the old row's key is its file name
+        assert store.count() == 2
+        assert store.conn.execute('SELECT COUNT(*) FROM line_items').fetchone()[0] == 1
+
+def test_writes_are_batched_until_flush():
+    store = POStore(':memory:', batch_size=100)
+    for i in range(3):
+        store.add(make_po(str(i)), f"{i}.pdf")
+    assert store.conn.execute('SELECT COUNT(*) FROM purchase_orders').fetchone()[0] == 0
+    assert store.flush() == 3
+
+def test_lookups_use_indexes():
+    store = POStore(':memory:')
+    plans = {
+        'item': "SELECT * FROM purchase_orders WHERE id IN (SELECT po_id FROM line_items WHERE item_key = 'X')",
+        'vendor': "SELECT * FROM purchase_orders WHERE vendor = 'dandh' AND order_day >= '2025-10-01'",
+        'po_number': "SELECT * FROM purchase_orders WHERE po_number = '1'",
+    }
+    for name, sql in plans.items():
+        plan = ' '.join(row[-1] for row in store.conn.execute('EXPLAIN QUERY PLAN ' + sql))
+        assert 'USING INDEX' in plan or 'USING COVERING INDEX' in plan, (name, plan)
+
+def test_normalise_date():
+    assert normalise_date('10/14/2025') == '2025-10-14'
+    assert normalise_date('10-14-2025') == '2025-10-14'
+    assert normalise_date('Unknown') is None
+
+def make_priced_po(po_number, order_date, total, currency='USD', tax=0.0):
+    po = make_po(po_number, order_date)
+    po.subtotal, po.tax, po.total, po.currency = total - tax, tax, total, currency
+    return po
+
+def test_spend_rollups_by_vendor_month_and_currency():
+    store = POStore(':memory:')
+    store.add(make_priced_po('1', '10/01/2025', 100.10), 'a.pdf', 'dandh')
+    store.add(make_priced_po('2', '10/20/2025', 200.20, tax=20.0), 'b.pdf', 'dandh')
+    store.add(make_priced_po('3', '10/21/2025', 50.0, 'CAD'), 'c.pdf', 'dandh')
+    store.add(make_priced_po('4', '11/02/2025', 10.0), 'd.pdf', 'iosouth')
+    store.add(make_priced_po('5', 'Unknown', 1.0), 'e.pdf')
+    rollups = {(r['vendor'], r['period'], r['currency']): r for r in store.rollups()}
+    assert set(rollups) == {('dandh', '2025-10', 'USD'), ('dandh', '2025-10', 'CAD'), ('iosouth', '2025-11', 'USD'),
+                            ('unknown', 'undated', 'USD')}
+    october = rollups[('dandh', '2025-10', 'USD')]
+    assert (october['po_count'], october['subtotal'], october['tax'], october['total']) == (2, 280.30, 20.0, 300.30)
+    assert [r['vendor'] for r in store.rollups(since='2025-11', until='2025-11-30')] == ['iosouth']
+    assert [r['total'] for r in store.rollups(vendor='dandh', currency='CAD')] == [50.0]
+
+def test_re_extraction_corrects_the_rollups():
+    store = POStore(':memory:', batch_size=1)
+    store.add(make_priced_po('1', '10/01/2025', 0.1), 'a.pdf', 'dandh')
+    store.add(make_priced_po('2', '10/02/2025', 0.2), 'b.pdf', 'dandh')
+    for _ in range(10):
+        store.add(make_priced_po('1', '10/01/2025', 0.1), 'a.pdf', 'dandh')
+    [october] = store.rollups()
+    assert (october['po_count'], october['total']) == (2, 0.3)
+    # A corrected date and currency move the PO to another rollup; emptied rollups go away
+    store.add(make_priced_po('1', '11/01/2025', 0.1, 'CAD'), 'a.pdf', 'dandh')
+    store.add(make_priced_po('2', '10/02/2025', 0.2), 'b.pdf', 'iosouth')
+    assert [(r['vendor'], r['period'], r['currency'], r['po_count'], r['total']) for r in store.rollups()] == [
+        ('iosouth', '2025-10', 'USD', 1, 0.2), ('dandh', '2025-11', 'CAD', 1, 0.1)]
+
+def test_rollups_match_a_rebuild_and_are_backfilled_for_old_stores(tmp_path):
+    path = str(tmp_path / 'store.sqlite')
+    with POStore(path) as store:
+        for i in range(30):
+            store.add(make_priced_po(str(i), f"{i % 3 + 1:02d}/15/2025", 10.0 + i / 100, 'CAD' if i % 4 else 'USD'),
+                      f"{i % 20}.pdf", 'dandh' if i % 2 else 'iosouth')
+        maintained = store.rollups()
+        store.rebuild_rollups()
+        assert store.rollups() == maintained
+        store.conn.execute('DROP TABLE spend_rollups')
+    with POStore(path) as store:
+        assert store.rollups() == maintained
+        assert sum(r['po_count'] for r in maintained) == store.count() == 20
+
+def test_rollup_queries_use_the_index():
+    store = POStore(':memory:')
+    plan = ' '.join(row[-1] for row in store.conn.execute(
+        "EXPLAIN QUERY PLAN SELECT * FROM spend_rollups WHERE period >= '2025-10'"))
+    assert 'USING INDEX' in plan
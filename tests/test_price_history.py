@@ -0,0 +1,74 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from po_extractor import LineItem, PurchaseOrder
+from po_store import POStore
+from price_history import PriceHistory, PRICE_CHANGE, CHEAPER_VENDOR
+
+def make_po(po_number, order_date, *prices):
+    items = [LineItem(item_number, 'Item', 1.0, price, price) for item_number, price in prices]
+    return PurchaseOrder(po_number=po_number, order_date=order_date, vendor_name='', vendor_address='',
+                         vendor_phone='', line_items=items)
+
+def test_flags_price_changes_per_vendor():
+    prices = PriceHistory(POStore(':memory:').conn)
+    assert prices.record(make_po('1', '10/01/2025', ('JL4-PD1503', 100.0)), 'a.pdf', 'dandh') == []
+    assert prices.record(make_po('2', '10/02/2025', ('JL4-PD1503', 101.0)), 'b.pdf', 'dandh') == []
+    [alert] = prices.record(make_po('3', '10/03/2025', ('jl4-pd1503', 110.0)), 'c.pdf', 'dandh')
+    assert alert['kind'] == PRICE_CHANGE
+    assert alert['previous_price'] == 101.0
+    assert round(alert['change'], 4) == round(9 / 101, 4)
+
+def test_flags_a_cheaper_vendor():
+    prices = PriceHistory(POStore(':memory:').conn)
+    prices.record(make_po('1', '10/01/2025', ('SKU1', 90.0), ('SKU2', 10.0)), 'a.pdf', 'iosouth')
+    alerts = prices.record(make_po('2', '10/02/2025', ('SKU1', 100.0), ('SKU2', 10.0)), 'b.pdf', 'dandh')
+    assert [(a['kind'], a['item_number'], a['previous_vendor']) for a in alerts] == [(CHEAPER_VENDOR, 'SKU1', 'iosouth')]
+
+def test_history_is_time_ordered_and_re_extraction_replaces_entries():
+    prices = PriceHistory(POStore(':memory:').conn)
+    prices.record(make_po('2', '10/05/2025', ('SKU1', 12.0)), 'b.pdf', 'dandh')
+    prices.record(make_po('1', '10/01/2025', ('SKU1', 10.0)), 'a.pdf', 'dandh')
+    prices.record(make_po('1', '10/01/2025', ('SKU1', 11.0)), 'a.pdf', 'dandh')
+    assert [(h['day'], h['unit_price']) for h in prices.history('SKU1')] == [('2025-10-01', 11.0), ('2025-10-05', 12.0)]
+    latest = prices.conn.execute("SELECT unit_price FROM latest_prices WHERE item_key = 'SKU1'").fetchone()[0]
+    assert latest == 12.0
+
+def test_re_extraction_corrects_the_latest_price():
+    prices = PriceHistory(POStore(':memory:').conn)
+    prices.record(make_po('1', '10/05/2025', ('SKU1', 5.0)), 'a.pdf', 'iosouth')
+    prices.record(make_po('2', '10/03/2025', ('SKU1', 10.0)), 'b.pdf', 'iosouth')
+    assert prices.record(make_po('3', '10/06/2025', ('SKU1', 10.0)), 'c.pdf', 'dandh')[0]['previous_price'] == 5.0
+    # a.pdf's date and price were misread: its corrected, earlier entry is not the latest
+    prices.record(make_po('1', '09/01/2025', ('SKU1', 10.5)), 'a.pdf', 'iosouth')
+    assert prices.record(make_po('3', '10/06/2025', ('SKU1', 10.0)), 'c.pdf', 'dandh') == []
+    # b.pdf no longer quotes SKU1, which leaves a.pdf's price as I/O South's latest
+    prices.record(make_po('2', '10/03/2025', ('SKU2', 1.0)), 'b.pdf', 'iosouth')
+    latest = prices.conn.execute("SELECT unit_price FROM latest_prices WHERE item_key = 'SKU1' AND vendor = 'iosouth'")
+    assert latest.fetchone()[0] == 10.5
+    prices.record(make_po('1', '09/01/2025'), 'a.pdf', 'iosouth')
+    vendors = prices.conn.execute("SELECT vendor FROM latest_prices WHERE item_key = 'SKU1'")
+    assert [row[0] for row in vendors] == ['dandh']
+
+def test_same_file_name_different_quotes_are_kept_apart():
+    prices = PriceHistory(POStore(':memory:').conn)
+    prices.record(make_po('1', '10/01/2025', ('SKU1', 10.0)), 'Quote.pdf', 'dandh', 'sha256:a')
+    prices.record(make_po('2', '10/02/2025', ('SKU2', 20.0)), 'Quote.pdf', 'dandh', 'sha256:b')
+    assert [h['unit_price'] for h in prices.history('SKU1')] == [10.0]
+    assert [h['unit_price'] for h in prices.history('SKU2')] == [20.0]
+
+def test_lookups_are_index_seeks():
+    prices = PriceHistory(POStore(':memory:').conn)
+    for sql in ("SELECT unit_price FROM price_history WHERE item_key = 'X' AND vendor = 'v' AND day <= '2025' "
+                "ORDER BY day DESC, id DESC LIMIT 1",
+                "SELECT vendor FROM latest_prices WHERE item_key = 'X' AND vendor != 'v' AND unit_price < 1"):
+        plan = ' '.join(row[-1] for row in prices.conn.execute('EXPLAIN QUERY PLAN ' + sql))
+        assert 'INDEX' in plan and 'SCAN' not in plan, plan
+
+def test_rebuild_from_store():
+    store = POStore(':memory:')
+    store.add(make_po('1', '10/01/2025', ('SKU1', 10.0)), 'a.pdf', 'dandh')
+    store.flush()
+    prices = PriceHistory(store.conn)
+    prices.rebuild()
+    assert [h['unit_price'] for h in prices.history('SKU1')] == [10.0]
@@ -0,0 +1,42 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from dataclasses import replace
+from po_extractor import LineItem, PurchaseOrder
+from quote_fingerprint import FingerprintIndex, canonical_fingerprint, near_duplicate_signature
+
+def make_po(po_number='42566579', items=None, total=2435.04):
+    if items is None:
+        items = [
+            LineItem('ABC-123', 'Server', 2.0, 1000.00, 2000.00),
+            LineItem('XYZ-9', 'Cable', 4.0, 50.00, 200.00),
+        ]
+    return PurchaseOrder(po_number=po_number, order_date='10/14/2025', vendor_name='TD Synnex Corporation',
+                         vendor_address='', vendor_phone='', line_items=items, total=total)
+
+def test_canonical_fingerprint_ignores_order_and_descriptions():
+    po = make_po()
+    resent = make_po(items=[LineItem('xyz9', 'USB-C cable, 2m', 4, 50, 200),
+                            LineItem('ABC-123', 'HPE server', 2, 1000, 2000)])
+    assert canonical_fingerprint(po) == canonical_fingerprint(resent)
+    assert canonical_fingerprint(po) != canonical_fingerprint(make_po(po_number='42566580'))
+
+def test_near_duplicate_survives_missing_quote_number():
+    po = make_po()
+    other_format = replace(make_po(po_number='CPO-42566579-A'), total=2435.10)
+    assert canonical_fingerprint(po) != canonical_fingerprint(other_format)
+    assert near_duplicate_signature(po) == near_duplicate_signature(other_format)
+    assert near_duplicate_signature(make_po(items=[])) is None
+
+def test_index_reports_duplicates_across_batches(tmp_path):
+    path = str(tmp_path / 'fingerprints.json')
+    index = FingerprintIndex(path)
+    assert index.find_duplicate(make_po()) is None
+    index.add(make_po(), 'email_quote_excel_cpo_42566579.xlsx')
+
+    next_batch = FingerprintIndex(path)
+    assert len(next_batch) == 1
+    exact = next_batch.find_duplicate(make_po())
+    assert exact['kind'] == 'exact' and exact['file'] == 'email_quote_excel_cpo_42566579.xlsx'
+    assert next_batch.find_duplicate(make_po(po_number='Q42566579'))['kind'] == 'near'
+    assert next_batch.find_duplicate(make_po(total=9999.0, items=[LineItem('NEW-1', 'Switch', 1, 10, 10)])) is None
@@ -0,0 +1,44 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import pytest
+from fixture_recorder import ReplayExtractor, SAMPLES, load_fixture, record_fixture
+
+# Same expectations as the test_*_extractor.py tests, which parse the real files
+EXPECTED = {
+    "PO's/111651.pdf": ('iosouth', '111651', '7/16/2025', 2600.00, 10),
+    "PO's/DandH-Quote-11931304-0.Pdf": ('dandh', '11931304', '06/25/2025', 11094.06, 1),
+    "PO's/email_quote_excel_cpo_42566579.xlsx": ('tdsynnex', '42566579', '10/14/2025', 2435.04, 1),
+}
+
+@pytest.mark.parametrize('sample', SAMPLES)
+def test_replayed_extraction(sample):
+    vendor, po_number, order_date, total, item_count = EXPECTED[sample]
+    extractor = ReplayExtractor(load_fixture(sample))
+    po = extractor.extract_purchase_order()
+    assert extractor.vendor_type == vendor
+    assert po.po_number == po_number
+    assert po.order_date == order_date
+    assert abs(po.total - total) < 0.01
+    assert len(po.line_items) == item_count
+    assert extractor.missing == []
+
+@pytest.mark.parametrize('sample', SAMPLES)
+def test_every_strategy_is_replayable(sample):
+    extractor = ReplayExtractor(load_fixture(sample))
+    for _, strategy in extractor._line_item_strategies():
+        strategy()
+    assert extractor.missing == []
+
+def test_word_boxes_recorded():
+    extractor = ReplayExtractor(load_fixture("PO's/111651.pdf"))
+    words = {word[4] for word in extractor.word_boxes[0]}
+    assert {'Item', 'Description', 'Qty', 'Cost', 'Total'} <= words
+
+@pytest.mark.slow
+@pytest.mark.parametrize('sample', SAMPLES)
+def test_fixture_matches_live_parsers(sample, tmp_path):
+    """The stored recording still matches what the real parsers return."""
+    live = ReplayExtractor(record_fixture(sample, str(tmp_path))).extract_purchase_order()
+    replayed = ReplayExtractor(load_fixture(sample)).extract_purchase_order()
+    assert live == replayed
@@ -0,0 +1,53 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import json
+from types import SimpleNamespace
+from retry_scheduler import (PARSE, QUARANTINE, RETRY, TRANSIENT, UNSUPPORTED_VENDOR, RetryScheduler,
+                             classify_failure, file_is_settled, handle_failure, requeue_quarantined)
+
+def test_classify_failure():
+    assert classify_failure(PermissionError("file locked")) == TRANSIENT
+    assert classify_failure(RuntimeError("Ghostscript crashed")) == TRANSIENT
+    assert classify_failure(ValueError("bad row")) == PARSE
+    assert classify_failure(extractor=SimpleNamespace(vendor_type='unknown', transient_errors=[])) == UNSUPPORTED_VENDOR
+    assert classify_failure(extractor=SimpleNamespace(vendor_type='dandh', transient_errors=['camelot: gs'])) == TRANSIENT
+    assert classify_failure(extractor=SimpleNamespace(vendor_type='dandh', transient_errors=[])) == PARSE
+
+def test_backoff_doubles_up_to_cap_then_quarantines(tmp_path):
+    path = str(tmp_path / 'retry.json')
+    scheduler = RetryScheduler(path, base_delay=10, max_delay=30, max_attempts=4)
+    assert [scheduler.delay(n) for n in (1, 2, 3, 4)] == [10, 20, 30, 30]
+    assert scheduler.record_failure('q.pdf', TRANSIENT, 'locked', now=1000) == RETRY
+    assert not scheduler.is_due('q.pdf', now=1005) and scheduler.is_due('q.pdf', now=1010)
+
+    reloaded = RetryScheduler(path, base_delay=10, max_delay=30, max_attempts=4)
+    assert reloaded.entry('q.pdf')['attempts'] == 1
+    assert reloaded.record_failure('q.pdf', TRANSIENT, 'locked', now=1010) == RETRY
+    assert reloaded.entry('q.pdf')['next_attempt'] == 1030
+    assert reloaded.record_failure('q.pdf', TRANSIENT, 'locked') == RETRY
+    assert reloaded.record_failure('q.pdf', TRANSIENT, 'locked') == QUARANTINE
+    assert reloaded.entry('q.pdf') is None
+    assert scheduler.record_failure('other.pdf', PARSE, 'no items') == QUARANTINE
+
+def test_quarantine_writes_reason_and_requeue_restores(tmp_path):
+    input_dir, quarantine_dir = tmp_path / 'in', tmp_path / 'failed'
+    input_dir.mkdir()
+    quote = input_dir / 'quote.pdf'
+    quote.write_bytes(b'%PDF')
+    scheduler = RetryScheduler(str(tmp_path / 'retry.json'))
+    assert handle_failure(scheduler, str(quote), str(quarantine_dir), UNSUPPORTED_VENDOR, 'vendor unknown', 'unknown') == QUARANTINE
+    reason = json.loads((quarantine_dir / 'quote.pdf.reason.json').read_text())
+    assert reason['category'] == UNSUPPORTED_VENDOR and reason['attempts'] == 1
+    assert not quote.exists()
+
+    assert requeue_quarantined(str(quarantine_dir), str(input_dir), category=PARSE) == []
+    assert requeue_quarantined(str(quarantine_dir), str(input_dir), category=UNSUPPORTED_VENDOR) == ['quote.pdf']
+    assert quote.exists() and os.listdir(quarantine_dir) == []
+
+def test_recently_modified_file_is_not_settled(tmp_path):
+    quote = tmp_path / 'quote.pdf'
+    quote.write_bytes(b'%PDF')
+    mtime = os.stat(quote).st_mtime
+    assert not file_is_settled(str(quote), 10, now=mtime + 1)
+    assert file_is_settled(str(quote), 10, now=mtime + 11)
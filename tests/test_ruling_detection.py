@@ -0,0 +1,28 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import fitz
+from po_extractor import page_has_ruled_table
+
+def make_page(ruled):
+    doc = fitz.open()
+    page = doc.new_page(width=612, height=792)
+    for row in range(4):
+        page.insert_text((60, 120 + row * 20), f"ITEM-{row}   Widget   {row + 1}   10.00")
+        if ruled:
+            page.draw_line((50, 105 + row * 20), (400, 105 + row * 20))
+    if ruled:
+        for x in (50, 150, 300, 400):
+            page.draw_line((x, 105), (x, 165))
+    return doc, page
+
+def test_ruled_grid_is_detected():
+    doc, page = make_page(ruled=True)
+    assert page_has_ruled_table(page)
+    # Camelot area in PDF space covering the grid, and one well below it
+    assert page_has_ruled_table(page, ['0,700,612,600'])
+    assert not page_has_ruled_table(page, ['0,300,612,100'])
+
+def test_text_only_page_has_no_rulings():
+    doc, page = make_page(ruled=False)
+    assert not page_has_ruled_table(page)
@@ -0,0 +1,69 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import dataclasses
+import time
+import pytest
+from fixture_recorder import ReplayExtractor, load_fixture
+from metrics import MetricsRegistry
+from po_extractor import EXTRACTOR_SETTINGS, IntelligentExtractor
+
+class FlakyTableReplay(ReplayExtractor):
+    """Replay whose table strategy leaves what a Ghostscript crash would: a read, a metric and a transient error."""
+
+    def _line_item_strategies(self):
+        return [('camelot:flaky', self._flaky_table_read), ('structured', self._extract_structured_line_items)]
+
+    def _flaky_table_read(self):
+        self.table_reads += 1
+        self.metrics.inc('po_table_reads', backend='camelot')
+        self.transient_errors.append("camelot: Ghostscript crashed")
+        return []
+
+def test_race_merges_worker_state_into_the_extractor():
+    metrics = MetricsRegistry()
+    # Nothing clears the threshold, so every strategy reports back
+    settings = dataclasses.replace(EXTRACTOR_SETTINGS, race_strategies=True, race_workers=2, known_good_strategies={},
+                                   confidence_threshold=1.1)
+    for _ in range(2):  # the second race forks with the first one's metrics in the registry
+        extractor = FlakyTableReplay(load_fixture("PO's/DandH-Quote-11931304-0.Pdf"), settings=settings,
+                                     metrics=metrics)
+        extractor.vendor_type = 'unknown'
+        line_items = extractor._extract_line_items_intelligent()
+        assert extractor.line_item_strategy == 'structured'
+        assert len(line_items) == 1
+        assert extractor.table_reads == 1
+        assert extractor.transient_errors == ["camelot: Ghostscript crashed"]
+    assert metrics.counter('po_table_reads').total(backend='camelot') == 2
+
+class SlowTableReplay(ReplayExtractor):
+    """Replay with a table strategy that is still running long after the structured one has won."""
+
+    def _line_item_strategies(self):
+        return [('camelot:slow', self._slow_table_read), ('structured', self._extract_structured_line_items)]
+
+    def _slow_table_read(self):
+        time.sleep(5)
+        return []
+
+def test_losing_strategies_do_not_delay_the_next_race():
+    settings = dataclasses.replace(EXTRACTOR_SETTINGS, race_strategies=True, race_workers=2, known_good_strategies={},
+                                   confidence_threshold=0.9)
+    for _ in range(2):
+        started = time.monotonic()
+        extractor = SlowTableReplay(load_fixture("PO's/DandH-Quote-11931304-0.Pdf"), settings=settings)
+        extractor.vendor_type = 'unknown'
+        extractor._extract_line_items_intelligent()
+        assert extractor.line_item_strategy == 'structured'
+        assert time.monotonic() - started < 2.5  # the first race's slow strategy was cancelled
+
+@pytest.mark.slow
+def test_unknown_vendor_races_strategies():
+    settings = dataclasses.replace(EXTRACTOR_SETTINGS, race_strategies=True)
+    extractor = IntelligentExtractor("PO's/DandH-Quote-11931304-0.Pdf", settings=settings)
+    extractor.vendor_type = 'unknown'
+    line_items = extractor._extract_line_items_intelligent()
+    assert extractor.line_item_strategy == 'structured'
+    assert extractor.line_item_confidence == 1.0
+    assert len(line_items) == 1
+    assert abs(line_items[0].line_total - 9817.75) < 0.01
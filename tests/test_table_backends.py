@@ -0,0 +1,32 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import pytest
+from po_extractor import IntelligentExtractor, LineItem
+from table_backends import get_backend
+from benchmark_backends import line_item_accuracy
+
+@pytest.mark.slow
+def test_backends_extract_dandh_line_item():
+    extractor = IntelligentExtractor("PO's/DandH-Quote-11931304-0.Pdf")
+    lookup = extractor.registry.get('dandh').header_lookup
+    for backend in ['camelot', 'camelot-stream']:
+        items = extractor._extract_table_line_items(backend, ['0,200,800,500'], lookup)
+        assert [item.item_number for item in items] == ['WEBCARDLXECA']
+
+def test_pymupdf_backend_returns_positional_frames():
+    frames = get_backend('pymupdf').read_tables("PO's/DandH-Quote-11931304-0.Pdf", 0, ['0,200,800,500'])
+    assert frames
+    assert list(frames[0].columns) == list(range(frames[0].shape[1]))
+    assert 'Description' in frames[0].values
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        get_backend('tabula')
+
+def test_line_item_accuracy():
+    expected = [{'item_number': 'A1', 'quantity': 2, 'unit_price': 5.0, 'line_total': 10.0},
+                {'item_number': 'B2', 'quantity': 1, 'unit_price': 3.0, 'line_total': 3.0}]
+    assert line_item_accuracy([LineItem('A1', 'x', 2, 5.0, 10.0), LineItem('B2', 'y', 1, 3.0, 3.0)], expected) == 1.0
+    assert line_item_accuracy([LineItem('A1', 'x', 2, 5.0, 10.0)], expected) == pytest.approx(2 / 3)
+    assert line_item_accuracy([], expected) == 0.0
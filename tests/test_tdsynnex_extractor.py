@@ -1,8 +1,11 @@
 import sys
 import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import pytest
 from po_extractor import IntelligentExtractor
 
+pytestmark = pytest.mark.slow
+
 def test_tdsynnex_extraction():
     sample_file = "PO's/email_quote_excel_cpo_42566579.xlsx"  # Update path if needed
     extractor = IntelligentExtractor(sample_file)
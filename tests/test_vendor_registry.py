@@ -0,0 +1,68 @@
+import sys
+import os
+import json
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import pytest
+from vendor_registry import VendorRegistry
+
+VENDOR = {
+    'patterns': ['acme corp', 'acme.com'],
+    'table_areas': ['0,100,800,600'],
+    'headers': {'item_number': 'SKU', 'quantity': 'Qty'},
+    'vendor_info': {'name': 'Acme Corp', 'address': '1 Main St', 'phone': '555-0100', 'website': 'www.acme.com'}
+}
+
+def write_registry(path, vendors):
+    with open(path, 'w') as f:
+        json.dump({'vendors': vendors}, f)
+
+def test_detects_vendor_from_text_and_filename(tmp_path):
+    path = tmp_path / 'vendors.json'
+    write_registry(path, {'acme': VENDOR})
+    registry = VendorRegistry(str(path))
+    assert registry.detect('quote from acme corp', 'q1.pdf') == 'acme'
+    assert registry.detect('nothing here', 'acme.com-quote.pdf') == 'acme'
+    assert registry.detect('nothing here', 'q1.pdf') == 'unknown'
+    assert registry.get('acme').header_lookup == {'sku': 'item_number', 'qty': 'quantity'}
+
+def test_rejects_invalid_table_area(tmp_path):
+    path = tmp_path / 'vendors.json'
+    write_registry(path, {'acme': dict(VENDOR, table_areas=['0,100,800'])})
+    with pytest.raises(ValueError):
+        VendorRegistry(str(path))
+
+def test_rejects_unknown_backend(tmp_path):
+    path = tmp_path / 'vendors.json'
+    write_registry(path, {'acme': dict(VENDOR, backend='camelot-steam')})
+    with pytest.raises(ValueError, match='camelot-steam'):
+        VendorRegistry(str(path))
+    assert VendorRegistry(str(path), backends=['camelot-steam']).get('acme').backend == 'camelot-steam'
+
+def test_hot_reload_on_mtime_change(tmp_path):
+    path = tmp_path / 'vendors.json'
+    write_registry(path, {'acme': VENDOR})
+    registry = VendorRegistry(str(path))
+    assert not registry.reload_if_changed()
+    write_registry(path, {'acme': VENDOR, 'globex': dict(VENDOR, patterns=['globex'])})
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert registry.reload_if_changed()
+    assert registry.detect('globex invoice') == 'globex'
+
+def test_invalid_reload_keeps_previous_state(tmp_path):
+    path = tmp_path / 'vendors.json'
+    write_registry(path, {'acme': VENDOR})
+    registry = VendorRegistry(str(path))
+    with open(path, 'w') as f:
+        f.write('{"vendors": {"acme": ')  # half-saved
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert not registry.reload_if_changed()
+    assert not registry.reload_if_changed()  # not retried until the file changes again
+    assert registry.detect('quote from acme corp') == 'acme'
+
+def test_add_vendor_persists(tmp_path):
+    path = tmp_path / 'vendors.json'
+    write_registry(path, {})
+    VendorRegistry(str(path)).add_vendor('acme', VENDOR)
+    assert VendorRegistry(str(path)).vendor_info('acme')['name'] == 'Acme Corp'
@@ -0,0 +1,32 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import pandas as pd
+from po_extractor import IntelligentExtractor
+
+def test_known_vendor_uses_single_targeted_camelot_call():
+    extractor = IntelligentExtractor("PO's/DandH-Quote-11931304-0.Pdf")
+    names = [name for name, _ in extractor._line_item_strategies()]
+    assert names == ['camelot-stream:vendor', 'structured']
+
+def test_unknown_vendor_sweeps_generic_areas():
+    extractor = IntelligentExtractor("PO's/DandH-Quote-11931304-0.Pdf")
+    extractor.vendor_type = 'unknown'
+    names = [name for name, _ in extractor._line_item_strategies()]
+    assert names[:4] == ['camelot:0,100,800,600', 'camelot:0,200,800,500', 'camelot:0,150,800,550', 'camelot:0,50,800,650']
+
+def test_configured_headers_map_camelot_rows():
+    extractor = IntelligentExtractor("PO's/DandH-Quote-11931304-0.Pdf")
+    df = pd.DataFrame([
+        ['Quote', '', '', '', '', ''],
+        ['Ln', 'Ord', 'Model', 'Description', 'Unit', 'Extended'],
+        ['1', '25', 'WEBCARDLXECA', 'Network Management Card', '392.71', '9,817.75'],
+        ['', '', '', 'with SNMP', '', ''],
+        ['', '', '', 'Merchandise Total', '', '9,817.75'],
+    ])
+    items = extractor._extract_from_dataframe(df, extractor.registry.get('dandh').header_lookup)
+    assert len(items) == 1
+    assert items[0].item_number == 'WEBCARDLXECA'
+    assert items[0].description == 'Network Management Card\nwith SNMP'
+    assert items[0].quantity == 25.0
+    assert abs(items[0].line_total - 9817.75) < 0.01
@@ -0,0 +1,74 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import time
+import multiprocessing
+import dataclasses
+from fixture_recorder import ReplayExtractor, load_fixture
+from metrics import MetricsRegistry
+from po_extractor import EXTRACTOR_SETTINGS
+from retry_scheduler import TRANSIENT
+from worker_pool import WorkerPool, child_pids, read_rss_bytes
+
+WORKER_METRICS = MetricsRegistry()
+
+def echo_extract(file_path):
+    WORKER_METRICS.inc('po_files', outcome='success')
+    return {'file_path': file_path, 'po': file_path.upper(), 'vendor': 'dandh', 'category': None, 'error': None}
+
+def hog_extract(file_path):
+    if 'hog' in file_path:
+        ballast = bytearray(200 * 1024 * 1024)
+        ballast[::4096] = b'x' * len(ballast[::4096])  # touch every page so it counts as resident
+        time.sleep(5)
+    return echo_extract(file_path)
+
+def race_extract(file_path):
+    """Race an unknown vendor's strategies, which starts a pool inside the worker."""
+    settings = dataclasses.replace(EXTRACTOR_SETTINGS, race_strategies=True, race_workers=2, known_good_strategies={})
+    extractor = ReplayExtractor(load_fixture(file_path), settings=settings)
+    extractor.vendor_type = 'unknown'
+    line_items = extractor._extract_line_items_intelligent()
+    return {'file_path': file_path, 'po': len(line_items), 'vendor': extractor.line_item_strategy, 'category': None,
+            'error': None}
+
+def drain_worker_metrics():
+    return WORKER_METRICS.drain()
+
+def test_read_rss_of_this_process():
+    assert read_rss_bytes() > 0
+    assert read_rss_bytes(pid=2 ** 30) == 0
+
+def test_child_pids_of_this_process():
+    process = multiprocessing.Process(target=time.sleep, args=(5,))
+    process.start()
+    try:
+        assert process.pid in child_pids(os.getpid())
+    finally:
+        process.kill()
+        process.join()
+
+def test_workers_are_recycled_after_max_files():
+    metrics = MetricsRegistry()
+    pool = WorkerPool(echo_extract, workers=2, max_files=2, metrics=metrics, drain_metrics=drain_worker_metrics,
+                      poll_interval=0.05)
+    files = [f"quote{i}.pdf" for i in range(6)]
+    results = list(pool.run(files))
+    assert sorted(result['po'] for result in results) == sorted(name.upper() for name in files)
+    assert len({result['worker_pid'] for result in results}) >= 3
+    assert pool.recycled >= 2
+    assert metrics.counter('po_files').total(outcome='success') == 6
+
+def test_watchdog_kills_and_requeues_then_fails_transient():
+    pool = WorkerPool(hog_extract, workers=1, file_budget_mb=100, max_requeues=1, poll_interval=0.05)
+    results = {result['file_path']: result for result in pool.run(['hog.pdf', 'ok.pdf'])}
+    assert results['ok.pdf']['po'] == 'OK.PDF'
+    assert results['hog.pdf']['po'] is None
+    assert results['hog.pdf']['category'] == TRANSIENT
+    assert 'memory budget' in results['hog.pdf']['error']
+    assert pool.killed == 2
+
+def test_workers_can_race_strategies():
+    pool = WorkerPool(race_extract, workers=1, max_files=1, poll_interval=0.05)
+    results = list(pool.run(["PO's/DandH-Quote-11931304-0.Pdf"] * 2))
+    assert [(result['po'], result['vendor']) for result in results] == [(1, 'structured')] * 2
@@ -0,0 +1,228 @@
+"""
+Vendor registry: the single source of vendor knowledge.
+
+Detection patterns, table areas, column headers and vendor contact details
+all live in vendor_config.json. The registry loads and validates that file
+once, precompiles it into indexed structures and can hot-reload it when the
+file's mtime changes.
+"""
+
+import json
+import logging
+import os
+from dataclasses import dataclass, field
+from typing import Collection, Dict, List, Optional, Tuple
+
+from table_backends import BACKENDS
+
+DEFAULT_REGISTRY_PATH = 'vendor_config.json'
+
+LINE_ITEM_FIELDS = ('item_number', 'description', 'quantity', 'unit_price', 'line_total')
+VENDOR_INFO_FIELDS = ('name', 'address', 'phone', 'website')
+
+UNKNOWN_VENDOR_INFO = {
+    'name': 'Unknown Vendor',
+    'address': 'Address Not Found',
+    'phone': 'Phone Not Found',
+    'website': 'Website Not Found'
+}
+
+
+@dataclass(frozen=True)
+class VendorSpec:
+    """Precompiled configuration for a single vendor."""
+    key: str
+    patterns: Tuple[str, ...]
+    vendor_info: Dict[str, str]
+    headers: Dict[str, str] = field(default_factory=dict)
+    header_lookup: Dict[str, str] = field(default_factory=dict)
+    table_areas: Tuple[str, ...] = ()
+    columns: Tuple[str, ...] = ()
+    backend: Optional[str] = None
+    file_type: str = 'pdf'
+    skip_rows: int = 0
+    raw: dict = field(default_factory=dict, compare=False, repr=False)
+
+
+def _parse_table_area(area: str) -> Tuple[float, float, float, float]:
+    """Parse a Camelot 'x1,y1,x2,y2' table area string."""
+    parts = [p.strip() for p in str(area).split(',')]
+    if len(parts) != 4:
+        raise ValueError(f"table area '{area}' must have four comma-separated coordinates")
+    return tuple(float(p) for p in parts)
+
+
+def compile_vendor(key: str, config: dict, backends: Collection[str] = None) -> VendorSpec:
+    """Validate one vendor's raw config and compile it into a VendorSpec.
+
+    backends are the table backend names a vendor may choose (default: BACKENDS).
+    """
+    backends = backends if backends is not None else BACKENDS
+    if not isinstance(config, dict):
+        raise ValueError(f"vendor '{key}': configuration must be an object")
+
+    patterns = config.get('patterns')
+    if not patterns or not all(isinstance(p, str) and p.strip() for p in patterns):
+        raise ValueError(f"vendor '{key}': 'patterns' must be a non-empty list of strings")
+
+    vendor_info = config.get('vendor_info', {})
+    missing = [f for f in VENDOR_INFO_FIELDS if f not in vendor_info]
+    if missing:
+        raise ValueError(f"vendor '{key}': vendor_info is missing {', '.join(missing)}")
+
+    headers = config.get('headers', {})
+    unknown = [f for f in headers if f not in LINE_ITEM_FIELDS]
+    if unknown:
+        raise ValueError(f"vendor '{key}': unknown header field(s) {', '.join(unknown)}")
+
+    table_areas = tuple(config.get('table_areas', []))
+    for area in table_areas:
+        try:
+            _parse_table_area(area)
+        except ValueError as e:
+            raise ValueError(f"vendor '{key}': {e}") from None
+
+    columns = tuple(config.get('columns', []))
+    if columns and len(columns) != len(table_areas):
+        raise ValueError(f"vendor '{key}': 'columns' needs one separator string per table area")
+    for separators in columns:
+        try:
+            [float(x) for x in str(separators).split(',')]
+        except ValueError:
+            raise ValueError(f"vendor '{key}': column separators '{separators}' must be comma-separated numbers") from None
+
+    backend = config.get('backend')
+    if backend is not None and backend not in backends:
+        raise ValueError(f"vendor '{key}': unknown table backend {backend!r} (available: {', '.join(backends)})")
+
+    skip_rows = config.get('skip_rows', 0)
+    if not isinstance(skip_rows, int) or skip_rows < 0:
+        raise ValueError(f"vendor '{key}': 'skip_rows' must be a non-negative integer")
+
+    return VendorSpec(
+        key=key,
+        patterns=tuple(p.lower() for p in patterns),
+        vendor_info={f: vendor_info[f] for f in VENDOR_INFO_FIELDS},
+        headers=dict(headers),
+        header_lookup={h.strip().lower(): f for f, h in headers.items() if h},
+        table_areas=table_areas,
+        columns=columns,
+        backend=backend,
+        file_type=config.get('file_type', 'pdf'),
+        skip_rows=skip_rows,
+        raw=config
+    )
+
+
+class VendorRegistry:
+    """Loaded, validated and indexed view of vendor_config.json."""
+
+    def __init__(self, path: str = DEFAULT_REGISTRY_PATH, backends: Collection[str] = None):
+        self.path = path
+        self.backends = backends  # table backend names vendors may choose; None for BACKENDS
+        self._mtime = None
+        # (vendors, pattern index), replaced as one object so a reader never mixes two loads
+        self._state: Tuple[Dict[str, VendorSpec], Dict[str, Tuple[str, ...]]] = ({}, {})
+        self.load()
+
+    def load(self):
+        """(Re)load the registry file.
+
+        Raises OSError or ValueError if the file cannot be read or is invalid;
+        the previous state is then kept.
+        """
+        mtime = os.stat(self.path).st_mtime_ns
+        with open(self.path, 'r') as f:
+            data = json.load(f)
+        vendors = {key: compile_vendor(key, cfg, self.backends) for key, cfg in data.get('vendors', {}).items()}
+
+        # Inverted index: pattern -> vendors that use it, so each distinct
+        # pattern is searched once per document however many vendors share it
+        pattern_index: Dict[str, List[str]] = {}
+        for key, spec in vendors.items():
+            for pattern in spec.patterns:
+                pattern_index.setdefault(pattern, []).append(key)
+
+        # Swap in the new state in one step so readers (other threads too) never see a partial load
+        self._state = (vendors, {p: tuple(v) for p, v in pattern_index.items()})
+        self._mtime = mtime
+
+    def reload_if_changed(self) -> bool:
+        """Reload the registry if the file's mtime changed. Returns True on reload.
+
+        A file that fails to load (e.g. half-saved or mistyped) is logged once
+        and the previous state stays in use until the file changes again.
+        """
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return False
+        if mtime == self._mtime:
+            return False
+        try:
+            self.load()
+        except (OSError, ValueError) as e:
+            logging.error(f"Keeping the previous vendor registry, {self.path} is invalid: {e}")
+            self._mtime = mtime
+            return False
+        return True
+
+    @property
+    def _vendors(self) -> Dict[str, VendorSpec]:
+        return self._state[0]
+
+    @property
+    def vendors(self) -> Dict[str, VendorSpec]:
+        return self._vendors
+
+    def get(self, key: str) -> Optional[VendorSpec]:
+        return self._vendors.get(key)
+
+    def vendor_info(self, key: str) -> dict:
+        spec = self._vendors.get(key)
+        return dict(spec.vendor_info) if spec else dict(UNKNOWN_VENDOR_INFO)
+
+    def detect(self, text_lower: str, filename_lower: str = '') -> str:
+        """Score every vendor by pattern hits; text hits are worth 2, filename hits 3."""
+        vendors, pattern_index = self._state
+        scores = dict.fromkeys(vendors, 0)
+        for pattern, keys in pattern_index.items():
+            points = (2 if pattern in text_lower else 0) + (3 if pattern in filename_lower else 0)
+            if points:
+                for key in keys:
+                    scores[key] += points
+        if not scores:
+            return 'unknown'
+        best_vendor = max(scores.items(), key=lambda x: x[1])
+        return best_vendor[0] if best_vendor[1] > 0 else 'unknown'
+
+    def raw_config(self) -> dict:
+        return {'vendors': {key: spec.raw for key, spec in self._vendors.items()}}
+
+    def add_vendor(self, key: str, config: dict):
+        """Validate and add (or replace) a vendor, then persist the registry."""
+        spec = compile_vendor(key, config, self.backends)
+        data = self.raw_config()
+        data['vendors'][key] = spec.raw
+        self.save(data)
+
+    def update_vendor(self, key: str, **changes):
+        """Merge changes into an existing vendor's config and persist the registry.
+
+        A change whose value is None removes that setting.
+        """
+        if key not in self._vendors:
+            raise KeyError(f"vendor '{key}' is not configured")
+        config = dict(self._vendors[key].raw)
+        config.update(changes)
+        config = {name: value for name, value in config.items() if value is not None}
+        self.add_vendor(key, config)
+
+    def save(self, data: dict = None):
+        """Atomically write the registry file and reload it."""
+        data = data if data is not None else self.raw_config()
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, self.path)
+        self.load()
@@ -0,0 +1,213 @@
+"""
+Recycled worker processes with a memory watchdog.
+
+Camelot/Ghostscript and pandas grow a process's heap over thousands of
+quotes. In worker mode each quote is extracted in a child process that is
+replaced after max_files quotes or once its RSS passes a ceiling, so memory
+stays flat over long batches. While a quote is being extracted the parent
+polls the worker's RSS; a worker that grows by more than the per-file
+budget is killed, and the quote is requeued once on a fresh worker before
+it is reported as a transient failure.
+
+RSS is read from /proc (Linux); elsewhere the limits are not enforced.
+"""
+
+import logging
+import multiprocessing
+import os
+import signal
+from collections import deque
+from multiprocessing.connection import wait
+
+from retry_scheduler import TRANSIENT
+
+MB = 1024 * 1024
+
+
+def read_rss_bytes(pid='self') -> int:
+    """Resident set size of a process from /proc/<pid>/status; 0 if unavailable."""
+    try:
+        with open(f'/proc/{pid}/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return 0
+
+
+def child_pids(pid: int) -> list:
+    """PIDs of a process's children from /proc (Linux); empty if unavailable."""
+    try:
+        with open(f'/proc/{pid}/task/{pid}/children', 'r') as f:
+            return [int(child) for child in f.read().split()]
+    except (OSError, ValueError):
+        return []
+
+
+def _worker_main(conn, extract, max_files: int, rss_ceiling: int, drain_metrics):
+    """Child process: extract quotes sent by the parent until it is time to recycle."""
+    if drain_metrics is not None:
+        drain_metrics()  # drop series inherited from the parent by fork
+    files = 0
+    while True:
+        try:
+            file_path = conn.recv()
+        except EOFError:
+            break
+        if file_path is None:
+            break
+        result = extract(file_path)
+        files += 1
+        rss = read_rss_bytes()
+        result['worker_pid'] = os.getpid()
+        result['worker_rss'] = rss
+        result['recycle'] = files >= max_files or bool(rss_ceiling and rss > rss_ceiling)
+        if drain_metrics is not None:
+            result['metrics'] = drain_metrics()  # the parent merges these into its registry
+        conn.send(result)
+        if result['recycle']:
+            break
+    conn.close()
+
+
+class _Worker:
+    def __init__(self, ctx, extract, max_files, rss_ceiling, drain_metrics):
+        self.conn, child_conn = ctx.Pipe()
+        # Not daemonic: extraction starts its own pools (strategy racing, OCR, long PDFs)
+        self.process = ctx.Process(target=_worker_main, daemon=False,
+                                   args=(child_conn, extract, max_files, rss_ceiling, drain_metrics))
+        self.process.start()
+        child_conn.close()
+        self.file_path = None
+        self.baseline_rss = 0
+
+    def assign(self, file_path: str):
+        self.file_path = file_path
+        self.baseline_rss = read_rss_bytes(self.process.pid)
+        self.conn.send(file_path)
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except (OSError, ValueError):
+            pass
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+    def kill(self):
+        # Then the pool processes it started, which would otherwise be orphaned
+        children = child_pids(self.process.pid)
+        self.process.kill()
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except OSError:
+                pass
+        self.process.join()
+        self.conn.close()
+
+
+class WorkerPool:
+    """Run extract(file_path) -> dict for many files in recycled, memory-watched worker processes.
+
+    extract and drain_metrics must be picklable (module-level functions).
+    drain_metrics() runs in the worker after each file and returns a
+    MetricsRegistry.drain() snapshot that is merged into metrics here.
+    """
+
+    def __init__(self, extract, workers: int = 1, max_files: int = 200, rss_ceiling_mb: float = None,
+                 file_budget_mb: float = None, max_requeues: int = 1, metrics=None, drain_metrics=None,
+                 poll_interval: float = 0.2):
+        self.extract = extract
+        self.workers = max(1, workers)
+        self.max_files = max(1, max_files)
+        self.rss_ceiling = int(rss_ceiling_mb * MB) if rss_ceiling_mb else 0
+        self.file_budget = int(file_budget_mb * MB) if file_budget_mb else 0
+        self.max_requeues = max_requeues
+        self.metrics = metrics
+        self.drain_metrics = drain_metrics
+        self.poll_interval = poll_interval
+        self.recycled = 0
+        self.killed = 0
+        self._ctx = multiprocessing.get_context()
+
+    def _spawn(self) -> _Worker:
+        return _Worker(self._ctx, self.extract, self.max_files, self.rss_ceiling, self.drain_metrics)
+
+    def run(self, file_paths):
+        """Yield one result dict per file, in completion order.
+
+        file_paths is consumed lazily, one path each time a worker is free,
+        so it can be a generator that claims files as they are handed out.
+        """
+        source = iter(file_paths)
+        queue = deque()  # files requeued after their worker was lost
+        requeues = {}
+        idle = []
+        busy = {}
+        try:
+            while True:
+                while len(busy) < self.workers:
+                    file_path = queue.popleft() if queue else next(source, None)
+                    if file_path is None:
+                        break
+                    worker = idle.pop() if idle else self._spawn()
+                    worker.assign(file_path)
+                    busy[worker.conn] = worker
+                if not busy:
+                    break
+
+                for conn in wait(list(busy), timeout=self.poll_interval):
+                    worker = busy.pop(conn)
+                    try:
+                        result = conn.recv()
+                    except EOFError:
+                        result = self._lost(worker, queue, requeues, "worker process died")
+                        if result is not None:
+                            yield result
+                        continue
+                    if self.metrics is not None and result.get('metrics'):
+                        self.metrics.merge(result.pop('metrics'))
+                    if result.get('recycle'):
+                        logging.debug(f"DEBUG: Recycling worker {worker.process.pid} "
+                                      f"(RSS {result.get('worker_rss', 0) / MB:.0f} MB)")
+                        self.recycled += 1
+                        worker.stop()
+                    else:
+                        idle.append(worker)
+                    yield result
+
+                # Watchdog: kill workers whose current file blew its memory budget
+                if self.file_budget:
+                    for conn, worker in list(busy.items()):
+                        growth = read_rss_bytes(worker.process.pid) - worker.baseline_rss
+                        if growth > self.file_budget:
+                            busy.pop(conn)
+                            logging.warning(f"  Killing worker on {os.path.basename(worker.file_path)}: "
+                                            f"grew {growth / MB:.0f} MB (budget {self.file_budget / MB:.0f} MB)")
+                            self.killed += 1
+                            result = self._lost(worker, queue, requeues, f"exceeded memory budget "
+                                                f"({growth / MB:.0f} MB > {self.file_budget / MB:.0f} MB)")
+                            if result is not None:
+                                yield result
+        finally:
+            for worker in idle:
+                worker.stop()
+            for worker in busy.values():
+                worker.kill()
+
+    def _lost(self, worker: _Worker, queue: deque, requeues: dict, reason: str):
+        """Requeue a dead or killed worker's file, or return a transient failure once it has used its requeues."""
+        worker.kill()
+        file_path = worker.file_path
+        requeues[file_path] = requeues.get(file_path, 0) + 1
+        if requeues[file_path] <= self.max_requeues:
+            logging.warning(f"  Requeued {os.path.basename(file_path)}: {reason}")
+            queue.append(file_path)
+            return None
+        return {'file_path': file_path, 'po': None, 'vendor': None, 'table_reads': 0,
+                'category': TRANSIENT, 'error': reason}